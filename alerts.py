@@ -5,35 +5,56 @@ alerts.py
 """
 
 import os
+import time
 import logging
 import requests
 
+from logconfig import SEND_FAILURES
+from metrics import ALERTS, SEND_SECONDS, THROTTLED
+from ratelimit import Throttled, parse_retry_after
+from whatsapp import WHATSAPP_FROM
+
 logger = logging.getLogger("tradel.alerts")
 
+# Override to point at a local stub when testing
+ONESIGNAL_API_URL = os.environ.get("ONESIGNAL_API_URL", "https://onesignal.com/api/v1/notifications")
+
+PUSH_BATCH_SIZE = 2000     # OneSignal's limit on include_player_ids per request
+PUSH_RETRIES    = 2        # extra attempts for a failed chunk
+PUSH_BACKOFF    = 0.5      # seconds before the first retry, doubled each time
+
+SEND_PUSH      = SEND_SECONDS.labels("push")
+THROTTLED_PUSH = THROTTLED.labels("push")
+
 
 class AlertSystem:
 
     def __init__(self):
         self.onesignal_app_id  = os.environ.get("ONESIGNAL_APP_ID", "")
         self.onesignal_api_key = os.environ.get("ONESIGNAL_API_KEY", "")
+        self.whatsapp_sender   = WHATSAPP_FROM     # keys the per-sender rate limit
 
     # ── WhatsApp alert ─────────────────────────────────────
     def send_whatsapp_alert(self, user: dict, signal: dict):
         """
         Send a WhatsApp message alert to one user.
-        Returns True/False.
+        Returns True/False, or raises Throttled if Twilio rate-limited it.
         """
         try:
-            from whatsapp import WhatsAppService
-            wa = WhatsAppService()
-            success, result = wa.send_alert(user["phone"], signal)
+            from clients import get_whatsapp_service
+            wa = get_whatsapp_service()
+            success, result = wa.send_alert(user["phone"], signal, user)
             if success:
-                logger.info(f"  📱 WhatsApp alert sent → {user['name']} ({user['phone']})")
+                logger.debug("  📱 WhatsApp alert sent → %s (%s)", user["name"], user["phone"])
             else:
-                logger.error(f"  ❌ WhatsApp failed → {user['name']}: {result}")
+                SEND_FAILURES.log(logger, logging.ERROR, "alert", "  ❌ WhatsApp failed → %s: %s",
+                                  user["name"], result)
             return success
+        except Throttled:
+            raise
         except Exception as e:
-            logger.error(f"  ❌ WhatsApp exception → {user['name']}: {e}")
+            SEND_FAILURES.log(logger, logging.ERROR, "alert", "  ❌ WhatsApp exception → %s: %s",
+                              user["name"], e)
             return False
 
     # ── Phone alarm / push ─────────────────────────────────
@@ -51,6 +72,9 @@ class AlertSystem:
             logger.debug(f"  ℹ️  No push token for {user['name']} – WhatsApp only")
 
     # ── OneSignal push notification ────────────────────────
+    def _push_request(self, push_tokens: list, signal: dict) -> tuple:
+        return push_request(self.onesignal_app_id, self.onesignal_api_key, push_tokens, signal)
+
     def send_push_notification(self, push_token: str, signal: dict) -> dict | None:
         """
         Send a push notification via OneSignal.
@@ -61,34 +85,12 @@ class AlertSystem:
             logger.debug("OneSignal not configured – skipping push notification")
             return None
 
-        action  = signal.get("action", "")
-        pair    = signal.get("pair", "")
-        title   = f"🚨 TradeL: {action} {pair}" if action and pair else "🚨 TradeL Alert"
-        body    = signal.get("message", "New trading signal detected!")[:200]
-
-        headers = {
-            "Content-Type":  "application/json",
-            "Authorization": f"Basic {self.onesignal_api_key}"
-        }
-
-        payload = {
-            "app_id":            self.onesignal_app_id,
-            "include_player_ids": [push_token],
-            "headings":          {"en": title},
-            "contents":          {"en": body},
-            "data":              signal,
-            # High-priority settings so the phone rings
-            "priority":          10,
-            "ios_sound":         "alarm.caf",
-            "android_sound":     "alarm",
-            "android_channel_id": "trade_alerts",
-            "android_led_color": "FFFF0000",   # red LED
-            "android_visibility": 1
-        }
+        headers, payload = self._push_request([push_token], signal)
 
         try:
-            response = requests.post(
-                "https://onesignal.com/api/v1/notifications",
+            from clients import get_session
+            response = get_session("onesignal").post(
+                ONESIGNAL_API_URL,
                 headers=headers,
                 json=payload,
                 timeout=10
@@ -106,6 +108,88 @@ class AlertSystem:
             logger.error(f"  ❌ Push notification error: {e}")
             return None
 
+    # ── Batched push: one request per PUSH_BATCH_SIZE devices ──
+    def send_push_batch(self, push_tokens: list, signal: dict,
+                        batch_size: int = PUSH_BATCH_SIZE, retries: int = PUSH_RETRIES,
+                        limiter=None, deadline: float | None = None) -> list | None:
+        """
+        Send one notification for `signal` to every token, chunked into
+        multi-recipient OneSignal requests. Failed chunks (network error,
+        429 or 5xx) are retried with backoff. Returns one result per chunk:
+          {"start", "size", "ok", "id", "status_code", "attempts", "errors"}
+        or None if OneSignal is not configured (nothing to retry).
+
+        With a ratelimit.Limiter each request waits for a token, and a 429
+        pauses the limiter and queues the chunk again (until `deadline`)
+        instead of using up a retry.
+        """
+        if not push_tokens:
+            return []
+        if not self.onesignal_app_id or not self.onesignal_api_key:
+            logger.debug("OneSignal not configured – skipping push batch")
+            return None
+
+        from clients import get_session
+        session = get_session("onesignal")
+        results = []
+
+        for start in range(0, len(push_tokens), batch_size):
+            chunk = push_tokens[start:start + batch_size]
+            headers, payload = self._push_request(chunk, signal)
+            result = {"start": start, "size": len(chunk), "ok": False, "id": None,
+                      "status_code": None, "attempts": 0, "errors": None}
+
+            failures = 0
+            while True:
+                if limiter is not None and not limiter.acquire(deadline):
+                    result["errors"] = result["errors"] or "deadline exceeded"
+                    break
+                result["attempts"] += 1
+                retry_after = None
+                sending = time.perf_counter()
+                try:
+                    response = session.post(ONESIGNAL_API_URL, headers=headers,
+                                            json=payload, timeout=10)
+                except requests.exceptions.RequestException as e:
+                    SEND_PUSH.observe(time.perf_counter() - sending)
+                    result["errors"] = str(e)
+                else:
+                    SEND_PUSH.observe(time.perf_counter() - sending)
+                    result["status_code"] = response.status_code
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = {}
+                    result["errors"] = body.get("errors")
+                    if response.status_code == 200 and body.get("id"):
+                        result["ok"] = True
+                        result["id"] = body["id"]
+                        if limiter is not None:
+                            limiter.succeeded()
+                        break
+                    if response.status_code == 429:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if limiter is not None and deadline is not None:
+                            THROTTLED_PUSH.inc()
+                            limiter.throttled(retry_after)
+                            continue               # deferred, not failed
+                    elif response.status_code < 500:
+                        break                      # bad request – retrying won't help
+                if failures >= retries:
+                    break
+                failures += 1
+                time.sleep(max(PUSH_BACKOFF * 2 ** (failures - 1), retry_after or 0))
+
+            ALERTS.labels("push", "sent" if result["ok"] else "failed").inc(len(chunk))
+            if result["ok"]:
+                logger.info(f"  🔔 Push batch sent to {len(chunk)} device(s) | id: {result['id']}")
+            else:
+                logger.error(f"  ❌ Push batch of {len(chunk)} failed after "
+                             f"{result['attempts']} attempt(s): {result['errors']}")
+            results.append(result)
+
+        return results
+
     # ── Renewal reminders ──────────────────────────────────
     def send_renewal_reminders(self, users: list):
         """
@@ -113,8 +197,8 @@ class AlertSystem:
         to users expiring in 3 days or fewer.
         """
         from datetime import datetime
-        from whatsapp import WhatsAppService
-        wa = WhatsAppService()
+        from clients import get_whatsapp_service
+        wa = get_whatsapp_service()
 
         reminded = 0
         for user in users:
@@ -131,4 +215,36 @@ class AlertSystem:
                 logger.error(f"Reminder error for {user['id']}: {e}")
 
         logger.info(f"📨 Sent {reminded} renewal reminder(s)")
-        return reminded
\ No newline at end of file
+        return reminded
+
+
+# ─────────────────────────────────────────────
+# REQUEST BUILDER (shared with async_alerts.py)
+# ─────────────────────────────────────────────
+def push_request(app_id: str, api_key: str, push_tokens: list, signal: dict) -> tuple:
+    """Headers and payload for one OneSignal notification to `push_tokens`."""
+    action  = signal.get("action", "")
+    pair    = signal.get("pair", "")
+    title   = f"🚨 TradeL: {action} {pair}" if action and pair else "🚨 TradeL Alert"
+    body    = signal.get("message", "New trading signal detected!")[:200]
+
+    headers = {
+        "Content-Type":  "application/json",
+        "Authorization": f"Basic {api_key}"
+    }
+
+    payload = {
+        "app_id":            app_id,
+        "include_player_ids": push_tokens,
+        "headings":          {"en": title},
+        "contents":          {"en": body},
+        "data":              signal,
+        # High-priority settings so the phone rings
+        "priority":          10,
+        "ios_sound":         "alarm.caf",
+        "android_sound":     "alarm",
+        "android_channel_id": "trade_alerts",
+        "android_led_color": "FFFF0000",   # red LED
+        "android_visibility": 1
+    }
+    return headers, payload
@@ -2,28 +2,29 @@
 """
 TradeL Bot - Main Application
 app.py
+
+Development:  python app.py
+Production:   gunicorn -c gunicorn.conf.py wsgi:app   (see wsgi.py)
 """
 
 import os
-import re
 import json
 import time
 import logging
 import threading
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from urllib.parse import urlencode
+from flask import Flask, Blueprint, Response, current_app, request, jsonify
+
+from ids import new_id
+from logconfig import setup_logging
+from metrics import REGISTRY, PARSE_SECONDS, SIGNALS, WEBHOOK_SECONDS
+from signal_parser import parse_signal
+from users import LISTED_FIELDS, expiry_timestamp, encode_cursor, decode_cursor
 
 # ─────────────────────────────────────────────
 # LOGGING
 # ─────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("logs/tradel.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("tradel")
 
 
@@ -34,10 +35,44 @@ class TradeLBot:
 
     def __init__(self):
         logger.info("🚀 Initializing TradeL Bot")
+        self.fanout   = None
+        self.stopping = threading.Event()
         self.setup_directories()
         self.load_config()
+
+        from storage import get_storage
+        self.storage = get_storage(self.config)
         self.load_users()
 
+        from persistence import PersistenceManager
+        self.persistence = PersistenceManager(
+            self.storage,
+            window=self.config.get("persist_window", 2.0),
+            snapshot=self.repo.snapshot
+        )
+        self.setup_cluster()
+
+        from signal_queue import SignalQueue
+        self.signal_queue = SignalQueue(
+            self.dispatch_signal,
+            workers=self.config.get("dispatch_workers", 2)
+        )
+
+        from retry_queue import RetryQueue
+        self.retry_queue = RetryQueue.from_config(
+            self.config, self.storage, self.redeliver,
+            busy=self.signal_queue.busy,
+            leader=lambda: self.scheduler_lock is None or self.scheduler_lock.held
+        )
+
+        from dedup import SignalDeduper
+        self.dedup = SignalDeduper.from_config(self.config, self.storage)
+        self.dedup_pruned = time.time()
+
+        from counters import DailyCounters
+        self.today = DailyCounters(self.storage, window=self.config.get("persist_window", 2.0))
+        self.register_metrics()
+
     # ── Directory & File Setup ────────────────
     def setup_directories(self):
         for folder in ["data", "logs", "signals"]:
@@ -56,7 +91,25 @@ class TradeLBot:
                 "currency": "NGN",
                 "monthly_price_ngn": 5000,
                 "monthly_price_usd": 19.99,
-                "check_interval": 60   # seconds between subscription checks
+                "storage": "json",  # "json" or "sqlite" (see storage.py)
+                "persist_window": 2.0,  # seconds to batch user changes and daily counts before saving
+                "check_interval": 60,  # seconds between subscription checks
+                "dispatch_workers": 2,  # threads draining the signal queue
+                "fanout_mode": "threads",  # "threads" or "async" (needs aiohttp, see async_alerts.py)
+                "fanout_workers": 32,  # concurrent alert deliveries
+                "async_concurrency": 500,  # open requests per channel in async mode
+                "fanout_deadline": 120,  # max seconds to alert everyone
+                "rate_limits": {"whatsapp": 50, "push": 50},  # sends per second
+                "sender_rate_limits": {},  # sends per second per sender number, e.g. {"whatsapp:+14155238886": 20}
+                "rate_burst": 1,  # sends a provider may save up and fire at once
+                "cluster": False,  # several processes share the sqlite store (see cluster.py)
+                "sync_interval": 0.5,  # seconds between cluster change-feed polls
+                "retry_max_attempts": 5,  # sends per failed alert before it is dead-lettered
+                "retry_base_delay": 30,  # seconds before the first retry, doubled each time
+                "retry_max_delay": 1800,  # longest wait between retries
+                "dedup_ttl": 600,  # seconds a repost of the same signal is dropped
+                "dedup_sid_ttl": 86400,  # seconds a Twilio MessageSid is remembered
+                "dedup_max_entries": 50000  # signal keys kept in memory, per kind
             }
             self.save_config()
 
@@ -65,21 +118,52 @@ class TradeLBot:
             json.dump(self.config, f, indent=2)
 
     def load_users(self):
-        users_path = "data/users.json"
-        if os.path.exists(users_path):
-            with open(users_path, "r") as f:
-                self.users = json.load(f)
-        else:
-            self.users = []
-            self.save_users()
-
-    def save_users(self):
-        with open("data/users.json", "w") as f:
-            json.dump(self.users, f, indent=2)
+        from users import UserRepository
+        from scheduler import ExpiryScheduler
+        self.expiry_scheduler = ExpiryScheduler()
+        # Read the change-feed position first so no write made during the load is missed
+        self.loaded_seq = self.storage.latest_change() if self.storage.shared else 0
+        self.repo = UserRepository(self.storage.load_users(), scheduler=self.expiry_scheduler)
+
+    def setup_cluster(self):
+        """Multi-process mode: one elected scheduler and a change feed between processes."""
+        self.scheduler_lock = None
+        self.change_feed    = None
+        self.cluster = os.environ.get("TRADEL_CLUSTER") == "1" or self.config.get("cluster", False)
+        if not self.cluster:
+            return
+        if not self.storage.shared:
+            raise RuntimeError('Cluster mode needs a shared store: set "storage": "sqlite"')
+        from cluster import SchedulerLock, ChangeFeed
+        self.scheduler_lock = SchedulerLock()
+        self.change_feed = ChangeFeed(
+            self.storage, self.repo,
+            since=self.loaded_seq,
+            skip=self.persistence.is_pending,
+            interval=self.config.get("sync_interval", 0.5)
+        )
+        logger.info(f"🧩 Cluster mode: process {os.getpid()} sharing {self.storage.name} storage")
+
+    def sync(self):
+        """Pick up user changes made by other processes (cluster mode only)."""
+        if self.change_feed is None:
+            return
+        try:
+            self.change_feed.sync()
+        except Exception as e:
+            logger.warning(f"⚠️  Change feed sync failed: {e}")
+
+    @property
+    def users(self):
+        return self.repo.all()
+
+    def save_users(self, users=None):
+        """Queue the given users (all users if None) for the next coalesced write."""
+        self.persistence.mark_dirty(self.users if users is None else users)
 
     # ── User Management ───────────────────────
     def add_user(self, user_data):
-        user_id = "TR" + datetime.now().strftime("%Y%m%d%H%M%S")
+        user_id = new_id("TR")
         user = {
             "id": user_id,
             "name": user_data.get("name", "Trader"),
@@ -92,38 +176,65 @@ class TradeLBot:
             "expiry": None,
             "alerts_received": 0
         }
-        self.users.append(user)
-        self.save_users()
+        self.repo.add(user)
+        self.save_users([user])
         logger.info(f"✅ Added user: {user['name']} ({user_id})")
         return user_id
 
     def activate_user(self, user_id):
-        for user in self.users:
-            if user["id"] == user_id:
-                user["status"] = "active"
-                user["expiry"] = (datetime.now() + timedelta(days=30)).isoformat()
-                self.save_users()
-                logger.info(f"✅ Activated user: {user_id}")
-                return True
+        expiry = (datetime.now() + timedelta(days=30)).isoformat()
+        user = self.repo.activate(user_id, expiry)
+        if user:
+            self.save_users([user])
+            logger.info(f"✅ Activated user: {user_id}")
+            return True
         logger.warning(f"⚠️  User not found: {user_id}")
         return False
 
     def deactivate_user(self, user_id):
-        for user in self.users:
-            if user["id"] == user_id:
-                user["status"] = "inactive"
-                self.save_users()
-                logger.info(f"🔴 Deactivated user: {user_id}")
-                return True
+        user = self.repo.deactivate(user_id)
+        if user:
+            self.save_users([user])
+            logger.info(f"🔴 Deactivated user: {user_id}")
+            return True
         return False
 
+    def get_user(self, user_id):
+        return self.repo.get(user_id)
+
     def get_active_users(self):
-        return [u for u in self.users if u["status"] == "active"]
+        return self.repo.active()
+
+    def counts(self) -> dict:
+        """User totals (kept by the repository's status index) and today's signals and alerts."""
+        return {
+            "total_users":    len(self.repo),
+            "active_users":   self.repo.count("active"),
+            "pending_users":  self.repo.count("pending"),
+            "inactive_users": self.repo.count("inactive"),
+            "signals_today":  self.today.get("signals"),
+            "alerts_today":   self.today.get("alerts")
+        }
+
+    def register_metrics(self):
+        """Gauges for /metrics, read from this bot when scraped (a new bot replaces them)."""
+        REGISTRY.gauge("tradel_signal_queue_depth", "Signals waiting to be sent",
+                       self.signal_queue.queue.qsize)
+        REGISTRY.gauge("tradel_signals_in_flight", "Signals being sent right now",
+                       lambda: self.signal_queue.in_flight)
+        REGISTRY.gauge("tradel_retry_queue_depth", "Alerts waiting for another attempt",
+                       lambda: self.storage.retry_stats()["depth"])
+        REGISTRY.gauge("tradel_retry_queue_oldest_age_seconds",
+                       "Age of the oldest alert waiting for another attempt (0 when none)",
+                       lambda: self.retry_queue.stats()["oldest_age"])
+        REGISTRY.gauge("tradel_users", "Subscribers", lambda: len(self.repo))
+        REGISTRY.gauge("tradel_active_users", "Subscribers who receive alerts",
+                       lambda: self.repo.count("active"))
 
     # ── Signal Processing ─────────────────────
-    def process_signal(self, signal_data):
-        signal_id = "SIG" + datetime.now().strftime("%Y%m%d%H%M%S")
-        signal = {
+    def build_signal(self, signal_data):
+        signal_id = new_id("SIG")
+        return {
             "id": signal_id,
             "timestamp": datetime.now().isoformat(),
             "source": signal_data.get("source", "whatsapp"),
@@ -136,199 +247,430 @@ class TradeLBot:
             "priority": signal_data.get("priority", "medium")
         }
 
-        # Save signal to daily file
-        signals_path = f"signals/{datetime.now().strftime('%Y-%m-%d')}.json"
-        signals = []
-        if os.path.exists(signals_path):
-            with open(signals_path, "r") as f:
-                signals = json.load(f)
-        signals.append(signal)
-        with open(signals_path, "w") as f:
-            json.dump(signals, f, indent=2)
-
-        logger.info(f"📈 Signal detected: {signal_id} | {signal['message'][:60]}")
+    def process_signal(self, signal_data):
+        """Record and alert synchronously. The webhook uses enqueue_signal instead."""
+        signal = self.build_signal(signal_data)
+        self.dispatch_signal(signal)
+        return signal["id"]
+
+    def enqueue_signal(self, signal_data, message_sid=None):
+        """
+        Queue a signal for the dispatcher threads and return its id at once.
+        Returns None, without queueing, for a Twilio retry (same MessageSid)
+        or a repost of a recent signal (see dedup.py).
+        """
+        if self.dedup.check(signal_data, message_sid):
+            return None
+        signal = self.build_signal(signal_data)
+        try:
+            self.signal_queue.enqueue(signal)
+        except Exception:
+            self.dedup.forget(signal_data, message_sid)
+            raise
+        logger.info(f"📥 Signal queued: {signal['id']}")
+        return signal["id"]
+
+    def dispatch_signal(self, signal):
+        # Append signal to the daily journal
+        self.storage.append_signal(signal)
+        self.today.add("signals")
+
+        logger.info(f"📈 Signal detected: {signal['id']} | {signal['message'][:60]}")
         self.trigger_alerts(signal)
-        return signal_id
+
+    def get_fanout(self):
+        """Shared fan-out engine, created on first signal."""
+        if self.fanout is None:
+            if self.config.get("fanout_mode", "threads") == "async":
+                from async_alerts import AsyncFanoutEngine as Engine
+            else:
+                from fanout import FanoutEngine as Engine
+            self.fanout = Engine.from_config(self.config)
+        return self.fanout
 
     def trigger_alerts(self, signal):
-        from alerts import AlertSystem
-        alert_system = AlertSystem()
+        self.sync()
         active_users = self.get_active_users()
         logger.info(f"📣 Sending alerts to {len(active_users)} active users")
 
+        report = self.get_fanout().dispatch(signal, active_users)
+        alerted  = []
+        failures = []
         for user in active_users:
-            try:
-                if user.get("phone"):
-                    alert_system.send_whatsapp_alert(user, signal)
-                    alert_system.trigger_phone_alarm(user, signal)
-                user["alerts_received"] = user.get("alerts_received", 0) + 1
-                logger.info(f"  ✅ Alert sent to {user['name']} ({user['phone']})")
-            except Exception as e:
-                logger.error(f"  ❌ Alert failed for {user['id']}: {e}")
-
-        self.save_users()
+            outcome = report["outcomes"].get(user["id"], {})
+            status  = outcome.get("status")
+            counted = status in ("sent", "failed", "skipped")
+            if counted:
+                alerted.append(user["id"])
+            if status in ("failed", "error", "expired"):
+                failures.append({"user_id": user["id"], "channel": "whatsapp",
+                                 "error": outcome.get("error") or status, "counted": counted})
+            if user.get("push_token") and outcome.get("push") is False:
+                # The engine marks False for failed, raised or late batches; None means not tried
+                failures.append({"user_id": user["id"], "channel": "push",
+                                 "error": "push batch failed", "counted": counted})
+
+        self.count_alerts(alerted)
+        self.today.add("alerts", report["counts"].get("sent", 0))
+        self.retry_queue.record(signal, failures)
+        if failures:
+            # One record for the whole signal instead of a line per recipient
+            sample = [f"{f['user_id']} ({f['channel']}): {f['error']}" for f in failures[:5]]
+            logger.warning(
+                "❌ %d alert(s) of %s not delivered, retrying later | e.g. %s",
+                len(failures), signal["id"], "; ".join(sample),
+                extra={"signal_id": signal["id"], "undelivered": len(failures), "sample": sample}
+            )
+        return report
+
+    def count_alerts(self, user_ids):
+        # Dispatcher threads run concurrently, so bump counters under the repo lock
+        alerted_users = self.repo.increment(user_ids, "alerts_received")
+        if self.storage.shared:
+            # Add to the stored counts: other processes may be counting too
+            self.storage.increment(user_ids, "alerts_received")
+        else:
+            self.save_users(alerted_users)
+
+    def redeliver(self, signal, entries):
+        """
+        Send `signal` again for failed deliveries from the retry queue, each
+        on its own channel only. Users no longer active are dropped.
+        Returns {entry_id: (status, error)} as RetryQueue expects.
+        """
+        self.sync()
+        results = {}
+        users   = {"whatsapp": {}, "push": {}}
+        for entry in entries:
+            user = self.repo.get(entry["user_id"])
+            if user is None or user.get("status") != "active":
+                results[entry["id"]] = ("dropped", "user no longer active")
+            else:
+                users[entry["channel"]][user["id"]] = user
+
+        fanout  = self.get_fanout()
+        reports = {channel: fanout.dispatch(signal, list(chosen.values()), channels=(channel,))
+                   for channel, chosen in users.items() if chosen}
+
+        newly_alerted, sent = [], 0
+        for entry in entries:
+            if entry["id"] in results:
+                continue
+            outcome = reports[entry["channel"]]["outcomes"].get(entry["user_id"], {})
+            if entry["channel"] == "whatsapp" and outcome.get("status") == "in_flight":
+                # May still arrive: sending it a third time risks a duplicate
+                results[entry["id"]] = ("dropped", outcome["error"])
+                continue
+            if entry["channel"] == "whatsapp":
+                ok, error = outcome.get("status") == "sent", outcome.get("error") or outcome.get("status")
+            else:
+                ok, error = outcome.get("push") is True, "push batch failed"
+            results[entry["id"]] = ("sent", None) if ok else ("failed", error)
+            if ok and entry["channel"] == "whatsapp":
+                sent += 1
+            if ok and not entry.get("counted"):
+                newly_alerted.append(entry["user_id"])
+        if newly_alerted:
+            self.count_alerts(newly_alerted)
+        self.today.add("alerts", sent)
+        return results
 
     # ── Subscription Checker ──────────────────
     def check_subscriptions(self):
-        """Expire users whose subscription has ended."""
-        now = datetime.now()
-        changed = False
-        for user in self.users:
-            if user["status"] == "active" and user.get("expiry"):
-                try:
-                    expiry = datetime.fromisoformat(user["expiry"])
-                    if now > expiry:
-                        user["status"] = "inactive"
-                        logger.info(f"📅 Subscription expired: {user['id']} ({user['name']})")
-                        changed = True
-                except ValueError:
-                    pass
-        if changed:
-            self.save_users()
+        """Expire users whose subscription has ended (only those the scheduler says are due)."""
+        self.sync()
+        now     = time.time()
+        expired = []
+        for user_id in self.expiry_scheduler.pop_due(now):
+            # Skips users renewed or deactivated since they were popped
+            user = self.repo.expire_if_due(user_id, now)
+            if user is None:
+                continue
+            expired.append(user)
+            logger.info(f"📅 Subscription expired: {user['id']} ({user['name']})")
+        if expired and self.storage.shared:
+            # Expire in the store only where no other process renewed them meanwhile
+            done   = set(self.storage.expire_users([u["id"] for u in expired], now))
+            missed = [u["id"] for u in expired if u["id"] not in done]
+            for user in self.storage.load_users_by_id(missed):
+                self.repo.replace(user)
+        elif expired:
+            self.save_users(expired)
 
     # ── Background Loop ───────────────────────
+    def start(self):
+        """Start the signal dispatchers and the subscription checker thread."""
+        self.signal_queue.start()
+        self.retry_queue.start()
+        if self.change_feed is not None:
+            self.change_feed.start()
+        bg_thread = threading.Thread(target=self.run, name="tradel-background")
+        bg_thread.daemon = True
+        bg_thread.start()
+
     def run(self):
-        """Background thread: checks subscriptions every check_interval seconds."""
+        """
+        Background thread: sleeps until the next subscription expires (or an
+        earlier one is scheduled), then expires the users that are due.
+        check_interval caps each sleep as a safety net.
+
+        In cluster mode only the process holding the scheduler lock does
+        this; the others retry the lock every check_interval.
+        """
         interval = self.config.get("check_interval", 60)
-        logger.info(f"🔄 Background loop started (interval: {interval}s)")
-        while True:
+        logger.info(f"🔄 Background loop started (max sleep: {interval}s)")
+        while not self.stopping.is_set():
+            if self.scheduler_lock is not None and not self.scheduler_lock.acquire():
+                self.stopping.wait(interval)
+                continue
             try:
                 self.check_subscriptions()
+                if self.storage.shared:
+                    # SQLite logs a change per user write, cluster mode or not
+                    self.storage.prune_changes()
+                if time.time() - self.dedup_pruned > 3600:
+                    self.dedup.prune()
+                    self.dedup_pruned = time.time()
             except Exception as e:
                 logger.error(f"❌ Background loop error: {e}")
-            time.sleep(interval)
+            self.expiry_scheduler.wait(max_sleep=interval)
+
+    def shutdown(self, timeout: float | None = 30):
+        """
+        Graceful stop: finish the signals already queued (up to `timeout`
+        seconds for all dispatchers), then write pending user changes and close
+        the journal, storage and HTTP clients. Signals still queued stay on
+        disk and are recovered on the next start.
+        """
+        logger.info("🛑 Shutting down TradeL Bot")
+        self.stopping.set()
+        self.expiry_scheduler.wake()
+        if self.change_feed is not None:
+            self.change_feed.stop()
+        self.signal_queue.stop(timeout)
+        self.retry_queue.stop()
+        if self.fanout is not None:
+            self.fanout.shutdown()
+        self.persistence.close()
+        self.today.close()
+        if self.scheduler_lock is not None:
+            self.scheduler_lock.release()
+        self.storage.close()
+        from clients import close_all
+        close_all()
 
 
 # ─────────────────────────────────────────────
-# SIGNAL DETECTION HELPERS
+# FLASK APP
 # ─────────────────────────────────────────────
-SIGNAL_KEYWORDS = ["BUY", "SELL", "LONG", "SHORT", "TP:", "SL:", "ENTRY", "SIGNAL"]
-TRADING_PAIRS   = ["BTC", "ETH", "XRP", "SOL", "ADA", "BNB",
-                   "USD", "EUR", "GBP", "JPY", "XAUUSD", "GOLD"]
+routes    = Blueprint("tradel", __name__)
+_bot_lock = threading.Lock()
 
-def is_trading_signal(text: str) -> bool:
-    if not text:
-        return False
-    upper = text.upper()
-    has_keyword = any(k in upper for k in SIGNAL_KEYWORDS)
-    has_pair    = any(p in upper for p in TRADING_PAIRS)
-    has_numbers = bool(re.search(r"\d+\.?\d*", text))
-    return has_keyword and (has_pair or has_numbers)
 
-def extract_signal(text: str) -> dict:
+def create_app(bot: TradeLBot | None = None, lazy: bool = False) -> Flask:
     """
-    Basic parser – extracts pair, action, entry, TP, SL from raw message.
-    Extend this with regex as your group's format becomes clear.
+    Build the Flask app around a bot. Nothing is started at import time.
+
+    lazy=True defers creating (and starting) the bot until init_bot() or
+    the first request in each worker process, so a pre-forking server can
+    preload this module in its master without sharing the bot's threads,
+    files and database connections with every worker.
     """
-    upper = text.upper()
-
-    # Determine action
-    action = ""
-    if "BUY" in upper or "LONG" in upper:
-        action = "BUY"
-    elif "SELL" in upper or "SHORT" in upper:
-        action = "SELL"
-
-    # Detect pair
-    pair = ""
-    for p in TRADING_PAIRS:
-        if p in upper:
-            pair = p
-            break
-
-    # Pull out numbers after TP: SL: ENTRY:
-    def find_value(label):
-        match = re.search(rf"{label}[:\s]+([0-9]+\.?[0-9]*)", upper)
-        return match.group(1) if match else "N/A"
-
-    priority = "high" if action in ("BUY", "SELL") else "medium"
-
-    return {
-        "message": text,
-        "source":  "whatsapp",
-        "pair":    pair,
-        "action":  action,
-        "entry":   find_value("ENTRY"),
-        "tp":      find_value("TP"),
-        "sl":      find_value("SL"),
-        "priority": priority,
-        "timestamp": datetime.now().isoformat()
-    }
+    app = Flask(__name__)
+    app.register_blueprint(routes)
+    if bot is None and not lazy:
+        bot = TradeLBot()
+    app.extensions["tradel"] = bot
+    return app
 
 
-# ─────────────────────────────────────────────
-# FLASK APP
-# ─────────────────────────────────────────────
-app = Flask(__name__)
-bot = TradeLBot()
+def init_bot(app: Flask) -> TradeLBot:
+    """The app's bot, created and started on first use if the app is lazy."""
+    bot = app.extensions.get("tradel")
+    if bot is not None:
+        return bot
+    with _bot_lock:
+        bot = app.extensions.get("tradel")
+        if bot is None:
+            bot = app.extensions["tradel"] = TradeLBot()
+            bot.start()
+        return bot
+
+
+def shutdown_bot(app: Flask, timeout: float | None = 30):
+    bot = app.extensions.get("tradel")
+    if bot is not None:
+        bot.shutdown(timeout)
+
+
+def get_bot() -> TradeLBot:
+    return init_bot(current_app)
+
 
 # ── Routes ────────────────────────────────────
-@app.route("/")
+@routes.route("/")
 def home():
+    """Cheap enough for every uptime poll: counters only, nothing scanned or read from storage."""
+    bot = get_bot()
+    return jsonify({
+        "name":    "TradeL",
+        "version": bot.config["version"],
+        **bot.counts(),
+        "status":  "running",
+        "time":    datetime.now().isoformat()
+    })
+
+@routes.route("/stats")
+def stats():
+    """The counters plus the signal queue, retry queue and dedup state."""
+    bot = get_bot()
     return jsonify({
-        "name":         "TradeL",
-        "version":      bot.config["version"],
-        "total_users":  len(bot.users),
-        "active_users": len(bot.get_active_users()),
-        "status":       "running",
-        "time":         datetime.now().isoformat()
+        **bot.counts(),
+        "day":     bot.today.day,
+        "queue":   bot.signal_queue.stats(),
+        "retries": bot.retry_queue.stats(),
+        "dedup":   bot.dedup.stats()
     })
 
-@app.route("/webhook/whatsapp", methods=["POST"])
+@routes.route("/metrics")
+def metrics():
+    """Latencies, alert counts and queue depths in the Prometheus text format."""
+    get_bot()
+    return Response(REGISTRY.expose(), mimetype="text/plain; version=0.0.4")
+
+@routes.route("/webhook/whatsapp", methods=["POST"])
 def whatsapp_webhook():
     """
     Twilio posts here when a message arrives in the monitored WhatsApp group.
     Set this URL in Twilio Console → Messaging → WhatsApp → Sandbox settings
     as: http://YOUR_SERVER_IP:5000/webhook/whatsapp
     """
+    started = time.perf_counter()
+    bot = get_bot()
     # Twilio sends form data, not JSON
     body = request.form.get("Body", "")
     sender = request.form.get("From", "")
-    logger.info(f"📩 Incoming message from {sender}: {body[:80]}")
+    logger.info("📩 Incoming message from %s: %s", sender, body[:80])
+
+    parsing = time.perf_counter()
+    signal = parse_signal(body)
+    PARSE_SECONDS.observe(time.perf_counter() - parsing)
+    result = {"status": "not_a_signal"}
+    if signal:
+        signal_id = bot.enqueue_signal(signal, request.form.get("MessageSid"))
+        if signal_id is None:
+            result = {"status": "duplicate"}
+        else:
+            result = {"status": "signal_queued", "signal_id": signal_id}
 
-    if is_trading_signal(body):
-        signal = extract_signal(body)
-        signal_id = bot.process_signal(signal)
-        return jsonify({"status": "signal_processed", "signal_id": signal_id})
+    response = jsonify(result)
+    SIGNALS.labels(result["status"]).inc()
+    WEBHOOK_SECONDS.labels(result["status"]).observe(time.perf_counter() - started)
+    return response
 
-    return jsonify({"status": "not_a_signal"})
+USERS_PAGE     = 100     # default /users page size…
+USERS_PAGE_MAX = 1000    # …and the most one request may ask for
 
-@app.route("/users", methods=["GET"])
-def list_users():
-    return jsonify(bot.users)
 
-@app.route("/users/add", methods=["POST"])
+def _time_arg(name: str) -> float | None:
+    """An ISO date/time or a POSIX timestamp from the query string."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        ts = expiry_timestamp(value)
+        if ts is None:
+            raise ValueError(f"{name} must be an ISO date or a timestamp")
+        return ts
+
+
+@routes.route("/users", methods=["GET"])
+def list_users():
+    """
+    One page of users, streamed as it is written.
+        ?status=active&plan=pro&country=NG      filters (any combination)
+        ?expires_after=2026-01-01&expires_before=2026-02-01
+        ?fields=id,name,expiry                  only these keys
+        ?limit=100&cursor=…                     page size; cursor from the previous page
+        ?format=ndjson                          one user per line (or Accept: application/x-ndjson)
+    The next page's cursor is in "next_cursor" (JSON), the X-Next-Cursor
+    header and a Link: rel="next" header; it is missing on the last page.
+    """
+    bot = get_bot()
+    try:
+        limit = int(request.args.get("limit", USERS_PAGE))
+        if not 1 <= limit <= USERS_PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {USERS_PAGE_MAX}")
+        cursor  = request.args.get("cursor")
+        after   = decode_cursor(cursor) if cursor else None
+        start   = _time_arg("expires_after")
+        end     = _time_arg("expires_before")
+        expires = (start, end) if start is not None or end is not None else None
+        equals  = {f: request.args[f] for f in LISTED_FIELDS if request.args.get(f)}
+        fields  = [f for f in request.args.get("fields", "").split(",") if f] or None
+        users, next_after = bot.repo.page(limit, after, expires, fields, **equals)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    next_cursor = encode_cursor(next_after)
+    ndjson = (request.args.get("format") == "ndjson" or
+              request.accept_mimetypes.best == "application/x-ndjson")
+
+    def generate():
+        # Written a few users at a time; the page itself was copied under the read lock
+        if not ndjson:
+            yield '{"users": ['
+        for i in range(0, len(users), 100):
+            chunk = [json.dumps(u, ensure_ascii=False) for u in users[i:i + 100]]
+            if ndjson:
+                yield "\n".join(chunk) + "\n"
+            else:
+                yield ("," if i else "") + ",".join(chunk)
+        if not ndjson:
+            yield f'], "count": {len(users)}, "next_cursor": {json.dumps(next_cursor)}}}'
+
+    response = Response(generate(), mimetype="application/x-ndjson" if ndjson else "application/json")
+    if next_cursor:
+        query = urlencode({**request.args.to_dict(), "cursor": next_cursor})
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{query}>; rel="next"'
+    return response
+
+@routes.route("/users/add", methods=["POST"])
 def add_user():
+    bot = get_bot()
     data = request.get_json()
     if not data or not data.get("phone"):
         return jsonify({"error": "phone is required"}), 400
     user_id = bot.add_user(data)
     return jsonify({"status": "added", "user_id": user_id})
 
-@app.route("/users/activate/<user_id>", methods=["POST"])
+@routes.route("/users/activate/<user_id>", methods=["POST"])
 def activate_user(user_id):
+    bot = get_bot()
     success = bot.activate_user(user_id)
     if success:
         # Send welcome WhatsApp message
-        for user in bot.users:
-            if user["id"] == user_id:
-                try:
-                    from whatsapp import WhatsAppService
-                    WhatsAppService().send_welcome_message(user)
-                except Exception as e:
-                    logger.warning(f"Could not send welcome message: {e}")
-                break
+        try:
+            from clients import get_whatsapp_service
+            get_whatsapp_service().send_welcome_message(bot.get_user(user_id))
+        except Exception as e:
+            logger.warning(f"Could not send welcome message: {e}")
         return jsonify({"status": "activated"})
     return jsonify({"error": "user not found"}), 404
 
-@app.route("/users/deactivate/<user_id>", methods=["POST"])
+@routes.route("/users/deactivate/<user_id>", methods=["POST"])
 def deactivate_user(user_id):
+    bot = get_bot()
     success = bot.deactivate_user(user_id)
     return jsonify({"status": "deactivated"}) if success else (jsonify({"error": "user not found"}), 404)
 
-@app.route("/signal/test", methods=["POST"])
+@routes.route("/signal/test", methods=["POST"])
 def test_signal():
     """Send a test alert to all active users."""
+    bot = get_bot()
     test_signal_data = {
         "message": "🧪 This is a TEST alert from TradeL. Your alerts are working perfectly!",
         "source":  "test",
@@ -342,7 +684,7 @@ def test_signal():
     signal_id = bot.process_signal(test_signal_data)
     return jsonify({"status": "test_sent", "signal_id": signal_id})
 
-@app.route("/health")
+@routes.route("/health")
 def health():
     return jsonify({"status": "ok"})
 
@@ -351,11 +693,15 @@ def health():
 # ENTRY POINT
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
-    # Start background subscription-checker in a daemon thread
-    bg_thread = threading.Thread(target=bot.run, name="tradel-background")
-    bg_thread.daemon = True
-    bg_thread.start()
+    # Development server – use gunicorn (wsgi.py) in production
+    setup_logging()
+    app = create_app()
+    bot = app.extensions["tradel"]
+    bot.start()
 
     logger.info("✅ TradeL Bot is running on port 5000")
     logger.info("🌐 Webhook URL: http://YOUR_SERVER_IP:5000/webhook/whatsapp")
-    app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
+    try:
+        app.run(host="0.0.0.0", port=5000, debug=False)
+    finally:
+        bot.shutdown()
\ No newline at end of file
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Async Alert Delivery
+async_alerts.py
+
+Sends alerts from one asyncio event loop over pooled aiohttp sessions
+instead of tying up a thread per in-flight send. Each channel has a
+semaphore capping how many of its requests are open at once, so thousands
+of users can be alerted concurrently from a single thread.
+
+Needs aiohttp (pip install aiohttp). Turn it on with "fanout_mode": "async"
+in config.json. AsyncFanoutEngine keeps FanoutEngine's blocking
+dispatch(signal, users) API, so the rest of the bot – and the sync
+AlertSystem / WhatsAppService used by manage_payments.py – are unchanged.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from alerts import (ONESIGNAL_API_URL, PUSH_BATCH_SIZE, PUSH_RETRIES, PUSH_BACKOFF, SEND_PUSH,
+                    THROTTLED_PUSH, push_request)
+from fanout import (CHANNELS, DEFAULT_DEADLINE, SEND_WHATSAPP, THROTTLED_WHATSAPP, build_limits,
+                    summary_fields)
+from logconfig import SEND_FAILURES
+from metrics import ALERTS, FANOUT_SECONDS
+from ratelimit import Throttled, parse_retry_after
+from users import normalise_phone
+from whatsapp import (WHATSAPP_FROM, alert_message, welcome_message,
+                      payment_request_message, renewal_reminder_message)
+
+logger = logging.getLogger("tradel.async")
+
+
+DEFAULT_CONCURRENCY = 500      # open requests per channel
+TWILIO_API_URL      = "https://api.twilio.com"
+TIMEOUT             = 10       # seconds per request
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise RuntimeError('❌ "fanout_mode": "async" needs aiohttp – run: pip install aiohttp')
+
+
+def _new_session(limit: int):
+    """A keep-alive session holding up to `limit` connections. Call inside the loop."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit, limit_per_host=limit),
+        timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+    )
+
+
+# ─────────────────────────────────────────────
+# EVENT LOOP THREAD
+# ─────────────────────────────────────────────
+class LoopThread:
+    """One event loop on a daemon thread, fed from ordinary (sync) threads."""
+
+    def __init__(self, name: str = "tradel-async"):
+        self.loop   = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self, coro, timeout: float | None = None):
+        """Run `coro` on the loop and block until it returns."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+# ─────────────────────────────────────────────
+# WHATSAPP (Twilio Messages API)
+# ─────────────────────────────────────────────
+class AsyncWhatsAppService:
+    """
+    WhatsAppService on aiohttp. Build and use it inside one event loop;
+    call close() on that loop when done.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_CONCURRENCY):
+        _require_aiohttp()
+        self.account_sid = os.environ.get("TWILIO_SID")
+        self.auth_token  = os.environ.get("TWILIO_TOKEN")
+
+        if not self.account_sid or not self.auth_token:
+            raise EnvironmentError(
+                "❌ TWILIO_SID and TWILIO_TOKEN environment variables must be set.\n"
+                "Run: export TWILIO_SID='your_sid'  &&  export TWILIO_TOKEN='your_token'"
+            )
+
+        # Same override as clients.build_twilio_client for local stubs
+        base = os.environ.get("TWILIO_API_URL", TWILIO_API_URL).rstrip("/")
+        self.url         = f"{base}/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+        self.auth        = aiohttp.BasicAuth(self.account_sid, self.auth_token)
+        self.from_number = WHATSAPP_FROM
+        self.limit       = max_concurrency
+        self.semaphore   = asyncio.Semaphore(max_concurrency)
+        self.session     = None
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    # ── Core send method ───────────────────────────────────
+    async def send_message(self, to_number: str, message: str):
+        """Returns (True, sid) on success or (False, error_str) on failure."""
+        try:
+            return await self._send(to_number, message)
+        except Throttled as e:
+            logger.error(f"❌ Failed to send to {to_number}: {e}")
+            return False, str(e)
+
+    async def _send(self, to_number: str, message: str):
+        """send_message, but a 429 raises Throttled (with Twilio's Retry-After)."""
+        if self.session is None:
+            self.session = _new_session(self.limit)
+        to_whatsapp = f"whatsapp:+{normalise_phone(to_number)}"
+        form = {"From": self.from_number, "To": to_whatsapp, "Body": message}
+        try:
+            async with self.semaphore:
+                async with self.session.post(self.url, data=form, auth=self.auth) as response:
+                    body = await response.json(content_type=None)
+            if response.status == 429:
+                raise Throttled("whatsapp", parse_retry_after(response.headers.get("Retry-After")),
+                                str(body.get("message", "")))
+            if response.status < 300 and body.get("sid"):
+                logger.debug("📤 Message sent to %s | SID: %s", to_whatsapp, body["sid"])
+                return True, body["sid"]
+            error = f"HTTP {response.status}: {body.get('message', body)}"
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            error = str(e) or type(e).__name__
+        SEND_FAILURES.log(logger, logging.ERROR, "whatsapp", "❌ Failed to send to %s: %s", to_number, error)
+        return False, error
+
+    # ── Message types (same text as WhatsAppService) ──────
+    async def send_alert(self, to_number: str, signal: dict, user: dict | None = None):
+        return await self._send(to_number, alert_message(signal, user))
+
+    async def send_welcome_message(self, user: dict) -> bool:
+        success, _ = await self.send_message(user["phone"], welcome_message(user))
+        return success
+
+    async def send_payment_request(self, user: dict, payment: dict) -> bool:
+        success, _ = await self.send_message(user["phone"], payment_request_message(user, payment))
+        return success
+
+    async def send_renewal_reminder(self, user: dict, days_left: int) -> bool:
+        success, _ = await self.send_message(user["phone"], renewal_reminder_message(user, days_left))
+        return success
+
+
+# ─────────────────────────────────────────────
+# ALERTS (WhatsApp + OneSignal push)
+# ─────────────────────────────────────────────
+class AsyncAlertSystem:
+
+    def __init__(self, whatsapp: AsyncWhatsAppService | None = None,
+                 max_concurrency: int = DEFAULT_CONCURRENCY):
+        _require_aiohttp()
+        self.onesignal_app_id  = os.environ.get("ONESIGNAL_APP_ID", "")
+        self.onesignal_api_key = os.environ.get("ONESIGNAL_API_KEY", "")
+        self.max_concurrency   = max_concurrency
+        self.whatsapp_sender   = WHATSAPP_FROM
+        self.whatsapp          = whatsapp
+        self.push_semaphore    = asyncio.Semaphore(max_concurrency)
+        self.session           = None
+
+    def get_whatsapp(self) -> AsyncWhatsAppService:
+        if self.whatsapp is None:
+            self.whatsapp = AsyncWhatsAppService(self.max_concurrency)
+        return self.whatsapp
+
+    async def close(self):
+        if self.whatsapp is not None:
+            await self.whatsapp.close()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def send_whatsapp_alert(self, user: dict, signal: dict) -> bool:
+        try:
+            success, result = await self.get_whatsapp().send_alert(user["phone"], signal, user)
+            if not success:
+                SEND_FAILURES.log(logger, logging.ERROR, "alert", "  ❌ WhatsApp failed → %s: %s",
+                                  user["name"], result)
+            return success
+        except Throttled:
+            raise
+        except Exception as e:
+            SEND_FAILURES.log(logger, logging.ERROR, "alert", "  ❌ WhatsApp exception → %s: %s",
+                              user["name"], e)
+            return False
+
+    async def _post_push_chunk(self, start: int, chunk: list, signal: dict, retries: int,
+                               limiter, deadline: float | None) -> dict:
+        headers, payload = push_request(self.onesignal_app_id, self.onesignal_api_key, chunk, signal)
+        result = {"start": start, "size": len(chunk), "ok": False, "id": None,
+                  "status_code": None, "attempts": 0, "errors": None}
+
+        failures = 0
+        while True:
+            if limiter is not None and not await limiter.acquire_async(deadline):
+                result["errors"] = result["errors"] or "deadline exceeded"
+                break
+            result["attempts"] += 1
+            retry_after = None
+            try:
+                async with self.push_semaphore:
+                    sending = time.perf_counter()
+                    try:
+                        async with self.session.post(ONESIGNAL_API_URL, headers=headers,
+                                                     json=payload) as response:
+                            result["status_code"] = response.status
+                            try:
+                                body = await response.json(content_type=None)
+                            except ValueError:
+                                body = {}
+                    finally:
+                        SEND_PUSH.observe(time.perf_counter() - sending)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result["errors"] = str(e) or type(e).__name__
+            else:
+                body = body if isinstance(body, dict) else {}
+                result["errors"] = body.get("errors")
+                if response.status == 200 and body.get("id"):
+                    result["ok"] = True
+                    result["id"] = body["id"]
+                    if limiter is not None:
+                        limiter.succeeded()
+                    break
+                if response.status == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if limiter is not None and deadline is not None:
+                        THROTTLED_PUSH.inc()
+                        limiter.throttled(retry_after)
+                        continue                   # deferred, not failed
+                elif response.status < 500:
+                    break                          # bad request – retrying won't help
+            if failures >= retries:
+                break
+            failures += 1
+            await asyncio.sleep(max(PUSH_BACKOFF * 2 ** (failures - 1), retry_after or 0))
+
+        ALERTS.labels("push", "sent" if result["ok"] else "failed").inc(len(chunk))
+        if result["ok"]:
+            logger.info(f"  🔔 Push batch sent to {len(chunk)} device(s) | id: {result['id']}")
+        else:
+            logger.error(f"  ❌ Push batch of {len(chunk)} failed after "
+                         f"{result['attempts']} attempt(s): {result['errors']}")
+        return result
+
+    async def send_push_batch(self, push_tokens: list, signal: dict,
+                              batch_size: int = PUSH_BATCH_SIZE, retries: int = PUSH_RETRIES,
+                              limiter=None, deadline: float | None = None) -> list | None:
+        """AlertSystem.send_push_batch, with every chunk in flight at once."""
+        if not push_tokens:
+            return []
+        if not self.onesignal_app_id or not self.onesignal_api_key:
+            logger.debug("OneSignal not configured – skipping push batch")
+            return None
+        if self.session is None:
+            self.session = _new_session(self.max_concurrency)
+        return list(await asyncio.gather(*(
+            self._post_push_chunk(start, push_tokens[start:start + batch_size], signal, retries,
+                                  limiter, deadline)
+            for start in range(0, len(push_tokens), batch_size)
+        )))
+
+
+# ─────────────────────────────────────────────
+# FAN-OUT ENGINE
+# ─────────────────────────────────────────────
+class AsyncFanoutEngine:
+    """
+    Drop-in for fanout.FanoutEngine: dispatch() blocks the calling thread
+    while every send runs as a task on one shared event loop.
+    """
+
+    def __init__(self, alert_system=None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 deadline: float = DEFAULT_DEADLINE, rate_limits: dict | None = None,
+                 sender_rate_limits: dict | None = None, burst: float = 1):
+        _require_aiohttp()
+        self.max_concurrency = max_concurrency
+        self.deadline        = deadline
+        self.runner          = LoopThread()
+        self.alert_system    = alert_system or self.runner.run(self._build_alert_system())
+        self.limits = build_limits(rate_limits, sender_rate_limits, burst)
+        sender = getattr(self.alert_system, "whatsapp_sender", None)
+        self.limiters = {
+            "whatsapp": self.limits.limiter("whatsapp", sender),
+            "push":     self.limits.limiter("push")
+        }
+        # Like FanoutEngine's worker count: bounds how many sends hold a
+        # rate-limit reservation, so a 429 pause strands few of them
+        self.in_flight = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    def from_config(cls, config: dict, alert_system=None):
+        return cls(
+            alert_system=alert_system,
+            max_concurrency=config.get("async_concurrency", DEFAULT_CONCURRENCY),
+            deadline=config.get("fanout_deadline", DEFAULT_DEADLINE),
+            rate_limits=config.get("rate_limits"),
+            sender_rate_limits=config.get("sender_rate_limits"),
+            burst=config.get("rate_burst", 1)
+        )
+
+    async def _build_alert_system(self):
+        # Semaphores bind to the loop they are created on
+        return AsyncAlertSystem(max_concurrency=self.max_concurrency)
+
+    def shutdown(self, wait: bool = True):
+        close = getattr(self.alert_system, "close", None)
+        if close is not None:
+            try:
+                self.runner.run(close(), timeout=TIMEOUT)
+            except Exception as e:
+                logger.error(f"❌ Closing async sessions failed: {e}")
+        self.runner.stop()
+
+    def dispatch(self, signal: dict, users: list, channels: tuple = CHANNELS) -> dict:
+        """Send `signal` to every user in `users`. Same report as FanoutEngine.dispatch."""
+        return self.runner.run(self.dispatch_async(signal, users, channels))
+
+    # ── One recipient ──────────────────────────────────────
+    async def _deliver(self, user: dict, signal: dict, started: float, deadline_at: float,
+                       whatsapp: bool = True, sending: set | None = None) -> dict:
+        outcome = {
+            "user_id":  user.get("id"),
+            "status":   "skipped",
+            "whatsapp": None,
+            "push":     None,
+            "error":    None,
+            "elapsed":  None,
+            "deferred": 0
+        }
+        limiter = self.limiters["whatsapp"]
+        try:
+            async with self.in_flight:
+                while whatsapp and user.get("phone"):
+                    if not await limiter.acquire_async(deadline_at):
+                        outcome["status"] = "expired"
+                        return outcome
+                    if sending is not None:
+                        sending.add(outcome["user_id"])
+                    posted = time.perf_counter()
+                    try:
+                        outcome["whatsapp"] = await self.alert_system.send_whatsapp_alert(user, signal)
+                    except Throttled as e:
+                        outcome["deferred"] += 1
+                        THROTTLED_WHATSAPP.inc()
+                        limiter.throttled(e.retry_after)
+                        continue
+                    finally:
+                        SEND_WHATSAPP.observe(time.perf_counter() - posted)
+                        if sending is not None:
+                            sending.discard(outcome["user_id"])
+                    if outcome["whatsapp"]:
+                        limiter.succeeded()
+                    outcome["status"] = "sent" if outcome["whatsapp"] else "failed"
+                    break
+        except Exception as e:
+            outcome["status"] = "error"
+            outcome["error"]  = str(e)
+        finally:
+            outcome["elapsed"] = round(time.monotonic() - started, 3)
+            if outcome["status"] != "skipped":
+                ALERTS.labels("whatsapp", outcome["status"]).inc()
+        return outcome
+
+    async def _push(self, tokens: list, signal: dict, deadline_at: float) -> list | None:
+        try:
+            return await self.alert_system.send_push_batch(tokens, signal, limiter=self.limiters["push"],
+                                                           deadline=deadline_at)
+        except Exception as e:
+            logger.error(f"❌ Push batch failed: {e}")
+            return []
+
+    # ── One signal → all recipients ────────────────────────
+    async def dispatch_async(self, signal: dict, users: list, channels: tuple = CHANNELS) -> dict:
+        started     = time.monotonic()
+        deadline_at = started + self.deadline
+
+        push_users  = ([u for u in users if u.get("phone") and u.get("push_token")]
+                       if "push" in channels else [])
+        push_tokens = [u["push_token"] for u in push_users]
+        push_task   = (asyncio.ensure_future(self._push(push_tokens, signal, deadline_at))
+                       if push_tokens else None)
+
+        sending = set()           # ids whose WhatsApp request is on the wire
+        tasks = {
+            asyncio.ensure_future(self._deliver(user, signal, started, deadline_at,
+                                                 "whatsapp" in channels, sending)): user
+            for user in users
+        }
+        waiting = list(tasks) + ([push_task] if push_task else [])
+        done, pending = (await asyncio.wait(waiting, timeout=self.deadline)
+                         if waiting else (set(), set()))
+
+        outcomes = {}
+        for task in done:
+            if task is push_task:
+                continue
+            outcome = task.result()
+            outcomes[outcome["user_id"]] = outcome
+        for task in pending:
+            user = tasks.get(task)
+            # A request already sent may still arrive: let it finish and report
+            # it "in_flight", which is not retried, so the user isn't alerted twice
+            in_flight = user is not None and user.get("id") in sending
+            if not in_flight:
+                task.cancel()
+            if task is push_task:
+                continue
+            outcomes[user.get("id")] = {
+                "user_id":  user.get("id"),
+                "status":   "in_flight" if in_flight else "expired",
+                "whatsapp": None,
+                "push":     None,
+                "error":    "still sending at the deadline" if in_flight else "deadline exceeded",
+                "elapsed":  None,
+                "deferred": 0
+            }
+
+        push_chunks = []
+        if push_task is not None:
+            sent = push_task.result() if push_task in done else []
+            if sent is not None:          # None: OneSignal is not configured, nothing was tried
+                push_chunks = sent
+                for user in push_users:
+                    # False unless a chunk says otherwise: the batch raised or ran out of time
+                    if user.get("id") in outcomes:
+                        outcomes[user["id"]]["push"] = False
+        for chunk in push_chunks:
+            for user in push_users[chunk["start"]:chunk["start"] + chunk["size"]]:
+                if user.get("id") in outcomes:
+                    outcomes[user["id"]]["push"] = chunk["ok"]
+
+        counts = {}
+        for outcome in outcomes.values():
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        elapsed = [o["elapsed"] for o in outcomes.values() if o["elapsed"] is not None]
+
+        report = {
+            "signal_id":     signal.get("id"),
+            "recipients":    len(users),
+            "counts":        counts,
+            "duration":      round(time.monotonic() - started, 3),
+            "last_delivery": max(elapsed) if elapsed else None,
+            "deferred":      sum(o["deferred"] for o in outcomes.values()),
+            "push":          push_chunks,
+            "outcomes":      outcomes
+        }
+        FANOUT_SECONDS.labels("async").observe(report["duration"])
+        logger.info(
+            f"📣 Async fan-out {report['signal_id']} done in {report['duration']}s | "
+            f"{len(users)} recipients | {counts} | {report['deferred']} deferred by rate limits",
+            extra=summary_fields(report, "async")
+        )
+        return report
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Async Fan-out Benchmark
+benchmarks/bench_async_fanout.py
+
+Alerts N users through a local stub of the Twilio Messages API that takes
+--latency seconds per message, first with the thread-pool FanoutEngine,
+then with AsyncFanoutEngine on a single event loop. Rate limits are off
+so only the delivery model is measured.
+
+Run:  python benchmarks/bench_async_fanout.py [--users 2000] [--latency 0.2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_clients import StubTwilio
+
+
+class SlowTwilio(StubTwilio):
+    latency = 0.0
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        super().do_POST()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 4096
+
+
+def run(label: str, engine, signal: dict, users: list) -> float:
+    started = time.perf_counter()
+    report  = engine.dispatch(signal, users)
+    elapsed = time.perf_counter() - started
+    sent    = report["counts"].get("sent", 0)
+    print(f"  {label:<26} {elapsed:7.2f}s | {sent:,}/{len(users):,} sent | "
+          f"{sent / elapsed:,.0f} alerts/s")
+    engine.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread-pool vs asyncio alert fan-out")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per message")
+    parser.add_argument("--workers", type=int, default=32, help="FanoutEngine threads")
+    parser.add_argument("--concurrency", type=int, default=500, help="AsyncFanoutEngine open requests")
+    args = parser.parse_args()
+
+    SlowTwilio.latency = args.latency
+    server = QuietServer(("127.0.0.1", 0), SlowTwilio)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ.setdefault("TWILIO_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_TOKEN", "stub-token")
+    os.environ["TWILIO_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from fanout import FanoutEngine
+    from async_alerts import AsyncFanoutEngine
+    from clients import close_all, configure
+
+    configure(pool_size=args.workers)
+    users  = [{"id": f"TR{i:06d}", "name": f"User {i}", "phone": f"0801{i:07d}"}
+              for i in range(args.users)]
+    signal = {"id": "SIG-BENCH", "pair": "EURUSD", "action": "BUY", "entry": "1.0850",
+              "tp": "1.0900", "sl": "1.0800", "message": "BUY EURUSD @ 1.0850",
+              "timestamp": "2024-03-14T09:30:00"}
+    no_limits = {"whatsapp": 0, "push": 0}
+
+    print(f"\n📊 Fan-out of one signal to {args.users:,} users ({args.latency * 1000:.0f} ms per send)")
+    print("─"*60)
+    threaded = run(f"threads ({args.workers} workers)",
+                   FanoutEngine(max_workers=args.workers, deadline=600, rate_limits=no_limits),
+                   signal, users)
+    asynced  = run(f"asyncio ({args.concurrency} open)",
+                   AsyncFanoutEngine(max_concurrency=args.concurrency, deadline=600,
+                                     rate_limits=no_limits),
+                   signal, users)
+    print("─"*60)
+    print(f"  speed-up: {threaded / asynced:.1f}x\n")
+
+    close_all()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
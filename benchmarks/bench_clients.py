@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Client Reuse Micro-benchmark
+benchmarks/bench_clients.py
+
+Sends N WhatsApp messages to a local stub of the Twilio Messages API, first
+building a new WhatsAppService per message (the old alert path), then
+through the shared client from clients.get_whatsapp_service().
+
+Run:  python benchmarks/bench_clients.py [--count 500]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+class StubTwilio(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"sid": "SM" + "0" * 32, "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label: str, send, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        ok, _ = send()
+        assert ok, "stub send failed"
+    per_send = (time.perf_counter() - started) / count
+    print(f"  {label:<22} {per_send * 1e3:8.3f} ms/send")
+    return per_send
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-send overhead: new client vs shared client")
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTwilio)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ.setdefault("TWILIO_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_TOKEN", "stub-token")
+    os.environ["TWILIO_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from whatsapp import WhatsAppService
+    from clients import get_whatsapp_service, close_all
+
+    print(f"\n📊 WhatsApp send overhead ({args.count} sends to local stub)")
+    print("─"*44)
+    before = run("new client per send",
+                 lambda: WhatsAppService().send_message("08012345678", "bench"), args.count)
+    after  = run("shared client",
+                 lambda: get_whatsapp_service().send_message("08012345678", "bench"), args.count)
+    print("─"*44)
+    print(f"  saved per send: {(before - after) * 1e3:.3f} ms ({before / after:.1f}x)\n")
+    print("  Against api.twilio.com the saving also includes a TLS handshake per send.\n")
+
+    close_all()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
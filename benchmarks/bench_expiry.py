@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Expiry Check Benchmark
+benchmarks/bench_expiry.py
+
+Builds a subscriber list with active users expiring over the next 30 days
+and measures the CPU time of one subscription-check tick:
+  • scan       – the original check_subscriptions (parse every expiry string)
+  • scheduler  – ExpiryScheduler.pop_due for the same tick
+Also times an activation (reschedule) through the repository.
+
+Run:  python benchmarks/bench_expiry.py [--users 100000] [--due 10] [--ticks 20]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from users import UserRepository
+from scheduler import ExpiryScheduler
+
+
+def build_users(count: int, due: int, seed: int) -> list:
+    rng   = random.Random(seed)
+    now   = datetime.now()
+    users = []
+    for i in range(count):
+        status = "active" if rng.random() < 0.8 else rng.choice(["pending", "inactive"])
+        if i < due:
+            expiry = now - timedelta(seconds=rng.randint(1, 60))
+        else:
+            expiry = now + timedelta(seconds=rng.randint(3600, 30 * 86400))
+        users.append({
+            "id":     f"TR{i:07d}",
+            "name":   f"Trader {i}",
+            "phone":  f"23480{i:08d}",
+            "status": status if i >= due else "active",
+            "expiry": expiry.isoformat() if status != "pending" else None
+        })
+    return users
+
+
+def legacy_tick(users: list) -> list:
+    """The original full scan, minus logging and saving."""
+    now = datetime.now()
+    expired = []
+    for user in users:
+        if user["status"] == "active" and user.get("expiry"):
+            try:
+                if now > datetime.fromisoformat(user["expiry"]):
+                    expired.append(user)
+            except ValueError:
+                pass
+    return expired
+
+
+def cpu(fn, ticks: int) -> float:
+    """Mean CPU seconds per call."""
+    started = time.process_time()
+    for _ in range(ticks):
+        fn()
+    return (time.process_time() - started) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscription check CPU per tick")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--due", type=int, default=10, help="users expiring this tick")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    users     = build_users(args.users, args.due, args.seed)
+    scheduler = ExpiryScheduler()
+    started   = time.perf_counter()
+    repo      = UserRepository(users, scheduler=scheduler)
+    build     = time.perf_counter() - started
+
+    print(f"\n📊 Expiry check benchmark ({args.users:,} users, {len(scheduler):,} scheduled, {args.due} due)")
+    print("─"*44)
+
+    scan = cpu(lambda: legacy_tick(users), args.ticks)
+    print(f"  scan       {scan * 1000:10.3f} ms CPU/tick")
+
+    expected = {u["id"] for u in legacy_tick(users)}
+    due = scheduler.pop_due(time.time())      # the tick that finds the due users
+    for user_id in due:
+        repo.expire(user_id)
+    if set(due) != expected:
+        print(f"  ❌ scheduler found {len(due)} due users, scan found {len(expected)}")
+        sys.exit(1)
+
+    idle = cpu(lambda: scheduler.pop_due(time.time()), args.ticks * 100)
+    print(f"  scheduler  {idle * 1000:10.3f} ms CPU/tick (nothing due)")
+
+    # A tick that has work: re-activate the due users in the past and expire them again
+    past = (datetime.now() - timedelta(seconds=1)).isoformat()
+
+    def busy_tick():
+        for uid in due:
+            repo.activate(uid, past)
+        for uid in scheduler.pop_due(time.time()):
+            repo.expire(uid)
+
+    busy = cpu(busy_tick, args.ticks)
+    print(f"  scheduler  {busy * 1000:10.3f} ms CPU/tick ({args.due} due, incl. re-activation)")
+
+    future = (datetime.now() + timedelta(days=30)).isoformat()
+    ids    = [u["id"] for u in users[args.due:args.due + 1000]]
+    started = time.process_time()
+    for uid in ids:
+        repo.activate(uid, future)
+    activate = (time.process_time() - started) / len(ids)
+    print("─"*44)
+    print(f"  index build: {build:.2f}s | activation: {activate * 1e6:.1f} µs")
+    print(f"  next expiry in {scheduler.next_due() - time.time():,.0f}s → background loop sleeps until then")
+    print(f"  speed-up (idle tick): {scan / max(idle, 1e-9):,.0f}x\n")
+
+
+if __name__ == "__main__":
+    main()
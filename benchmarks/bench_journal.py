@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Signal Journal Benchmark
+benchmarks/bench_journal.py
+
+Times N signal appends through the old read-modify-write daily JSON file
+and through the append-only SignalJournal.
+
+Run:  python benchmarks/bench_journal.py [--count 10000]
+
+The legacy path is quadratic, so at 10k appends it alone takes minutes.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from journal import SignalJournal
+
+
+def make_signal(i: int) -> dict:
+    return {
+        "id":        f"SIG{i:010d}",
+        "timestamp": datetime.now().isoformat(),
+        "source":    "whatsapp",
+        "pair":      "XAUUSD",
+        "action":    "BUY",
+        "entry":     "2345.10",
+        "tp":        "2360.00",
+        "sl":        "2330.00",
+        "message":   "GOLD BUY NOW ENTRY: 2345.10 TP: 2360 SL: 2330 – manage your risk",
+        "priority":  "high"
+    }
+
+
+def legacy_append(directory: str, signal: dict):
+    """The original process_signal write path."""
+    signals_path = os.path.join(directory, f"{signal['timestamp'][:10]}.json")
+    signals = []
+    if os.path.exists(signals_path):
+        with open(signals_path, "r") as f:
+            signals = json.load(f)
+    signals.append(signal)
+    with open(signals_path, "w") as f:
+        json.dump(signals, f, indent=2)
+
+
+def run(label: str, append, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        append(make_signal(i))
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<12} {count:>7} appends  {elapsed:8.2f}s  "
+          f"{count / elapsed:10.0f}/s  {elapsed / count * 1e6:8.1f}µs each")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"\n📊 Signal journal benchmark ({args.count} appends)")
+    print("─"*60)
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as journal_dir:
+        legacy = run("legacy json", lambda s: legacy_append(legacy_dir, s), args.count)
+
+        journal = SignalJournal(journal_dir)
+        new = run("journal", journal.append, args.count)
+        journal.close()
+
+        replayed = sum(1 for _ in journal.replay())
+        assert replayed == args.count, f"replayed {replayed} of {args.count}"
+
+    print("─"*60)
+    print(f"  speed-up: {legacy / new:.0f}x\n")
+
+
+if __name__ == "__main__":
+    main()
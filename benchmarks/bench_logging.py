@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Logging Benchmark
+benchmarks/bench_logging.py
+
+Times the logging a fan-out to --users recipients does, as seen by the
+sending threads (--threads of them):
+  • old – basicConfig with a FileHandler and a StreamHandler, three INFO
+          lines per recipient formatted with f-strings
+  • new – logconfig.setup_logging(): records queued for a listener thread,
+          per-recipient lines at DEBUG with lazy arguments, one summary record
+Also the cost of a single INFO call through each pipeline. The console
+goes to /dev/null so only the logging itself is measured.
+
+Run:  python benchmarks/bench_logging.py [--users 5000] [--threads 32]
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def in_threads(work, users: list, threads: int) -> float:
+    """Seconds for `threads` threads to run work() over their share of `users`."""
+    shares = [users[i::threads] for i in range(threads)]
+    pool   = [threading.Thread(target=work, args=(share,)) for share in shares]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - started
+
+
+def old_fanout(logger):
+    def work(users):
+        for user in users:
+            logger.info(f"📤 Message sent to whatsapp:+{user['phone']} | SID: SM{user['id']}")
+            logger.info(f"  📱 WhatsApp alert sent → {user['name']} ({user['phone']})")
+            logger.info(f"  ✅ Alert sent to {user['name']} ({user['phone']})")
+    return work
+
+
+def new_fanout(logger):
+    def work(users):
+        for user in users:
+            logger.debug("📤 Message sent to %s | SID: %s", f"whatsapp:+{user['phone']}", "SM" + user["id"])
+            logger.debug("  📱 WhatsApp alert sent → %s (%s)", user["name"], user["phone"])
+    return work
+
+
+def per_call(logger, calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        logger.info("📩 Incoming message from %s: %s", "whatsapp:+2348000000000", "BUY EURUSD @ 1.0850")
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronous vs queued logging during a fan-out")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=5_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-logging-")
+    os.chdir(workdir)
+    os.makedirs("logs")
+    sys.stderr = open(os.devnull, "w")
+    users  = [{"id": f"TR{i:06d}", "name": f"User {i}", "phone": f"234801{i:07d}"}
+              for i in range(args.users)]
+    logger = logging.getLogger("tradel.bench")
+
+    # ── Old: synchronous handlers on the root logger ──
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                        handlers=[logging.FileHandler("logs/old.log"), logging.StreamHandler()])
+    old_run  = in_threads(old_fanout(logger), users, args.threads)
+    old_call = per_call(logger, args.calls)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    # ── New: queue + listener thread, JSON file ──
+    os.environ["TRADEL_LOG_FILE"] = "logs/new.log"
+    from logconfig import setup_logging, stop_logging, dropped
+    setup_logging()
+    started  = time.perf_counter()
+    new_run  = in_threads(new_fanout(logger), users, args.threads)
+    logger.info("📣 Fan-out SIG-BENCH done | %d recipients", args.users,
+                extra={"signal_id": "SIG-BENCH", "recipients": args.users, "counts": {"sent": args.users}})
+    new_call = per_call(logger, args.calls)
+    stop_logging()
+    drained  = time.perf_counter() - started
+
+    with open("logs/old.log", encoding="utf-8") as f:
+        old_lines = sum(1 for _ in f)
+    with open("logs/new.log", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    summary = next(r for r in records if r.get("signal_id") == "SIG-BENCH")
+
+    print(f"\n🪵 Logging during a fan-out to {args.users:,} users ({args.threads} threads)")
+    print("─"*60)
+    print(f"  old: sync handlers, 3 lines/user   {old_run * 1000:9.1f} ms  {old_lines - args.calls:>7,} lines")
+    print(f"  new: queued, summary record        {new_run * 1000:9.1f} ms  {1:>7,} line")
+    print(f"  one INFO call   old {old_call:6.1f} µs   new {new_call:6.1f} µs (caller's thread)")
+    print(f"  new pipeline written out in {drained:.2f}s | {dropped()} dropped | "
+          f"summary fields: {sorted(k for k in summary if k not in ('time', 'level', 'logger', 'message'))}")
+    print("─"*60 + "\n")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Metrics Overhead Benchmark
+benchmarks/bench_metrics.py
+
+  • per-call cost of a counter inc / histogram observe, from 1 and from
+    --threads threads at once, next to a counter behind a threading.Lock
+  • one fan-out to --users users through a local Twilio stub and a few
+    webhooks through the Flask test client, then checks that GET /metrics
+    counts every one of them
+
+Run:  python benchmarks/bench_metrics.py [--calls 200000] [--threads 8] [--users 500]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_clients import StubTwilio
+
+
+class LockedCounter:
+    """What the metrics would cost with one shared lock."""
+
+    def __init__(self):
+        self.lock  = threading.Lock()
+        self.value = 0
+
+    def inc(self, n=1):
+        with self.lock:
+            self.value += n
+
+
+def per_call(fn, calls: int, threads: int) -> float:
+    """ns per call, with `threads` threads each making `calls` calls."""
+    def work():
+        for _ in range(calls):
+            fn()
+    pool = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return (time.perf_counter() - started) / (calls * threads) * 1e9
+
+
+def scraped(text: str, series: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost and accuracy of the /metrics instrumentation")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-metrics-")
+    os.chdir(workdir)
+    logging.basicConfig(level=logging.CRITICAL)
+    from metrics import Registry, REGISTRY
+
+    registry  = Registry()
+    counter   = registry.counter("bench_total", "bench", ["provider"]).labels("whatsapp")
+    labelled  = registry.counter("bench_labelled_total", "bench", ["provider", "result"])
+    histogram = registry.histogram("bench_seconds", "bench", ["provider"]).labels("whatsapp")
+    locked    = LockedCounter()
+
+    print(f"\n📏 Recording cost, ns per call ({args.calls:,} calls per thread)")
+    print("─"*60)
+    print(f"  {'':<28} {'1 thread':>12} {f'{args.threads} threads':>14}")
+    for label, fn in [
+        ("Lock-guarded counter",     locked.inc),
+        ("counter.inc()",            counter.inc),
+        ("labels(…).inc()",          lambda: labelled.labels("whatsapp", "sent").inc()),
+        ("histogram.observe()",      lambda: histogram.observe(0.042)),
+    ]:
+        one  = per_call(fn, args.calls, 1)
+        many = per_call(fn, args.calls, args.threads)
+        print(f"  {label:<28} {one:12.0f} {many:14.0f}")
+    expected = args.calls * (1 + args.threads)
+    assert counter.value() == expected, (counter.value(), expected)
+    assert histogram.snapshot()[1] == expected
+    started = time.perf_counter()
+    registry.expose()
+    print(f"  scrape                       {(time.perf_counter() - started) * 1e3:9.2f} ms")
+
+    # ── End to end: everything sent shows up on /metrics ──
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTwilio)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.setdefault("TWILIO_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_TOKEN", "stub-token")
+    os.environ["TWILIO_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from app import create_app
+    from fanout import FanoutEngine
+    from clients import close_all
+
+    app    = create_app()
+    client = app.test_client()
+    users  = [{"id": f"TR{i:06d}", "name": f"User {i}", "phone": f"0801{i:07d}"}
+              for i in range(args.users)]
+    signal = {"id": "SIG-METRICS", "pair": "EURUSD", "action": "BUY", "entry": "1.0850",
+              "tp": "1.0900", "sl": "1.0800", "message": "BUY EURUSD @ 1.0850",
+              "timestamp": "2024-03-14T09:30:00"}
+    before = REGISTRY.expose()
+    engine = FanoutEngine(max_workers=32, deadline=600, rate_limits={"whatsapp": 0, "push": 0})
+    report = engine.dispatch(signal, users)
+    engine.shutdown()
+    for i in range(3):
+        client.post("/webhook/whatsapp", data={"Body": "hello", "From": "whatsapp:+2348000000000",
+                                                "MessageSid": f"SM{i}"})
+    text = client.get("/metrics").get_data(as_text=True)
+
+    def delta(series):
+        return scraped(text, series) - scraped(before, series)
+
+    checks = [
+        ('tradel_alerts_total{provider="whatsapp",result="sent"}', report["counts"].get("sent", 0)),
+        ('tradel_send_seconds_count{provider="whatsapp"}',         args.users),
+        ('tradel_fanout_seconds_count{engine="threads"}',          1),
+        ('tradel_signals_total{result="not_a_signal"}',            3),
+        ('tradel_webhook_seconds_count{result="not_a_signal"}',    3),
+        ("tradel_signal_parse_seconds_count",                      3),
+    ]
+    print("─"*60)
+    ok = True
+    for series, want in checks:
+        got = delta(series)
+        ok &= got == want
+        print(f"  {'✅' if got == want else '❌'} {series:<58} {got:6.0f} (want {want})")
+    for gauge in ("tradel_signal_queue_depth", "tradel_active_users", "tradel_retry_queue_depth"):
+        ok &= f"\n{gauge} " in text
+    print("─"*60)
+    print(f"  {'PASS' if ok else 'FAIL'}\n")
+
+    app.extensions["tradel"].shutdown()
+    close_all()
+    server.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
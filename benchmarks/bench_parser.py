@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Signal Parser Benchmark
+benchmarks/bench_parser.py
+
+Generates a mix of group messages (signals, chatter, near-misses), checks
+that signal_parser gives exactly the same answers as the original
+substring-based is_trading_signal / extract_signal, then times both on
+the webhook path (classify, then extract if it is a signal).
+
+It also scores the parser against parser_corpus.jsonl, messages labelled
+with what should be read from them (signal or not, pair, direction,
+entry, TP, SL), counts the memory one parse keeps and peaks at, and
+compares all of it with parser_baseline.json. Exits 1 if accuracy drops,
+or throughput relative to the original parser falls more than
+--threshold below the baseline – relative, so it holds on any machine.
+
+Run:  python benchmarks/bench_parser.py [--count 1000000] [--seed 7]
+      python benchmarks/bench_parser.py --save-baseline      # after an intended change
+      python benchmarks/bench_parser.py --write-corpus 3000  # regenerate the corpus
+"""
+
+import gc
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from signal_parser import (BUY_WORDS, SIGNAL_KEYWORDS, TRADING_PAIRS, extract_signal,
+                           is_trading_signal, parse_signal)
+
+
+# ─────────────────────────────────────────────
+# ORIGINAL IMPLEMENTATION (reference)
+# ─────────────────────────────────────────────
+def legacy_is_trading_signal(text: str) -> bool:
+    if not text:
+        return False
+    upper = text.upper()
+    has_keyword = any(k in upper for k in SIGNAL_KEYWORDS)
+    has_pair    = any(p in upper for p in TRADING_PAIRS)
+    has_numbers = bool(re.search(r"\d+\.?\d*", text))
+    return has_keyword and (has_pair or has_numbers)
+
+
+def legacy_extract_signal(text: str) -> dict:
+    upper = text.upper()
+
+    action = ""
+    if "BUY" in upper or "LONG" in upper:
+        action = "BUY"
+    elif "SELL" in upper or "SHORT" in upper:
+        action = "SELL"
+
+    pair = ""
+    for p in TRADING_PAIRS:
+        if p in upper:
+            pair = p
+            break
+
+    def find_value(label):
+        match = re.search(rf"{label}[:\s]+([0-9]+\.?[0-9]*)", upper)
+        return match.group(1) if match else "N/A"
+
+    priority = "high" if action in ("BUY", "SELL") else "medium"
+
+    return {
+        "message": text,
+        "source":  "whatsapp",
+        "pair":    pair,
+        "action":  action,
+        "entry":   find_value("ENTRY"),
+        "tp":      find_value("TP"),
+        "sl":      find_value("SL"),
+        "priority": priority,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def legacy_parse(text: str) -> dict | None:
+    return legacy_extract_signal(text) if legacy_is_trading_signal(text) else None
+
+
+# ─────────────────────────────────────────────
+# MESSAGE GENERATOR
+# ─────────────────────────────────────────────
+SIGNAL_TEMPLATES = [
+    "{pair} {action} NOW\nENTRY: {entry}\nTP: {tp}\nSL: {sl}",
+    "🔥 {pair} {action} @ {entry} TP {tp} SL {sl}",
+    "{action_l} {pair_l} entry {entry} tp1 {tp} sl {sl} – manage risk",
+    "SIGNAL ALERT 🚨 {pair}/{quote} {action}\nEntry zone {entry}\nTarget {tp}\nStop {sl}",
+    "{pair}{quote} {action_l} limit {entry}, tp: {tp}, sl: {sl}",
+]
+CHATTER = [
+    "Good morning family 🌞",
+    "Who else is watching the market today?",
+    "Thanks boss, that last call was 🔥",
+    "Remember to journal your trades",
+    "Meeting at 7pm, link in bio",
+    "Price action is choppy, staying out",
+    "lol",
+    "Happy weekend everyone!",
+    "Please don't forget the rules of this group",
+    "I'm long term bullish on crypto tbh",
+    "Don't buy the hype, wait for confirmation",
+    "Gold looking strong on the daily",
+    "Paid 5000 for the VIP, worth it",
+]
+
+
+def generate_messages(count: int, seed: int) -> list:
+    rng      = random.Random(seed)
+    actions  = ["BUY", "SELL", "LONG", "SHORT"]
+    quotes   = ["USD", "USDT", "JPY", "EUR", ""]
+    messages = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            pair   = rng.choice(TRADING_PAIRS + ["NAS100", "US30", "DOGE"])
+            action = rng.choice(actions)
+            entry  = round(rng.uniform(0.5, 70000), rng.choice([0, 2, 4]))
+            messages.append(rng.choice(SIGNAL_TEMPLATES).format(
+                pair=pair, pair_l=pair.lower(), action=action, action_l=action.lower(),
+                quote=rng.choice(quotes), entry=entry,
+                tp=round(entry * 1.02, 2), sl=round(entry * 0.98, 2)
+            ))
+        else:
+            messages.append(rng.choice(CHATTER))
+    return messages
+
+
+# ─────────────────────────────────────────────
+# LABELLED CORPUS
+# ─────────────────────────────────────────────
+CORPUS_FILE   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_corpus.jsonl")
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_baseline.json")
+
+# How each instrument is written, the pair a reader would expect back, and a typical price
+INSTRUMENTS = [
+    (["EURUSD", "EUR/USD", "eurusd"], "EUR", 1.08, 4),
+    (["GBPUSD", "GBP/USD", "Cable"], "GBP", 1.27, 4),
+    (["USDJPY", "USD/JPY"], "USD", 151.2, 2),
+    (["EURJPY", "EUR/JPY"], "EUR", 163.5, 2),
+    (["GBPJPY", "GBP/JPY"], "GBP", 191.8, 2),
+    (["XAUUSD", "xauusd", "XAU/USD"], "XAUUSD", 2330.0, 2),
+    (["GOLD", "Gold"], "GOLD", 2330.0, 2),
+    (["BTCUSDT", "BTC/USDT", "BTC", "btc"], "BTC", 64000.0, 0),
+    (["ETHUSDT", "ETH/USDT", "ETH"], "ETH", 3100.0, 1),
+    (["SOLUSDT", "SOL"], "SOL", 145.0, 2),
+    (["XRPUSDT", "XRP"], "XRP", 0.52, 4),
+    (["ADAUSDT", "ADA"], "ADA", 0.45, 4),
+    (["BNBUSDT", "BNB"], "BNB", 590.0, 1),
+    (["NAS100", "US100"], "", 18200.0, 1),
+    (["US30", "DJ30"], "", 39000.0, 0),
+]
+
+# (id, template). {A} action as written, {a} lower-case, {P} instrument,
+# {E} entry, {T} first target, {T2} second target, {S} stop
+SIGNAL_FORMATS = [
+    ("plain-lines",  "{P} {A} NOW\nENTRY: {E}\nTP: {T}\nSL: {S}"),
+    ("at-inline",    "🔥 {P} {A} @ {E} TP {T} SL {S}"),
+    ("lower-tp1",    "{a} {P} entry {E} tp1 {T} sl {S} – manage risk"),
+    ("alert-zone",   "SIGNAL ALERT 🚨 {P} {A}\nEntry zone {E}\nTarget {T}\nStop {S}"),
+    ("limit-commas", "{P} {a} limit {E}, tp: {T}, sl: {S}"),
+    ("emoji-block",  "📊 {P}\n🟢 {A}\n📍 Entry: {E}\n🎯 TP: {T}\n🛑 SL: {S}"),
+    ("multi-tp",     "{A} {P} {E}\nTP1: {T}\nTP2: {T2}\nSL: {S}"),
+    ("pipe",         "{P} | {A} | Entry {E} | TP {T} | SL {S}"),
+    ("now-at",       "{A} {P} now at {E}\nSL {S}\nTP {T}"),
+    ("dash-fields",  "{P} - {A}\nEntry - {E}\nTP - {T}\nSL - {S}"),
+    ("buy-limit",    "{A} LIMIT {P} @ {E} | TP: {T} | SL: {S}"),
+    ("caps-colon",   "{A}: {P}\nENTRY PRICE: {E}\nTAKE PROFIT: {T}\nSTOP LOSS: {S}"),
+    ("short-form",   "{P} {a} {E} sl {S} tp {T}"),
+    ("vip",          "VIP SIGNAL ✅\n{A} {P}\nEntry: {E}\nTP: {T}\nSL: {S}\nRisk 1%"),
+    ("no-stop",      "{A} {P} @ {E} tp {T}"),
+    ("entry-only",   "{P} {A} entry {E}"),
+    ("parens",       "{A} {P} ({E}) TP:{T} SL:{S}"),
+]
+
+NON_SIGNALS = [
+    ("chatter", t) for t in CHATTER
+] + [
+    ("chatter",  "Good evening traders, market opens in 2 hours"),
+    ("chatter",  "Welcome to all our 150 new members 🎉"),
+    ("chatter",  "Session recap will be posted at 9pm"),
+    ("update",   "{P} TP1 hit ✅ +{n} pips, move SL to entry"),
+    ("update",   "{P} hit SL -{n} pips, it happens, next one"),
+    ("update",   "Closed {P} at {E} for +{n} pips 💰"),
+    ("update",   "{P} running +{n} pips, secure partials"),
+    ("analysis", "{P} is sitting on support around {E}, waiting for confirmation"),
+    ("analysis", "{P} weekly close above {E} would be bullish"),
+    ("near",     "Who wants to buy my old laptop? {n}000 naira"),
+    ("near",     "Signal subscription is {n}000 per month, DM me"),
+    ("near",     "Long day today, {n} hours on the charts"),
+    ("near",     "Short break, back in {n} minutes"),
+    ("near",     "Don't buy the hype on {P}"),
+    ("near",     "Paid {n}000 for the course, worth it"),
+]
+
+
+def _price(rng: random.Random, base: float, decimals: int, spread: float = 0.0) -> str:
+    value = base * (1 + rng.uniform(-0.05, 0.05)) * (1 + spread)
+    return f"{value:.{decimals}f}"
+
+
+def build_corpus(count: int, seed: int) -> list:
+    """Labelled messages: what a person reading the group would say each one is."""
+    rng, corpus = random.Random(seed), []
+    for _ in range(count):
+        names, pair, base, decimals = rng.choice(INSTRUMENTS)
+        shown = rng.choice(names)
+        if rng.random() < 0.5:
+            fmt, template = rng.choice(SIGNAL_FORMATS)
+            word   = rng.choice(["BUY", "SELL", "LONG", "SHORT", "Buy", "Sell"])
+            action = "BUY" if word.upper() in BUY_WORDS else "SELL"
+            sign   = 1 if action == "BUY" else -1
+            entry  = _price(rng, base, decimals)
+            tp     = f"{float(entry) * (1 + sign * 0.01):.{decimals}f}"
+            tp2    = f"{float(entry) * (1 + sign * 0.02):.{decimals}f}"
+            sl     = f"{float(entry) * (1 - sign * 0.005):.{decimals}f}"
+            text   = template.format(P=shown, A=word.upper(), a=word.lower(),
+                                     E=entry, T=tp, T2=tp2, S=sl)
+            corpus.append({"format": fmt, "text": text, "signal": True, "pair": pair, "action": action,
+                           "entry": entry if "{E}" in template else "N/A",
+                           "tp": tp if "{T}" in template else "N/A",
+                           "sl": sl if "{S}" in template else "N/A"})
+        else:
+            fmt, template = rng.choice(NON_SIGNALS)
+            text = template.format(P=shown, E=_price(rng, base, decimals), n=rng.randint(2, 90))
+            corpus.append({"format": fmt, "text": text, "signal": False})
+    return corpus
+
+
+def load_corpus(path: str = CORPUS_FILE) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _same_value(got: str, want: str) -> bool:
+    if got == want:
+        return True
+    try:
+        return Decimal(got) == Decimal(want)
+    except (InvalidOperation, TypeError):
+        return False
+
+
+def accuracy(corpus: list) -> dict:
+    """Precision/recall of is_trading_signal, and per-field accuracy of extract_signal on true signals."""
+    tp = fp = fn = 0
+    fields  = {f: 0 for f in LABELLED}
+    misses  = {}
+    for case in corpus:
+        said = is_trading_signal(case["text"])
+        if said and case["signal"]:
+            tp += 1
+            got = extract_signal(case["text"])
+            for f in LABELLED:
+                if _same_value(got[f], case[f]):
+                    fields[f] += 1
+                else:
+                    misses[case["format"]] = misses.get(case["format"], 0) + 1
+        elif said:
+            fp += 1
+            misses[case["format"]] = misses.get(case["format"], 0) + 1
+        elif case["signal"]:
+            fn += 1
+            misses[case["format"]] = misses.get(case["format"], 0) + 1
+    return {
+        "precision": round(tp / (tp + fp), 4) if tp + fp else 0.0,
+        "recall":    round(tp / (tp + fn), 4) if tp + fn else 0.0,
+        "fields":    {f: round(n / tp, 4) if tp else 0.0 for f, n in fields.items()},
+        "misses":    dict(sorted(misses.items(), key=lambda kv: -kv[1]))
+    }
+
+
+def allocations(parse, messages: list) -> tuple:
+    """(memory blocks a parse result keeps, peak bytes allocated while parsing) per message."""
+    gc.collect()
+    kept   = [None] * len(messages)
+    before = sys.getallocatedblocks()
+    for i, text in enumerate(messages):
+        kept[i] = parse(text)
+    blocks = (sys.getallocatedblocks() - before) / len(messages)
+    del kept
+
+    tracemalloc.start()
+    peak = 0
+    for text in messages:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        parse(text)
+        peak += tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    return blocks, peak / len(messages)
+
+
+# ─────────────────────────────────────────────
+# RUN
+# ─────────────────────────────────────────────
+FIELDS   = ("message", "source", "pair", "action", "entry", "tp", "sl", "priority")
+LABELLED = ("pair", "action", "entry", "tp", "sl")
+
+
+def check_identical(messages: list) -> int:
+    mismatches = 0
+    for text in set(messages):
+        old, new = legacy_parse(text), parse_signal(text)
+        if (old is None) != (new is None) or (old and any(old[f] != new[f] for f in FIELDS)):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  ❌ mismatch: {text!r}\n     legacy={old}\n     new   ={new}")
+    return mismatches
+
+
+def rate(parse, messages: list) -> float:
+    started = time.perf_counter()
+    for text in messages:
+        parse(text)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def timed(label: str, parse, messages: list) -> float:
+    speed = rate(parse, messages)
+    print(f"  {label:<10} {speed:12,.0f} msgs/s")
+    return speed
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """What got worse than the baseline: throughput beyond `threshold`, accuracy at all."""
+    found = []
+    floor = baseline["relative_speed"] * (1 - threshold)
+    if results["relative_speed"] < floor:
+        found.append(f"throughput {results['relative_speed']:.2f}x legacy, baseline "
+                     f"{baseline['relative_speed']:.2f}x (allowed down to {floor:.2f}x)")
+    for key in ("precision", "recall"):
+        if results[key] < baseline[key] - 0.001:
+            found.append(f"{key} {results[key]:.2%}, baseline {baseline[key]:.2%}")
+    for field, value in results["fields"].items():
+        if value < baseline["fields"].get(field, 0) - 0.001:
+            found.append(f"{field} accuracy {value:.2%}, baseline {baseline['fields'][field]:.2%}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signal parser speed, accuracy and regression check")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="labelled messages (JSON lines)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed throughput drop against the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="record this run as the baseline")
+    parser.add_argument("--write-corpus", type=int, metavar="N",
+                        help="regenerate the corpus with N messages and exit")
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        with open(args.corpus, "w", encoding="utf-8") as f:
+            for case in build_corpus(args.write_corpus, args.seed):
+                f.write(json.dumps(case, ensure_ascii=False) + "\n")
+        print(f"📝 {args.write_corpus:,} labelled messages → {args.corpus}")
+        return
+
+    messages = generate_messages(args.count, args.seed)
+    print(f"\n📊 Signal parser benchmark ({len(messages):,} messages)")
+    print("─"*44)
+
+    mismatches = check_identical(messages)
+    print(f"  regression: {len(set(messages)):,} distinct messages, {mismatches} mismatch(es)")
+    print("─"*44)
+
+    old = timed("legacy", legacy_parse, messages)
+    new = timed("compiled", parse_signal, messages)
+    print("─"*44)
+    print(f"  speed-up: {new / old:.2f}x\n")
+
+    # ── Labelled corpus: accuracy, allocations, throughput on a realistic mix ──
+    corpus = load_corpus(args.corpus)
+    texts  = [case["text"] for case in corpus]
+    scored = accuracy(corpus)
+    print(f"🎯 Corpus {os.path.basename(args.corpus)} ({len(corpus):,} labelled messages, "
+          f"{sum(c['signal'] for c in corpus):,} signals)")
+    print("─"*44)
+    print(f"  is_trading_signal  precision {scored['precision']:.2%} | recall {scored['recall']:.2%}")
+    print("  extract_signal     " + " | ".join(f"{f} {v:.1%}" for f, v in scored["fields"].items()))
+    worst = list(scored["misses"].items())[:5]
+    if worst:
+        print("  most missed        " + ", ".join(f"{fmt} ({n})" for fmt, n in worst))
+    blocks, peak = allocations(parse_signal, texts)
+    legacy_blocks, legacy_peak = allocations(legacy_parse, texts)
+    print(f"  allocations        {blocks:.1f} blocks kept, {peak:,.0f} B peak per message "
+          f"(legacy {legacy_blocks:.1f}, {legacy_peak:,.0f} B)")
+    # Alternate the two so a busy machine slows both alike; keep each one's best round
+    mix, old_mix, new_mix = texts * max(1, args.count // (4 * len(texts))), 0.0, 0.0
+    for _ in range(5):
+        old_mix = max(old_mix, rate(legacy_parse, mix))
+        new_mix = max(new_mix, rate(parse_signal, mix))
+    print(f"  legacy     {old_mix:12,.0f} msgs/s")
+    print(f"  compiled   {new_mix:12,.0f} msgs/s")
+
+    results = {
+        "relative_speed":     round(new_mix / old_mix, 3),
+        "msgs_per_s":         round(new_mix),
+        "precision":          scored["precision"],
+        "recall":             scored["recall"],
+        "fields":             scored["fields"],
+        "blocks_per_msg":     round(blocks, 2),
+        "peak_bytes_per_msg": round(peak)
+    }
+    print("─"*44)
+    failed = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"  baseline saved → {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            failed = regressions(results, json.load(f), args.threshold)
+        for line in failed:
+            print(f"  ❌ {line}")
+        if not failed:
+            print(f"  ✅ no regression against {os.path.basename(args.baseline)} "
+                  f"({results['relative_speed']:.2f}x legacy)")
+    print()
+    sys.exit(1 if mismatches or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
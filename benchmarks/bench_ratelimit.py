@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Rate-limit Burst Benchmark
+benchmarks/bench_ratelimit.py
+
+Fans one signal out to N users through a local stub of the Twilio Messages
+API that only accepts --allowed messages per second and answers the rest
+with 429 (plus Retry-After with --retry-after). The bot's own limit is set
+to --configured per second, above what the stub allows, so the adaptive
+backoff has to find the real rate. Checks that every user was alerted and
+reports throughput as a share of the allowed rate. Exits non-zero if any
+alert was lost.
+
+Run:  python benchmarks/bench_ratelimit.py [--users 5000] [--allowed 500] [--configured 1000] [--engine threads|async]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+class LimitedTwilio(BaseHTTPRequestHandler):
+    """Accepts `allowed` sends per second (token bucket, 1s burst), 429 for the rest."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    allowed     = 500.0
+    retry_after = None
+    lock        = threading.Lock()
+    tokens      = 0.0
+    refilled    = 0.0
+    accepted    = 0
+    refused     = 0
+
+    @classmethod
+    def take(cls) -> bool:
+        with cls.lock:
+            now = time.monotonic()
+            cls.tokens   = min(cls.allowed, cls.tokens + (now - cls.refilled) * cls.allowed)
+            cls.refilled = now
+            if cls.tokens >= 1:
+                cls.tokens   -= 1
+                cls.accepted += 1
+                return True
+            cls.refused += 1
+            return False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.take():
+            status, body = 201, {"sid": "SM" + "0" * 32, "status": "queued"}
+        else:
+            status, body = 429, {"code": 20429, "message": "Too Many Requests", "status": 429}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429 and self.retry_after is not None:
+            self.send_header("Retry-After", str(self.retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 4096
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive rate limiting under a burst")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--allowed", type=float, default=500, help="sends/s the stub accepts")
+    parser.add_argument("--configured", type=float, default=1000, help="bot's whatsapp rate limit")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After the stub sends")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    LimitedTwilio.allowed     = args.allowed
+    LimitedTwilio.retry_after = args.retry_after
+    LimitedTwilio.refilled    = time.monotonic()
+    server = QuietServer(("127.0.0.1", 0), LimitedTwilio)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ.setdefault("TWILIO_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_TOKEN", "stub-token")
+    os.environ["TWILIO_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    import logging
+    logging.basicConfig(level=logging.CRITICAL)
+    from clients import close_all, configure
+
+    limits = {"whatsapp": args.configured, "push": 0}
+    if args.engine == "async":
+        from async_alerts import AsyncFanoutEngine
+        engine = AsyncFanoutEngine(max_concurrency=args.workers, deadline=600, rate_limits=limits)
+    else:
+        from fanout import FanoutEngine
+        configure(pool_size=args.workers)
+        engine = FanoutEngine(max_workers=args.workers, deadline=600, rate_limits=limits)
+
+    users  = [{"id": f"TR{i:06d}", "name": f"User {i}", "phone": f"0801{i:07d}"}
+              for i in range(args.users)]
+    signal = {"id": "SIG-BENCH", "pair": "EURUSD", "action": "BUY", "entry": "1.0850",
+              "tp": "1.0900", "sl": "1.0800", "message": "BUY EURUSD @ 1.0850",
+              "timestamp": "2024-03-14T09:30:00"}
+
+    print(f"\n📊 Burst of {args.users:,} alerts ({args.engine}) – stub allows {args.allowed:,.0f}/s, "
+          f"bot configured for {args.configured:,.0f}/s")
+    started = time.perf_counter()
+    report  = engine.dispatch(signal, users)
+    elapsed = time.perf_counter() - started
+    engine.shutdown()
+
+    sent = report["counts"].get("sent", 0)
+    lost = args.users - sent
+    rate = sent / elapsed
+    print("─"*52)
+    print(f"  delivered  : {sent:,}/{args.users:,} ({lost:,} lost)")
+    print(f"  429s       : {LimitedTwilio.refused:,} ({report['deferred']:,} sends deferred and retried)")
+    print(f"  duration   : {elapsed:.2f}s")
+    print(f"  throughput : {rate:,.0f}/s = {rate / args.allowed:.0%} of the allowed rate")
+    print(f"  limiter    : {engine.limits.stats()['providers']['whatsapp']}")
+    print("─"*52 + "\n")
+
+    close_all()
+    server.shutdown()
+    sys.exit(0 if lost == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Message Template Benchmark
+benchmarks/bench_templates.py
+
+Times building the alert text for every recipient of one signal:
+  • f-string  – the original alert_message, rebuilt per user
+  • templates – alert_message through templates.py: rendered once per
+                signal, then per-user fields slotted in
+once with the stock alert and once with one that greets each user by
+name. Also times one welcome message (no caching, every field is the user's).
+
+Run:  python benchmarks/bench_templates.py [--users 10000] [--signals 20]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def fstring_alert(signal: dict) -> str:
+    """alert_message before templates.py."""
+    action = signal.get("action", "N/A")
+    action_emoji = "🟢" if action.upper() == "BUY" else "🔴" if action.upper() == "SELL" else "⚪"
+    return (
+        f"🚨 *TradeL Alert* 🚨\n"
+        f"──────────────────\n"
+        f"*Pair:*   {signal.get('pair', 'N/A')}\n"
+        f"*Action:* {action_emoji} {action}\n"
+        f"*Entry:*  {signal.get('entry', 'N/A')}\n"
+        f"*TP:*     {signal.get('tp', 'N/A')}\n"
+        f"*SL:*     {signal.get('sl', 'N/A')}\n"
+        f"──────────────────\n"
+        f"{signal.get('message', '')}\n"
+        f"──────────────────\n"
+        f"⏱ {signal.get('timestamp', '')[:16].replace('T', ' ')}\n"
+        f"_TradeL – Never miss a trade._"
+    )
+
+
+def per_user(build, users: list, signals: list, repeat: int = 3) -> float:
+    """Best of `repeat` runs; a fresh signal id per run so the first render is included."""
+    best = float("inf")
+    for run in range(repeat):
+        batch   = [dict(s, id=f"{s['id']}-{run}") for s in signals]
+        started = time.perf_counter()
+        for signal in batch:
+            for user in users:
+                build(signal, user)
+        best = min(best, time.perf_counter() - started)
+    return best / (len(users) * len(signals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert text per recipient: f-strings vs templates")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--signals", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-templates-")
+    os.environ["TRADEL_TEMPLATES"] = os.path.join(workdir, "templates.json")
+    import templates
+    from whatsapp import alert_message, welcome_message
+
+    users   = [{"id": f"TR{i:07d}", "name": f"Trader {i}", "plan": "basic", "phone": f"080{i:08d}",
+                "joined": "2026-01-01T00:00:00", "expiry": "2026-02-01T00:00:00"}
+               for i in range(args.users)]
+    signals = [{"id": f"SIG{n:04d}", "pair": "EUR/USD", "action": "BUY", "entry": "1.0850",
+                "tp": "1.0900", "sl": "1.0800", "message": "BUY EUR/USD @ 1.0850 TP 1.0900 SL 1.0800",
+                "timestamp": "2026-01-01T10:00:00"} for n in range(args.signals)]
+
+    print(f"\n📝 Alert text for {args.users:,} users × {args.signals} signals")
+    print("─"*52)
+    old = per_user(lambda s, u: fstring_alert(s), users, signals)
+    print(f"  f-string           {old * 1e6:8.2f} µs/user")
+    new = per_user(alert_message, users, signals)
+    print(f"  templates          {new * 1e6:8.2f} µs/user   ({old / new:.1f}x)")
+
+    greeting = templates.DEFAULT_TEMPLATES["alert"].replace("🚨\n", "🚨\nHi {user.name},\n", 1)
+    templates.get_templates().templates["en"]["alert"] = templates.Template("alert", greeting)
+    templates.get_templates().cache.clear()
+    named = per_user(alert_message, users, [dict(s, id=s["id"] + "-named") for s in signals])
+    print(f"  templates + name   {named * 1e6:8.2f} µs/user   (the f-string had no per-user field)")
+
+    welcome = per_user(lambda s, u: welcome_message(u), users, signals[:1])
+    print(f"  welcome            {welcome * 1e6:8.2f} µs/user")
+    print("─"*52)
+    print(f"  {templates.get_templates().stats()}\n")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - /users Listing Benchmark
+benchmarks/bench_users_page.py
+
+Builds a subscriber list and times GET /users through the Flask test client:
+  • full dump   – the original response: every user in one JSON array
+  • page        – one page of `--limit` users, first and deep in the list
+  • filtered    – a narrow filter (plan + country + status), an expiry
+                  range, and a projection to three fields
+Also walks the whole list with cursors to show the total stays linear.
+
+Run:  python benchmarks/bench_users_page.py [--users 100000] [--limit 100]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def timed(client, url: str, repeat: int = 5) -> tuple:
+    """Best time of `repeat` requests, and the last response."""
+    best = float("inf")
+    for _ in range(repeat):
+        started  = time.perf_counter()
+        response = client.get(url)
+        body     = response.get_data()
+        best     = min(best, time.perf_counter() - started)
+    return best, response, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /users: full dump vs cursor pages")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-users-")
+    os.chdir(workdir)
+    logging.basicConfig(level=logging.CRITICAL)
+    from app import create_app
+    from users import UserRepository
+
+    rng   = random.Random(args.seed)
+    now   = datetime.now()
+    users = []
+    for i in range(args.users):
+        status = rng.choice(["active"] * 7 + ["pending", "inactive", "inactive"])
+        users.append({
+            "id": f"TR{i:08d}", "name": f"Trader {i}", "phone": f"080{i:08d}",
+            "plan": rng.choice(["basic"] * 9 + ["pro"]), "country": rng.choice(["NG"] * 8 + ["GH", "KE"]),
+            "status": status, "joined": now.isoformat(), "alerts_received": rng.randint(0, 500),
+            "expiry": (now + timedelta(seconds=rng.randint(-30 * 86400, 30 * 86400))).isoformat()
+        })
+
+    app    = create_app()
+    bot    = app.extensions["tradel"]
+    bot.repo = UserRepository(users)
+    client = app.test_client()
+
+    print(f"\n👥 GET /users with {args.users:,} users")
+    print("─"*60)
+    t, _, body = timed(client, "/users?limit=1000", 1)
+    full = sum(len(json.dumps(u)) for u in users)
+    started = time.perf_counter()
+    json.dumps(bot.repo.snapshot())
+    print(f"  full dump (old)       {(time.perf_counter() - started) * 1000:9.1f} ms  {full / 1e6:6.1f} MB")
+
+    cursor = None
+    for label, url in [
+        ("first page",          f"/users?limit={args.limit}"),
+        ("deep page",           f"/users?limit={args.limit}&cursor=CURSOR"),
+        ("plan+country+status", f"/users?limit={args.limit}&plan=pro&country=KE&status=pending"),
+        ("expiry range",        f"/users?limit={args.limit}&expires_after={now.isoformat()}"
+                                f"&expires_before={(now + timedelta(days=1)).isoformat()}"),
+        ("projection",          f"/users?limit={args.limit}&fields=name,expiry"),
+        ("ndjson",              f"/users?limit={args.limit}&format=ndjson"),
+    ]:
+        if "CURSOR" in url:
+            from users import encode_cursor
+            url = url.replace("CURSOR", encode_cursor(users[args.users * 9 // 10]["id"]))
+        t, response, body = timed(client, url)
+        print(f"  {label:<21} {t * 1000:9.2f} ms  {len(body) / 1e3:6.1f} kB")
+
+    started, pages, seen, url = time.perf_counter(), 0, 0, "/users?limit=1000&fields=id"
+    while url:
+        response = client.get(url)
+        data     = response.get_json()
+        pages   += 1
+        seen    += data["count"]
+        url      = f"/users?limit=1000&fields=id&cursor={data['next_cursor']}" if data["next_cursor"] else None
+    print("─"*60)
+    print(f"  full walk: {seen:,} users in {pages} pages, {time.perf_counter() - started:.2f}s\n")
+    bot.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
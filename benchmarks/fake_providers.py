@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Fake Twilio and OneSignal
+benchmarks/fake_providers.py
+
+Local HTTP servers that answer like the Twilio Messages API and the
+OneSignal notifications API, with a configurable delay, share of 5xx
+errors and share of 429s (with Retry-After). Every message they accept
+is recorded with the time it arrived, so a benchmark can tell when each
+user was alerted.
+
+    twilio, onesignal = start_fakes(Behaviour(latency=0.05, throttle_rate=0.02))
+    os.environ["TWILIO_API_URL"]    = twilio.url
+    os.environ["ONESIGNAL_API_URL"] = onesignal.url + "/api/v1/notifications"
+
+Set the environment before importing the bot: alerts.py reads
+ONESIGNAL_API_URL when it is imported.
+"""
+
+import json
+import time
+import random
+import threading
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from bench_clients import StubTwilio
+
+
+@dataclass
+class Behaviour:
+    latency:       float = 0.05     # seconds before answering
+    jitter:        float = 0.0      # up to this many extra seconds, uniformly
+    error_rate:    float = 0.0      # share of requests answered 500
+    throttle_rate: float = 0.0      # share of requests answered 429
+    retry_after:   float = 1.0      # Retry-After on a 429 (seconds)
+    seed:          int   = 7
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads     = True
+    request_queue_size = 4096
+
+    def __init__(self, handler, behaviour: Behaviour):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.behaviour  = behaviour
+        self.rng        = random.Random(behaviour.seed)
+        self.lock       = threading.Lock()
+        self.deliveries = []          # (monotonic time, recipient, payload) of accepted messages
+        self.statuses   = {}          # HTTP status → requests answered with it
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def outcome(self) -> int:
+        """Wait the configured latency, then pick 200, 429 or 500 for this request."""
+        b = self.behaviour
+        with self.lock:
+            roll, extra = self.rng.random(), self.rng.random() * b.jitter
+        time.sleep(b.latency + extra)
+        if roll < b.throttle_rate:
+            return 429
+        if roll < b.throttle_rate + b.error_rate:
+            return 500
+        return 200
+
+    def count(self, status: int):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def record(self, recipients: list, payload):
+        now = time.monotonic()
+        with self.lock:
+            self.deliveries.extend((now, r, payload) for r in recipients)
+
+
+def _reply(handler, status: int, body: dict, headers: dict | None = None):
+    data = json.dumps(body).encode()
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(data)))
+    for key, value in (headers or {}).items():
+        handler.send_header(key, value)
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+class FakeTwilio(StubTwilio):
+    """POST /2010-04-01/Accounts/{sid}/Messages.json (keep-alive and quiet, like StubTwilio)"""
+
+    def do_POST(self):
+        form   = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        status = self.server.outcome()
+        self.server.count(status)
+        if status == 429:
+            return _reply(self, 429, {"code": 20429, "message": "Too Many Requests", "status": 429},
+                          {"Retry-After": str(self.server.behaviour.retry_after)})
+        if status == 500:
+            return _reply(self, 500, {"code": 20500, "message": "Internal Server Error", "status": 500})
+        self.server.record(form.get("To", [""]), form.get("Body", [""])[0])
+        _reply(self, 201, {"sid": "SM" + "0" * 32, "status": "queued"})
+
+
+class FakeOneSignal(StubTwilio):
+    """POST /api/v1/notifications"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        status  = self.server.outcome()
+        self.server.count(status)
+        if status == 429:
+            return _reply(self, 429, {"errors": ["Rate limit exceeded"]},
+                          {"Retry-After": str(self.server.behaviour.retry_after)})
+        if status == 500:
+            return _reply(self, 500, {"errors": ["Internal server error"]})
+        players = payload.get("include_player_ids", [])
+        self.server.record(players, payload.get("data", {}))
+        _reply(self, 200, {"id": f"fake-{time.monotonic_ns()}", "recipients": len(players)})
+
+
+def start_fakes(twilio: Behaviour | None = None, onesignal: Behaviour | None = None) -> tuple:
+    """Start both fakes on free local ports, serving from daemon threads."""
+    servers = (FakeServer(FakeTwilio, twilio or Behaviour()),
+               FakeServer(FakeOneSignal, onesignal or Behaviour()))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
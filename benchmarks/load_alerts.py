@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - End-to-End Load Test (offline)
+benchmarks/load_alerts.py
+
+Runs the whole bot against fake Twilio and OneSignal servers
+(fake_providers.py), with no real service involved:
+  1. seeds --users active subscribers (a --push-share of them with a push token)
+  2. serves the Flask app over HTTP from this process
+  3. posts Twilio-style webhooks at --rate per second for --seconds, a
+     --signal-ratio of them trading signals, the rest group chatter
+  4. waits (up to --drain seconds) until every subscriber has every alert
+
+and reports webhook latency (p50/p95/p99), the time from each signal's
+webhook to its last subscriber being alerted, and throughput. Requests go
+out on a fixed schedule, so a slow server shows up as latency instead of
+quietly lowering the request rate.
+
+The fakes can be slow (--latency, --jitter), fail (--error-rate → 500,
+the alert goes to the retry queue) or rate limit (--throttle-rate → 429
+with Retry-After, the alert is sent again).
+
+    python benchmarks/load_alerts.py --users 2000 --rate 50 --seconds 20 --out run.json
+    python benchmarks/load_alerts.py … --baseline run.json      # exit 1 if >20% worse
+
+Run:  python benchmarks/load_alerts.py [--users 1000] [--rate 20] [--seconds 10] [--mode threads|async]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import http.client
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_parser import CHATTER
+from fake_providers import Behaviour, start_fakes
+
+# Each signal gets its own entry price, so an alert's text tells which signal it is
+ENTRY_TAG = re.compile(r"\b1\.1\d{4}\b")
+
+# Compared with --baseline: (path in the results, True if higher is better)
+WATCHED = [
+    (("webhook", "p95_ms"),                 False),
+    (("webhook", "p99_ms"),                 False),
+    (("webhook", "throughput_rps"),         True),
+    (("alerts", "time_to_last_alert", "p95_s"), False),
+    (("alerts", "throughput_aps"),          True),
+]
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def signal_text(k: int, rng: random.Random) -> tuple:
+    entry = f"1.{10000 + k}"
+    text  = (f"{rng.choice(['BUY', 'SELL'])} {rng.choice(['EURUSD', 'GBPUSD', 'XAUUSD', 'BTCUSDT'])} "
+             f"Entry: {entry} TP: 1.{20000 + k} SL: 1.0{k:04d}")
+    return entry, text
+
+
+# ─────────────────────────────────────────────
+# SET-UP
+# ─────────────────────────────────────────────
+def seed_users(count: int, push_share: float, rng: random.Random) -> list:
+    now, users = datetime.now(), []
+    for i in range(count):
+        users.append({
+            "id": f"TR{i:08d}", "name": f"Trader {i}", "phone": f"0801{i:07d}",
+            "country": "NG", "plan": "basic", "status": "active",
+            "joined": now.isoformat(), "alerts_received": 0,
+            "expiry": (now + timedelta(days=30)).isoformat(),
+            "push_token": f"player-{i}" if rng.random() < push_share else ""
+        })
+    return users
+
+
+def start_app(args, users: list):
+    """Write config and users into the working directory, then serve the bot over HTTP."""
+    os.makedirs("data", exist_ok=True)
+    rate = args.bot_rate_limit
+    with open("config.json", "w") as f:
+        json.dump({
+            "name": "TradeL", "version": "1.0.0", "storage": "json",
+            "fanout_mode": args.mode, "fanout_workers": args.fanout_workers,
+            "fanout_deadline": max(120, args.drain),
+            "rate_limits": {"whatsapp": rate, "push": rate},
+            "retry_base_delay": args.retry_delay, "retry_max_delay": args.retry_delay * 8
+        }, f)
+    from storage import get_storage
+    storage = get_storage({"storage": "json"})
+    storage.save_users(users)
+    storage.close()
+
+    from app import create_app
+    from werkzeug.serving import make_server
+    app = create_app()
+    app.extensions["tradel"].start()
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return app, server
+
+
+# ─────────────────────────────────────────────
+# TRAFFIC
+# ─────────────────────────────────────────────
+def replay(port: int, args) -> dict:
+    """Post rate × seconds webhooks on schedule from --connections keep-alive clients."""
+    rng      = random.Random(args.seed)
+    total    = int(args.rate * args.seconds)
+    messages = []
+    for i in range(total):
+        if rng.random() < args.signal_ratio:
+            messages.append(signal_text(sum(1 for m in messages if m[0]), rng))
+        else:
+            messages.append((None, rng.choice(CHATTER)))
+
+    lock      = threading.Lock()
+    next_i    = [0]
+    latencies = []
+    posted    = {}          # entry tag → monotonic time its webhook was sent
+    statuses  = {}
+    errors    = []
+    headers   = {"Content-Type": "application/x-www-form-urlencoded"}
+    start_at  = time.monotonic() + 0.2
+
+    def client(c):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while True:
+            with lock:
+                i = next_i[0]
+                next_i[0] += 1
+            if i >= total:
+                break
+            due = start_at + i / args.rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            tag, text = messages[i]
+            body = urlencode({"Body": text, "From": f"whatsapp:+23480{c:08d}", "MessageSid": f"SM{i:032d}"})
+            sent = time.monotonic()
+            try:
+                conn.request("POST", "/webhook/whatsapp", body=body, headers=headers)
+                response = conn.getresponse()
+                reply    = json.loads(response.read() or b"{}")
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                with lock:
+                    errors.append(str(e))
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                continue
+            done = time.monotonic()
+            with lock:
+                latencies.append(done - due)          # from when it should have been sent
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if tag and reply.get("status") == "signal_queued":
+                    posted[tag] = sent
+        conn.close()
+
+    pool = [threading.Thread(target=client, args=(c,)) for c in range(args.connections)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return {"latencies": latencies, "posted": posted, "statuses": statuses, "errors": errors,
+            "started": start_at, "finished": time.monotonic(), "total": total}
+
+
+def wait_for_alerts(twilio, onesignal, posted: dict, users: list, drain: float) -> float:
+    """Wait until every posted signal reached every subscriber, or `drain` seconds."""
+    want_whatsapp = len(users) * len(posted)
+    want_push     = sum(1 for u in users if u["push_token"]) * len(posted)
+    deadline      = time.monotonic() + drain
+    while time.monotonic() < deadline:
+        if len(twilio.deliveries) >= want_whatsapp and len(onesignal.deliveries) >= want_push:
+            break
+        time.sleep(0.1)
+    return time.monotonic()
+
+
+def alert_results(twilio, onesignal, posted: dict, users: list, replayed: dict) -> dict:
+    last, counts = {}, {}
+    for at, _, body in list(twilio.deliveries):
+        match = ENTRY_TAG.search(body)
+        if match and match.group(0) in posted:
+            tag = match.group(0)
+            last[tag]   = max(last.get(tag, 0.0), at)
+            counts[tag] = counts.get(tag, 0) + 1
+    for at, _, data in list(onesignal.deliveries):
+        tag = data.get("entry")
+        if tag in posted:
+            last[tag]   = max(last.get(tag, 0.0), at)
+            counts[tag] = counts.get(tag, 0) + 1
+
+    per_signal = len(users) + sum(1 for u in users if u["push_token"])
+    complete   = [tag for tag in posted if counts.get(tag, 0) >= per_signal]
+    to_last    = [last[tag] - posted[tag] for tag in complete]
+    delivered  = sum(counts.values())
+    span       = (max(last.values()) - replayed["started"]) if last else 0.0
+    return {
+        "signals":   len(posted),
+        "complete":  len(complete),
+        "delivered": delivered,
+        "expected":  per_signal * len(posted),
+        "time_to_last_alert": {
+            "p50_s": round(percentile(to_last, 50), 3),
+            "p95_s": round(percentile(to_last, 95), 3),
+            "max_s": round(max(to_last), 3) if to_last else 0.0
+        },
+        "throughput_aps": round(delivered / span, 1) if span else 0.0
+    }
+
+
+# ─────────────────────────────────────────────
+# REPORT
+# ─────────────────────────────────────────────
+def lookup(results: dict, path: tuple):
+    for key in path:
+        results = results.get(key, {}) if isinstance(results, dict) else {}
+    return results if isinstance(results, (int, float)) else None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions beyond `tolerance` (0.2 = 20%)."""
+    regressions = []
+    for path, higher_better in WATCHED:
+        now, before = lookup(results, path), lookup(baseline, path)
+        if not now or not before:
+            continue
+        worse = (before - now) / before if higher_better else (now - before) / before
+        if worse > tolerance:
+            regressions.append(f"{'.'.join(path)}: {before} → {now} ({worse:+.0%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test: webhooks in, alerts out")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--push-share", type=float, default=0.3, help="share of users with a push token")
+    parser.add_argument("--rate", type=float, default=20, help="webhooks per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--signal-ratio", type=float, default=0.05)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads")
+    parser.add_argument("--fanout-workers", type=int, default=32)
+    parser.add_argument("--bot-rate-limit", type=float, default=0, help="bot's sends/s per provider (0 = off)")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="bot's first retry delay (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake provider seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--drain", type=float, default=60, help="max seconds to wait for alerts afterwards")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    out      = os.path.abspath(args.out) if args.out else None
+    baseline = json.load(open(args.baseline)) if args.baseline else None
+
+    behaviour = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                     throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed)
+    twilio, onesignal = start_fakes(Behaviour(**behaviour), Behaviour(**behaviour))
+    os.environ["TWILIO_SID"]        = "AC" + "0" * 32
+    os.environ["TWILIO_TOKEN"]      = "fake-token"
+    os.environ["TWILIO_API_URL"]    = twilio.url
+    os.environ["ONESIGNAL_API_URL"] = onesignal.url + "/api/v1/notifications"
+    os.environ["ONESIGNAL_APP_ID"]  = "fake-app"
+    os.environ["ONESIGNAL_API_KEY"] = "fake-key"
+
+    workdir = tempfile.mkdtemp(prefix="tradel-load-")
+    os.chdir(workdir)
+    stderr, sys.stderr = sys.stderr, open(os.devnull, "w")     # the bot's console log
+    from logconfig import setup_logging, stop_logging
+    setup_logging()
+    sys.stderr = stderr
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    users = seed_users(args.users, args.push_share, random.Random(args.seed))
+    app, server = start_app(args, users)
+
+    print(f"\n🏋️  {args.rate:g} webhooks/s for {args.seconds:g}s ({args.signal_ratio:.0%} signals) → "
+          f"{args.users:,} users, {args.mode} fan-out, fake providers {args.latency * 1000:.0f}"
+          f"±{args.jitter * 1000:.0f} ms, {args.error_rate:.0%} errors, {args.throttle_rate:.0%} 429s")
+    replayed = replay(server.server_port, args)
+    drained  = wait_for_alerts(twilio, onesignal, replayed["posted"], users, args.drain)
+
+    latencies = replayed["latencies"]
+    ok        = replayed["statuses"].get(200, 0)
+    results   = {
+        "run": {"time": datetime.now().isoformat(timespec="seconds"),
+                **{k: v for k, v in vars(args).items() if k not in ("out", "baseline")}},
+        "webhook": {
+            "requests":       replayed["total"],
+            "ok":             ok,
+            "errors":         len(replayed["errors"]),
+            "p50_ms":         round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms":         round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms":         round(percentile(latencies, 99) * 1000, 2),
+            "max_ms":         round(max(latencies) * 1000, 2) if latencies else 0.0,
+            "throughput_rps": round(ok / (replayed["finished"] - replayed["started"]), 1)
+        },
+        "alerts": alert_results(twilio, onesignal, replayed["posted"], users, replayed),
+        "providers": {"twilio":    {str(k): v for k, v in sorted(twilio.statuses.items())},
+                      "onesignal": {str(k): v for k, v in sorted(onesignal.statuses.items())}},
+        "drain_s": round(drained - replayed["finished"], 2)
+    }
+
+    w, a = results["webhook"], results["alerts"]
+    print("─"*64)
+    print(f"  webhooks   {w['ok']:,}/{w['requests']:,} OK | {w['throughput_rps']:,} req/s | "
+          f"p50 {w['p50_ms']} ms | p95 {w['p95_ms']} ms | p99 {w['p99_ms']} ms")
+    print(f"  alerts     {a['delivered']:,}/{a['expected']:,} delivered | {a['complete']}/{a['signals']} "
+          f"signals reached everyone | {a['throughput_aps']:,} alerts/s")
+    t = a["time_to_last_alert"]
+    print(f"  last alert p50 {t['p50_s']}s | p95 {t['p95_s']}s | max {t['max_s']}s after the webhook")
+    print(f"  providers  twilio {results['providers']['twilio']} | onesignal {results['providers']['onesignal']}")
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    if baseline:
+        print("─"*64)
+        for line in regressions:
+            print(f"  ❌ {line}")
+        if not regressions:
+            print(f"  ✅ within {args.tolerance:.0%} of {args.baseline}")
+    print("─"*64 + "\n")
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"  results → {out}\n")
+
+    app.extensions["tradel"].shutdown(timeout=5)
+    server.shutdown()
+    for fake in (twilio, onesignal):
+        fake.shutdown()
+    stop_logging()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if regressions or a["complete"] < a["signals"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Webhook Load Test
+benchmarks/load_webhook.py
+
+Posts Twilio-style form messages to /webhook/whatsapp from many keep-alive
+connections for a fixed time and reports sustained requests per second and
+latency percentiles.
+
+By default only chatter is sent, so no alerts go out. --signal-ratio makes
+a share of the messages real signals: point the bot at a stub Twilio
+(TWILIO_API_URL) or run it with no active users first.
+
+Run:  python benchmarks/load_webhook.py [--url http://127.0.0.1:5000] [--connections 32] [--seconds 15]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse, urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_parser import CHATTER, generate_messages
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /webhook/whatsapp")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--signal-ratio", type=float, default=0.0,
+                        help="share of messages that are trading signals (these send alerts!)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    target  = urlparse(args.url)
+    path    = (target.path.rstrip("/") or "") + "/webhook/whatsapp"
+    signals = [m for m in generate_messages(2000, args.seed) if m not in CHATTER]
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    lock      = threading.Lock()
+    latencies = []
+    statuses  = {}
+    errors    = []
+    stop_at   = time.monotonic() + args.seconds
+
+    def client(i):
+        rng  = random.Random(args.seed + i)
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        mine, codes = [], {}
+        while time.monotonic() < stop_at:
+            text = rng.choice(signals) if rng.random() < args.signal_ratio else rng.choice(CHATTER)
+            body = urlencode({"Body": text, "From": f"whatsapp:+23480{i:08d}",
+                              "MessageSid": f"SM{i:04d}{len(mine):012d}"})
+            started = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(str(e))
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                continue
+            mine.append(time.perf_counter() - started)
+            codes[response.status] = codes.get(response.status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            for code, n in codes.items():
+                statuses[code] = statuses.get(code, 0) + n
+
+    print(f"\n🚦 Load test: {args.url}{path} – {args.connections} connections for {args.seconds}s "
+          f"({args.signal_ratio:.0%} signals)")
+    started = time.monotonic()
+    pool = [threading.Thread(target=client, args=(i,)) for i in range(args.connections)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    ok = statuses.get(200, 0)
+    print("─"*44)
+    print(f"  requests   : {len(latencies):,} ({ok:,} OK, {len(errors)} connection errors)")
+    print(f"  statuses   : {dict(sorted(statuses.items()))}")
+    print(f"  throughput : {ok / elapsed:,.0f} req/s sustained")
+    print(f"  latency    : p50 {percentile(latencies, 50) * 1000:.1f} ms | "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms | "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print("─"*44 + "\n")
+    sys.exit(0 if ok and not errors else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Concurrency Stress Test
+benchmarks/stress_concurrency.py
+
+Runs a TradeLBot in a scratch directory with a stub alert system and lets
+many threads add, activate, deactivate and read users and send signals
+while the background thread expires subscriptions that end mid-run.
+Afterwards it checks the invariants:
+  • every index (status, phone, expiry, scheduler) agrees with the users
+  • no active user is past their expiry
+  • alerts_received equals the alerts actually delivered to each user
+  • the saved users equal the in-memory users
+Exits non-zero on any failure.
+
+Run:  python benchmarks/stress_concurrency.py [--threads 16] [--seconds 10]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import argparse
+import logging
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+class StubAlerts:
+    """Counts deliveries per user instead of calling Twilio/OneSignal."""
+
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.delivered = {}
+
+    def send_whatsapp_alert(self, user, signal):
+        with self.lock:
+            self.delivered[user["id"]] = self.delivered.get(user["id"], 0) + 1
+        return True
+
+    def send_push_batch(self, tokens, signal, **kwargs):
+        return []
+
+
+def check(bot, alerts) -> list:
+    """Return a list of invariant violations (empty if all hold)."""
+    from users import normalise_phone, expiry_timestamp
+    from storage import JsonStorage
+
+    errors = []
+    repo   = bot.repo
+    users  = repo.all()
+    now    = time.time()
+
+    for status, bucket in repo.by_status.items():
+        for uid, user in bucket.items():
+            if user["status"] != status:
+                errors.append(f"{uid} indexed as {status} but is {user['status']}")
+    for user in users:
+        if repo.by_status.get(user["status"], {}).get(user["id"]) is not user:
+            errors.append(f"{user['id']} missing from status index")
+        phone = normalise_phone(user.get("phone") or "")
+        if phone and user["id"] not in repo.by_phone.get(phone, {}):
+            errors.append(f"{user['id']} missing from phone index")
+
+    expected = {u["id"]: expiry_timestamp(u["expiry"]) for u in users
+                if u["status"] == "active" and expiry_timestamp(u.get("expiry")) is not None}
+    if {uid: ts for ts, uid in repo.expiry_keys} != expected:
+        errors.append("expiry index disagrees with active users")
+    if sorted(repo.expiry_keys) != repo.expiry_keys:
+        errors.append("expiry index out of order")
+    if bot.expiry_scheduler.current != expected:
+        errors.append("scheduler disagrees with active users")
+
+    for user in users:
+        if user["status"] == "active" and expected.get(user["id"], now) < now:
+            errors.append(f"{user['id']} still active after expiry")
+        if user.get("alerts_received", 0) != alerts.delivered.get(user["id"], 0):
+            errors.append(f"{user['id']} alerts_received={user.get('alerts_received')} "
+                          f"but {alerts.delivered.get(user['id'], 0)} delivered")
+
+    bot.persistence.flush()
+    saved = {u["id"]: u for u in JsonStorage().load_users()}
+    if saved != {u["id"]: u for u in repo.snapshot()}:
+        errors.append(f"saved users differ from memory ({len(saved)} saved, {len(users)} in memory)")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer TradeLBot from many threads and check invariants")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-stress-")
+    os.chdir(workdir)
+    from app import TradeLBot
+    from fanout import FanoutEngine
+    logging.basicConfig(level=logging.WARNING)
+
+    bot    = TradeLBot()
+    alerts = StubAlerts()
+    bot.config["check_interval"] = 0.2
+    bot.fanout = FanoutEngine(alert_system=alerts, max_workers=8,
+                              rate_limits={"whatsapp": 0, "push": 0})
+    bot.persistence.window = 0.05
+    bot.start()
+
+    ops      = {}      # thread → {operation: count}
+    failures = []
+    stop_at  = time.monotonic() + args.seconds
+
+    def work(i):
+        rng    = random.Random(args.seed + i)
+        counts = ops[i] = {}
+        try:
+            while time.monotonic() < stop_at:
+                op = rng.choice(["add", "add", "activate", "activate", "deactivate",
+                                 "signal", "read", "read"])
+                ids = list(bot.repo.by_id)
+                if op == "add" or not ids:
+                    bot.add_user({"phone": f"080{rng.randrange(10**8):08d}", "name": f"T{i}"})
+                elif op == "activate":
+                    # Short subscriptions so the background thread expires users mid-run
+                    expiry = (datetime.now() + timedelta(seconds=rng.uniform(-1, 3))).isoformat()
+                    user = bot.repo.activate(rng.choice(ids), expiry)
+                    if user:
+                        bot.save_users([user])
+                elif op == "deactivate":
+                    bot.deactivate_user(rng.choice(ids))
+                elif op == "signal":
+                    bot.process_signal({"message": "BTC BUY 50000", "pair": "BTC", "action": "BUY"})
+                else:
+                    bot.repo.snapshot()
+                    bot.repo.active()
+                counts[op] = counts.get(op, 0) + 1
+        except Exception as e:
+            failures.append(f"thread {i}: {type(e).__name__}: {e}")
+
+    print(f"\n🧪 Stressing TradeLBot: {args.threads} threads for {args.seconds}s")
+    pool = [threading.Thread(target=work, args=(i,)) for i in range(args.threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    # Let every subscription that ends within the run expire, then check
+    time.sleep(3.5)
+    bot.check_subscriptions()
+    errors = failures + check(bot, alerts)
+
+    print("─"*44)
+    totals = {}
+    for counts in ops.values():
+        for op, n in counts.items():
+            totals[op] = totals.get(op, 0) + n
+    print(f"  operations : {sum(totals.values()):,} {dict(sorted(totals.items()))}")
+    print(f"  users      : {len(bot.repo):,} ({bot.repo.count('active')} active)")
+    print(f"  alerts     : {sum(alerts.delivered.values()):,} delivered")
+    print(f"  writes     : {bot.persistence.writes:,}")
+    print("─"*44)
+    for error in errors[:10]:
+        print(f"  ❌ {error}")
+    print("  ✅ PASS\n" if not errors else f"  ❌ FAIL ({len(errors)} violation(s))\n")
+    bot.fanout.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Signal Dedup Stress Test
+benchmarks/stress_dedup.py
+
+Sends every signal several times at once through SignalDeduper: Twilio
+retries (same MessageSid) and reposts (new MessageSid, same trade written
+differently – "1.0850" vs "1.085", other case and spacing). Checks that
+  • each signal gets through exactly once, from many threads
+  • after a restart (a new deduper on the same store) none gets through
+  • a forgotten key (its signal failed to queue) stays forgotten on reload
+  • with SQLite, each gets through exactly once across several processes
+and reports check() throughput and how many keys stay in memory.
+Exits non-zero on any failure.
+
+Run:  python benchmarks/stress_dedup.py [--signals 2000] [--copies 4] [--threads 16] [--processes 4]
+"""
+
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from dedup import SignalDeduper
+from storage import JsonStorage, SqliteStorage
+
+
+def copies(n: int, count: int, seed: int) -> list:
+    """`count` deliveries of signal n as (message_sid, signal): retries and reposts mixed."""
+    entry = 1.0 + n / 10_000
+    out   = []
+    for c in range(count):
+        text = f"{entry:.4f}" if c % 2 else f"{entry:.4f}".rstrip("0")
+        sid  = f"SM{n:08d}{c // 2:04d}"          # every second copy is a Twilio retry
+        out.append((sid, {"pair": "EUR/USD" if c % 3 else "eur/usd", "action": "BUY",
+                          "entry": text, "tp": f"{entry + 0.01:.4f}", "sl": f"{entry - 0.01:.4f}",
+                          "message": f"BUY EUR/USD {text}"}))
+    random.Random(seed + n).shuffle(out)
+    return out
+
+
+def run(deduper, work: list, threads: int) -> tuple:
+    accepted = {}
+    lock     = threading.Lock()
+
+    def submit(item):
+        n, sid, signal = item
+        if deduper.check(signal, sid) is None:
+            with lock:
+                accepted[n] = accepted.get(n, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(submit, work))
+    return accepted, time.perf_counter() - started
+
+
+def worker(path: str, work: list, results):
+    deduper = SignalDeduper(SqliteStorage(path))
+    results.put([n for n, sid, signal in work if deduper.check(signal, sid) is None])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate signals through SignalDeduper")
+    parser.add_argument("--signals", type=int, default=2000)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-dedup-")
+    work    = [(n, sid, signal) for n in range(args.signals)
+               for sid, signal in copies(n, args.copies, args.seed)]
+    random.Random(args.seed).shuffle(work)
+    errors  = []
+
+    print(f"\n🧪 {args.signals:,} signals × {args.copies} copies")
+    print("─"*52)
+    for name in ("json", "sqlite"):
+        if name == "json":
+            store = lambda: JsonStorage(dedup_file=os.path.join(workdir, "dedup.jsonl"),
+                                        signals_dir=os.path.join(workdir, "signals"))
+        else:
+            store = lambda: SqliteStorage(os.path.join(workdir, "tradel.db"))
+
+        deduper = SignalDeduper(store())
+        accepted, elapsed = run(deduper, work, args.threads)
+        wrong = [n for n in range(args.signals) if accepted.get(n, 0) != 1]
+        if wrong:
+            errors.append(f"{name}: {len(wrong)} signal(s) not accepted exactly once, e.g. #{wrong[0]}")
+        stats = deduper.stats()
+        print(f"  {name:<7} {len(work) / elapsed:>10,.0f} checks/s | {sum(accepted.values()):,} accepted | "
+              f"{stats['dropped']['retry']:,} retries, {stats['dropped']['repost']:,} reposts dropped | "
+              f"{stats['keys']:,} keys")
+
+        restarted = SignalDeduper(store())
+        again, _  = run(restarted, work, args.threads)
+        if again:
+            errors.append(f"{name}: {len(again)} signal(s) accepted again after a restart")
+
+        forgetful = store()
+        now       = time.time()
+        forgetful.claim_dedup([("sig:forgotten", now + 600), ("sig:kept", now + 600)], now)
+        forgetful.forget_dedup(["sig:forgotten"])
+        reloaded  = {key for key, _ in store().load_dedup(time.time())}
+        if "sig:forgotten" in reloaded or "sig:kept" not in reloaded:
+            errors.append(f"{name}: claim → forget → reload kept the forgotten key or lost the other")
+
+    path = os.path.join(workdir, "cluster.db")
+    SqliteStorage(path)
+    results = multiprocessing.Queue()
+    procs   = [multiprocessing.Process(target=worker, args=(path, work[i::args.processes], results))
+               for i in range(args.processes)]
+    for proc in procs:
+        proc.start()
+    accepted = {}
+    for _ in procs:
+        for n in results.get():
+            accepted[n] = accepted.get(n, 0) + 1
+    for proc in procs:
+        proc.join()
+    wrong = [n for n in range(args.signals) if accepted.get(n, 0) != 1]
+    if wrong:
+        errors.append(f"cluster: {len(wrong)} signal(s) not accepted exactly once, e.g. #{wrong[0]}")
+    print(f"  cluster {args.processes} processes | {sum(accepted.values()):,} accepted")
+    print("─"*52)
+
+    for error in errors[:10]:
+        print(f"  ❌ {error}")
+    print("  ✅ PASS\n" if not errors else f"  ❌ FAIL ({len(errors)} violation(s))\n")
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
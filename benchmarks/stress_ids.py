@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - ID Generator Stress Test
+benchmarks/stress_ids.py
+
+Mints ids from many threads in several worker processes at once and
+checks that none collide and that each thread sees them in order.
+Exits non-zero on any failure.
+
+Run:  python benchmarks/stress_ids.py [--processes 4] [--threads 8] [--count 50000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ids import new_id
+
+
+def mint(threads: int, count: int) -> list:
+    """Runs in a worker process: `threads` threads × `count` ids each."""
+    results = [None] * threads
+
+    def work(i):
+        results[i] = [new_id("SIG") for _ in range(count)]
+
+    pool = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    out_of_order = sum(1 for ids in results for a, b in zip(ids, ids[1:]) if a >= b)
+    return [out_of_order] + [i for ids in results for i in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collision test for ids.new_id")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--count", type=int, default=50000, help="ids per thread")
+    args = parser.parse_args()
+
+    total = args.processes * args.threads * args.count
+    print(f"\n🧪 Minting {total:,} ids ({args.processes} processes × "
+          f"{args.threads} threads × {args.count:,})")
+
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    with ctx.Pool(args.processes) as pool:
+        batches = pool.starmap(mint, [(args.threads, args.count)] * args.processes)
+    elapsed = time.perf_counter() - started
+
+    out_of_order = sum(b[0] for b in batches)
+    ids          = [i for b in batches for i in b[1:]]
+    duplicates   = len(ids) - len(set(ids))
+
+    print("─"*44)
+    print(f"  rate         : {total / elapsed:,.0f} ids/s")
+    print(f"  duplicates   : {duplicates}")
+    print(f"  out of order : {out_of_order}")
+    print("─"*44)
+    ok = duplicates == 0 and out_of_order == 0 and len(ids) == total
+    print("  ✅ PASS\n" if ok else "  ❌ FAIL\n")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Retry Queue Stress Test
+benchmarks/stress_retries.py
+
+Runs a TradeLBot in a scratch directory with a stub alert system that
+fails a share of sends (--fail-rate), plus a few users whose sends always
+fail. Signals keep arriving while the retry queue works through the
+failures. Afterwards it checks:
+  • every user got every signal exactly once, or the alert is a dead
+    letter (all sends failed) – never both, never twice
+  • every alert to the always-failing users is a dead letter
+  • replaying the dead letters puts them back in the queue
+Reports retry-queue depth and age as it goes, and how many retry sends
+overlapped a new signal's dispatch (a round only starts when the signal
+queue is idle). Exits non-zero on any failure.
+
+Run:  python benchmarks/stress_retries.py [--users 200] [--signals 20] [--fail-rate 0.3]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+class FlakyAlerts:
+    """Fails `fail_rate` of WhatsApp sends at random, and every send to `broken` users."""
+
+    def __init__(self, fail_rate: float, broken: set, seed: int):
+        self.fail_rate = fail_rate
+        self.broken    = broken
+        self.rng       = random.Random(seed)
+        self.lock      = threading.Lock()
+        self.delivered = {}        # (signal id, user id) → deliveries
+        self.overlaps  = 0         # retry sends made while a signal was dispatching
+        self.bot       = None
+
+    def send_whatsapp_alert(self, user, signal):
+        with self.lock:
+            if threading.current_thread().name == "tradel-retry" and self.bot.signal_queue.busy():
+                self.overlaps += 1
+            if user["id"] in self.broken or self.rng.random() < self.fail_rate:
+                return False
+            key = (signal["id"], user["id"])
+            self.delivered[key] = self.delivered.get(key, 0) + 1
+        return True
+
+    def send_push_batch(self, tokens, signal, **kwargs):
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flaky sends through the retry queue")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--broken", type=int, default=3, help="users whose sends always fail")
+    parser.add_argument("--signals", type=int, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tradel-retries-")
+    os.chdir(workdir)
+    from app import TradeLBot
+    from fanout import FanoutEngine
+    logging.basicConfig(level=logging.CRITICAL)
+
+    bot = TradeLBot()
+    bot.retry_queue.base_delay   = 0.05
+    bot.retry_queue.max_delay    = 0.4
+    bot.retry_queue.max_attempts = 4
+    bot.retry_queue.interval     = 0.05
+
+    expiry = (datetime.now() + timedelta(days=30)).isoformat()
+    ids    = []
+    for i in range(args.users):
+        user_id = bot.add_user({"phone": f"080{i:08d}", "name": f"T{i}"})
+        bot.repo.activate(user_id, expiry)
+        ids.append(user_id)
+    broken = set(ids[:args.broken])
+
+    alerts     = FlakyAlerts(args.fail_rate, broken, args.seed)
+    alerts.bot = bot
+    bot.fanout = FanoutEngine(alert_system=alerts, max_workers=16,
+                              rate_limits={"whatsapp": 0, "push": 0})
+    bot.start()
+
+    print(f"\n🧪 {args.signals} signals to {args.users} users, {args.fail_rate:.0%} of sends failing, "
+          f"{args.broken} users always failing")
+    signal_ids = []
+    max_depth  = 0
+    for n in range(args.signals):
+        signal_ids.append(bot.enqueue_signal({"message": f"BTC BUY {50000 + n}",
+                                              "pair": "BTC", "action": "BUY"}))
+        time.sleep(0.05)
+        max_depth = max(max_depth, bot.retry_queue.stats()["depth"])
+
+    started = time.monotonic()
+    while time.monotonic() - started < 60:
+        stats = bot.retry_queue.stats()
+        max_depth = max(max_depth, stats["depth"])
+        if not bot.signal_queue.busy() and stats["depth"] == 0:
+            break
+        print(f"  … retry depth {stats['depth']:>5} | oldest {stats['oldest_age']:.2f}s")
+        time.sleep(0.5)
+
+    errors = []
+    dead   = bot.storage.dead_letters()
+    buried = {(e["signal"]["id"], e["user_id"]) for e in dead}
+    for signal_id in signal_ids:
+        for user_id in ids:
+            got = alerts.delivered.get((signal_id, user_id), 0)
+            if user_id in broken and (signal_id, user_id) not in buried:
+                errors.append(f"{user_id} always fails but {signal_id} is not a dead letter")
+            elif got + ((signal_id, user_id) in buried) != 1:
+                errors.append(f"{user_id} got {signal_id} {got} time(s), "
+                              f"dead letter: {(signal_id, user_id) in buried}")
+    if len(dead) != len(buried):
+        errors.append(f"{len(dead) - len(buried)} duplicate dead letter(s)")
+
+    bot.signal_queue.stop()
+    bot.retry_queue.stop()
+    replayed = bot.retry_queue.replay([e["id"] for e in dead[:5]])
+    if replayed != min(5, len(dead)) or bot.retry_queue.stats()["depth"] != replayed:
+        errors.append(f"replay moved {replayed} dead letter(s) but depth is "
+                      f"{bot.retry_queue.stats()['depth']}")
+
+    stats = bot.retry_queue.stats()
+    print("─"*44)
+    print(f"  deliveries : {sum(alerts.delivered.values()):,}")
+    print(f"  retries    : {stats['retried']:,} sent, {stats['delivered']:,} delivered, "
+          f"{stats['dead']:,} dead-lettered")
+    print(f"  max depth  : {max_depth:,}")
+    print(f"  overlaps   : {alerts.overlaps:,} retry send(s) during a new signal's dispatch")
+    print(f"  replayed   : {replayed}")
+    print("─"*44)
+    for error in errors[:10]:
+        print(f"  ❌ {error}")
+    print("  ✅ PASS\n" if not errors else f"  ❌ FAIL ({len(errors)} violation(s))\n")
+    bot.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Shared HTTP Clients
+clients.py
+
+One Twilio client and one requests.Session per upstream for the whole
+process, each with a keep-alive connection pool. Sending an alert then
+reuses an open connection instead of building a client and doing a fresh
+TCP/TLS handshake every time.
+
+Pool size comes from the TRADEL_HTTP_POOL_SIZE environment variable
+(default 64) or configure(pool_size=...) before the first send.
+
+Lifecycle hooks:
+    register_hook("created", fn)   # fn(name, client) after a client is built
+    register_hook("closed",  fn)   # fn(name, client) before it is closed
+"""
+
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("tradel.clients")
+
+
+_settings = {
+    "pool_size": int(os.environ.get("TRADEL_HTTP_POOL_SIZE", "64")),
+    "timeout":   10
+}
+_clients = {}       # name → client object
+_hooks   = {"created": [], "closed": []}
+_lock    = threading.Lock()
+
+
+def configure(**settings):
+    """Change pool_size / timeout. Only affects clients built afterwards."""
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown client setting(s): {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def register_hook(event: str, fn):
+    if event not in _hooks:
+        raise ValueError(f"Unknown hook event '{event}' (use one of {', '.join(_hooks)})")
+    _hooks[event].append(fn)
+
+
+def _run_hooks(event: str, name: str, client):
+    for fn in _hooks[event]:
+        try:
+            fn(name, client)
+        except Exception as e:
+            logger.error(f"❌ {event} hook failed for {name}: {e}")
+
+
+def _mount_pool(session: requests.Session):
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_settings["pool_size"])
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def _get(name: str, factory):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = factory()
+            _clients[name] = client
+            logger.info(f"🔌 Created shared client: {name}")
+            _run_hooks("created", name, client)
+    return client
+
+
+# ─────────────────────────────────────────────
+# CLIENT FACTORIES
+# ─────────────────────────────────────────────
+def get_session(name: str) -> requests.Session:
+    """A pooled keep-alive session shared by everything talking to `name`."""
+    def build():
+        session = requests.Session()
+        _mount_pool(session)
+        return session
+    return _get(f"session:{name}", build)
+
+
+def build_twilio_client(account_sid: str, auth_token: str):
+    from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
+
+    http_client = TwilioHttpClient(pool_connections=True, timeout=_settings["timeout"])
+    _mount_pool(http_client.session)
+    client = Client(account_sid, auth_token, http_client=http_client)
+    # Point at a local stub when testing, e.g. TWILIO_API_URL=http://127.0.0.1:8081
+    if os.environ.get("TWILIO_API_URL"):
+        client.api.base_url = os.environ["TWILIO_API_URL"]
+    return client
+
+
+def get_whatsapp_service():
+    """The process-wide WhatsAppService (raises EnvironmentError if Twilio isn't configured)."""
+    from whatsapp import WhatsAppService
+    return _get("whatsapp", WhatsAppService)
+
+
+# ─────────────────────────────────────────────
+# SHUTDOWN
+# ─────────────────────────────────────────────
+def close_all():
+    """Close every shared client. The next get_* call builds a fresh one."""
+    with _lock:
+        clients = list(_clients.items())
+        _clients.clear()
+    for name, client in clients:
+        _run_hooks("closed", name, client)
+        if isinstance(client, requests.Session):
+            session = client
+        else:                                   # WhatsAppService → Twilio http client
+            session = getattr(getattr(getattr(client, "client", None), "http_client", None), "session", None)
+        try:
+            if session is not None:
+                session.close()
+        except Exception as e:
+            logger.error(f"❌ Closing {name} failed: {e}")
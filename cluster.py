@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Multi-Process Mode
+cluster.py
+
+Lets several bot processes (e.g. gunicorn workers) serve the webhook from
+one shared SQLite store:
+  • SchedulerLock – a file lock on data/scheduler.lock; only the process
+    holding it expires subscriptions. If that process dies the OS drops
+    the lock and another worker takes over on its next check.
+  • ChangeFeed    – every user write adds a row to the `changes` table;
+    each process polls it and reloads just those users, so activations
+    made in one worker reach the others within `sync_interval`. A user
+    with unsaved local changes is reloaded once those are saved.
+
+Alert counters are added to in the database (storage.increment) rather
+than rewritten, and are not part of the feed: other processes pick up a
+user's new count the next time that user changes.
+
+Enable with "cluster": true in config.json (or TRADEL_CLUSTER=1) together
+with "storage": "sqlite".
+"""
+
+import os
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:      # not POSIX – there is only ever one process
+    fcntl = None
+
+logger = logging.getLogger("tradel.cluster")
+
+
+LOCK_FILE     = "data/scheduler.lock"
+SYNC_INTERVAL = 0.5      # seconds between change-feed polls
+
+
+# ─────────────────────────────────────────────
+# SCHEDULER ELECTION
+# ─────────────────────────────────────────────
+class SchedulerLock:
+
+    def __init__(self, path: str = LOCK_FILE):
+        self.path = path
+        self.fd   = None
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Take the lock without blocking. True if this process holds it."""
+        with self.lock:
+            if self.fd is not None:
+                return True
+            if fcntl is None:
+                self.fd = -1
+                return True
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self.fd = fd
+            logger.info(f"👑 Process {os.getpid()} is the subscription scheduler")
+            return True
+
+    @property
+    def held(self) -> bool:
+        return self.fd is not None
+
+    def release(self):
+        with self.lock:
+            if self.fd is not None and self.fd >= 0:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+                os.close(self.fd)
+            self.fd = None
+
+
+# ─────────────────────────────────────────────
+# CROSS-PROCESS CACHE INVALIDATION
+# ─────────────────────────────────────────────
+class ChangeFeed:
+
+    def __init__(self, storage, repo, since: int = 0, skip=None,
+                 interval: float = SYNC_INTERVAL):
+        self.storage  = storage
+        self.repo     = repo
+        self.seq      = since
+        self.skip     = skip            # user_id → True to keep the local copy (unsaved changes)
+        self.deferred = {}              # user_id → stored copy skipped for unsaved local changes
+        self.interval = interval
+        self.lock     = threading.Lock()
+        self.stopped  = threading.Event()
+        self.thread   = None
+        self.applied  = 0
+
+    def sync(self) -> int:
+        """
+        Reload users other processes have written since the last sync.
+        A user with unsaved local changes keeps the local copy for now and
+        is reloaded on a later sync, once those changes are saved.
+        """
+        with self.lock:
+            seq, user_ids = self.storage.changes_since(self.seq)
+            if user_ids is None:
+                logger.warning("⚠️  Change feed was pruned past our position – reloading all users")
+                users = self.storage.load_users()
+            else:
+                user_ids = list(dict.fromkeys([*self.deferred, *user_ids]))
+                users = self.storage.load_users_by_id(user_ids) if user_ids else []
+            applied = 0
+            for user in users:
+                if self.skip is not None and self.skip(user["id"]):
+                    self.deferred[user["id"]] = user
+                    continue
+                remote = self.deferred.pop(user["id"], None)
+                if remote is not None and remote != user:
+                    logger.warning(f"⚠️  User {user['id']} was changed here and by another process "
+                                   f"at the same time – this process's save replaced the other change")
+                self.repo.replace(user)
+                applied += 1
+            loaded = {user["id"] for user in users}
+            for user_id in [uid for uid in self.deferred if uid not in loaded]:
+                del self.deferred[user_id]          # no longer stored
+            self.seq      = seq
+            self.applied += applied
+            return applied
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="tradel-sync")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"❌ Change feed sync failed: {e}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Concurrency Primitives
+concurrency.py
+
+Readers-writer lock for state shared by the Flask request threads, the
+signal dispatchers and the background thread. Any number of readers may
+hold it together; a writer holds it alone. Waiting writers block new
+readers, so a steady stream of reads (webhooks, /users) cannot starve an
+activation or an expiry.
+
+    lock = RWLock()
+    with lock.read():
+        ...
+    with lock.write():
+        ...
+
+Not re-entrant: do not take read() or write() again while holding either.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+
+    def __init__(self):
+        self.cond            = threading.Condition(threading.Lock())
+        self.readers         = 0
+        self.writer          = False
+        self.writers_waiting = 0
+
+    # ── Readers ────────────────────────────────────────────
+    def acquire_read(self):
+        with self.cond:
+            while self.writer or self.writers_waiting:
+                self.cond.wait()
+            self.readers += 1
+
+    def release_read(self):
+        with self.cond:
+            self.readers -= 1
+            if not self.readers:
+                self.cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    # ── Writers ────────────────────────────────────────────
+    def acquire_write(self):
+        with self.cond:
+            self.writers_waiting += 1
+            try:
+                while self.writer or self.readers:
+                    self.cond.wait()
+            finally:
+                self.writers_waiting -= 1
+            self.writer = True
+
+    def release_write(self):
+        with self.cond:
+            self.writer = False
+            self.cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
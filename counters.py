@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Daily Counters
+counters.py
+
+Signals and alerts counted per calendar day (server local time), kept up
+to date as they happen, so `/` and `/stats` read a few integers instead of
+scanning users or the signal journal.
+
+Adds are written to the storage backend together once per `window`
+(the same persist_window that batches user saves, see persistence.py)
+and on shutdown, so a restart starts from today's counts without a write
+per signal. With a shared store (cluster mode) every process adds to the
+same rows, and reads pick up the other processes' counts at most once
+per `refresh` seconds.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger("tradel.counters")
+
+
+REFRESH = 1.0    # seconds between re-reads of a shared store's counts
+WINDOW  = 2.0    # seconds to gather adds before writing them
+
+
+def _next_midnight(now: float) -> float:
+    tomorrow = date.fromtimestamp(now) + timedelta(days=1)
+    return datetime(tomorrow.year, tomorrow.month, tomorrow.day).timestamp()
+
+
+class DailyCounters:
+
+    def __init__(self, storage=None, names: tuple = ("signals", "alerts"), refresh: float = REFRESH,
+                 window: float = WINDOW):
+        self.storage    = storage
+        self.names      = names
+        self.refresh    = refresh
+        self.window     = window
+        self.lock       = threading.Lock()
+        self.write_lock = threading.Lock()     # one flush at a time
+        self.day        = None
+        self.rollover   = 0.0      # when `day` ends
+        self.values     = {}
+        self.loaded     = 0.0      # when values were last read from a shared store
+        self.unsaved    = {}       # (day, name) → added but not yet written
+        self.timer      = None
+        self.closed     = False
+        self._roll(time.time())
+        if storage is not None:
+            atexit.register(self.close)
+
+    def _roll(self, now: float):
+        """Start the day `now` falls in, from the stored counts if there are any."""
+        self.day      = date.fromtimestamp(now).isoformat()
+        self.rollover = _next_midnight(now)
+        self.values   = dict.fromkeys(self.names, 0)
+        self._load(now)
+
+    def _load(self, now: float):
+        if self.storage is None:
+            return
+        try:
+            stored = self.storage.daily_counts(self.day)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read today's counts: {e}")
+            return
+        for name in self.names:
+            self.values[name] = stored.get(name, 0) + self.unsaved.get((self.day, name), 0)
+        self.loaded = now
+
+    def add(self, name: str, n: int = 1):
+        if n <= 0:
+            return
+        now = time.time()
+        with self.lock:
+            if now >= self.rollover:
+                self._roll(now)
+            self.values[name] += n
+            if self.storage is None:
+                return
+            key = (self.day, name)
+            self.unsaved[key] = self.unsaved.get(key, 0) + n
+            write_now = self._schedule()
+        if write_now:
+            self.flush()
+
+    def _schedule(self) -> bool:
+        """Start the window timer if none is running (lock held). True to write right away instead."""
+        if self.timer is not None:
+            return False
+        if self.closed or self.window <= 0:
+            return True
+        self.timer = threading.Timer(self.window, self.flush)
+        self.timer.name   = "tradel-counters"
+        self.timer.daemon = True
+        self.timer.start()
+        return False
+
+    def flush(self) -> int:
+        """Write the counts added since the last flush. Returns how many rows were updated."""
+        if self.storage is None:
+            return 0
+        with self.write_lock:
+            with self.lock:
+                batch = dict(self.unsaved)
+                if self.timer is not None and self.timer is not threading.current_thread():
+                    self.timer.cancel()
+                self.timer = None
+            written, failed = 0, False
+            for (day, name), n in batch.items():
+                try:
+                    self.storage.add_daily_count(day, name, n)
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not store {name} count, will retry: {e}")
+                    failed = True
+                    continue
+                with self.lock:
+                    # Still counted in `values` until written, so a re-read doesn't dip
+                    left = self.unsaved[(day, name)] - n
+                    if left:
+                        self.unsaved[(day, name)] = left
+                    else:
+                        del self.unsaved[(day, name)]
+                written += 1
+            if failed and not self.closed:
+                with self.lock:
+                    self._schedule()
+            return written
+
+    def close(self):
+        """Write what is pending and stop gathering: later adds are written at once."""
+        self.closed = True
+        self.flush()
+
+    def get(self, name: str) -> int:
+        """Today's count – no allocation unless the day changed or a shared store is due a re-read."""
+        now = time.time()
+        if now >= self.rollover or (self.storage is not None and self.storage.shared
+                                    and now - self.loaded >= self.refresh):
+            with self.lock:
+                if now >= self.rollover:
+                    self._roll(now)
+                elif now - self.loaded >= self.refresh:
+                    self._load(now)
+        return self.values[name]
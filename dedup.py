@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Signal Deduplication
+dedup.py
+
+Twilio retries a webhook it did not get a quick 200 for, and trading
+groups repost and forward the same signal. Each copy would alert every
+user again. SignalDeduper sits in front of the signal queue and drops a
+message when it has already seen either
+  • its MessageSid (a Twilio retry), kept for `sid_ttl` seconds, or
+  • the same pair, action, entry, TP and SL (a repost), kept for `ttl`
+    seconds. Prices compare as numbers, so 1.0850 and 1.085 match. A
+    signal without any price also compares its message text.
+
+Seen keys live in two bounded, TTL-ordered LRU maps and are also written
+to the storage backend, so a restart does not forget them. With SQLite
+the store claims keys atomically, so gunicorn workers share one dedup
+window.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from decimal import Decimal, InvalidOperation
+from collections import OrderedDict
+
+logger = logging.getLogger("tradel.dedup")
+
+
+CONTENT_TTL = 600          # seconds a repost of the same signal is dropped
+SID_TTL     = 86400        # seconds a Twilio MessageSid is remembered
+MAX_ENTRIES = 50_000       # keys kept in memory per kind
+
+
+def _number(value) -> str:
+    text = str(value or "").strip().upper()
+    try:
+        return format(Decimal(text).normalize(), "f")
+    except InvalidOperation:
+        return text
+
+
+def content_key(signal: dict) -> str:
+    """Hash of the fields that make two signals the same trade."""
+    values = [_number(signal.get(field)) for field in ("entry", "tp", "sl")]
+    parts  = [str(signal.get("pair", "")).upper(), str(signal.get("action", "")).upper(), *values]
+    if all(v in ("", "N/A") for v in values):
+        # Nothing to tell two vague signals apart but their wording
+        parts.append(" ".join(str(signal.get("message", "")).lower().split()))
+    return "sig:" + hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+class TTLCache:
+    """Keys with one shared TTL, oldest first – expiry and LRU eviction both pop from the front."""
+
+    def __init__(self, ttl: float, max_entries: int = MAX_ENTRIES):
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.entries     = OrderedDict()      # key → expires_at
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _expire(self, now: float):
+        while self.entries:
+            key, expires_at = next(iter(self.entries.items()))
+            if expires_at > now:
+                break
+            self.entries.popitem(last=False)
+
+    def seen(self, key: str, now: float) -> bool:
+        self._expire(now)
+        return key in self.entries
+
+    def add(self, key: str, now: float, expires_at: float | None = None) -> float:
+        expires_at = now + self.ttl if expires_at is None else expires_at
+        self.entries[key] = expires_at
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return expires_at
+
+
+class SignalDeduper:
+
+    def __init__(self, storage=None, ttl: float = CONTENT_TTL, sid_ttl: float = SID_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.storage = storage
+        self.content = TTLCache(ttl, max_entries)
+        self.sids    = TTLCache(sid_ttl, max_entries)
+        self.lock    = threading.Lock()
+        self.dropped = {"retry": 0, "repost": 0}
+        self.load()
+
+    @classmethod
+    def from_config(cls, config: dict, storage=None):
+        return cls(
+            storage,
+            ttl=config.get("dedup_ttl", CONTENT_TTL),
+            sid_ttl=config.get("dedup_sid_ttl", SID_TTL),
+            max_entries=config.get("dedup_max_entries", MAX_ENTRIES)
+        )
+
+    def _cache(self, key: str) -> TTLCache:
+        return self.sids if key.startswith("sid:") else self.content
+
+    def load(self) -> int:
+        """Refill the caches from the store (oldest first, so the newest survive eviction)."""
+        if self.storage is None:
+            return 0
+        now     = time.time()
+        entries = sorted(self.storage.load_dedup(now), key=lambda e: e[1])
+        with self.lock:
+            for key, expires_at in entries:
+                self._cache(key).add(key, now, expires_at)
+        if entries:
+            logger.info(f"🧷 Loaded {len(entries)} recent signal key(s) for deduplication")
+        return len(entries)
+
+    def check(self, signal: dict, message_sid: str | None = None) -> str | None:
+        """
+        Remember this signal. Returns None if it is new, or why it is a
+        duplicate: "retry" (same MessageSid) or "repost" (same trade).
+        """
+        now  = time.time()
+        keys = self._keys(signal, message_sid)
+        with self.lock:
+            reason = next((self._reason(k) for k in keys if self._cache(k).seen(k, now)), None)
+            fresh  = [(k, self._cache(k).add(k, now)) for k in keys]
+            if reason is None and self.storage is not None:
+                # Another process (or a run before a restart) may have seen it
+                try:
+                    held   = self.storage.claim_dedup(fresh, now)
+                    reason = next((self._reason(k) for k in keys if k in held), None)
+                except Exception as e:
+                    # Better a rare double alert than a lost signal
+                    logger.warning(f"⚠️  Could not record signal keys: {e}")
+            if reason is not None:
+                self.dropped[reason] += 1
+        if reason is not None:
+            logger.info(f"🧷 Dropped duplicate signal ({reason}): {str(signal.get('message', ''))[:60]}")
+        return reason
+
+    def forget(self, signal: dict, message_sid: str | None = None):
+        """Undo check() for a signal that could not be queued, so Twilio's retry gets through."""
+        keys = self._keys(signal, message_sid)
+        with self.lock:
+            for key in keys:
+                self._cache(key).entries.pop(key, None)
+            if self.storage is not None:
+                try:
+                    self.storage.forget_dedup(keys)
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not forget signal keys: {e}")
+
+    @staticmethod
+    def _keys(signal: dict, message_sid: str | None) -> list:
+        return ([f"sid:{message_sid}"] if message_sid else []) + [content_key(signal)]
+
+    @staticmethod
+    def _reason(key: str) -> str:
+        return "retry" if key.startswith("sid:") else "repost"
+
+    def prune(self) -> int:
+        if self.storage is None:
+            return 0
+        return self.storage.prune_dedup(time.time())
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"keys": len(self.content) + len(self.sids), "dropped": dict(self.dropped)}
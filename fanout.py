@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Alert Fan-out Engine
+fanout.py
+
+Delivers one signal to every active user through a bounded worker pool,
+so the last subscriber is alerted seconds after the first instead of
+minutes later. Each channel (WhatsApp, push) has its own rate limit and
+every signal has a hard deadline. A send the provider rate-limits (429)
+waits for the limiter again instead of failing (see ratelimit.py).
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ratelimit import RateLimits, Throttled
+from metrics import ALERTS, FANOUT_SECONDS, SEND_SECONDS, THROTTLED
+
+logger = logging.getLogger("tradel.fanout")
+
+
+DEFAULT_WORKERS  = 32      # concurrent deliveries
+DEFAULT_DEADLINE = 120     # seconds a signal may spend fanning out
+CHANNELS         = ("whatsapp", "push")
+DEFAULT_RATE_LIMITS = {
+    "whatsapp": 50,        # messages per second (0 = unlimited)
+    "push":     50         # OneSignal requests per second (each up to 2000 devices)
+}
+
+# Resolved once: these are recorded for every recipient
+SEND_WHATSAPP      = SEND_SECONDS.labels("whatsapp")
+THROTTLED_WHATSAPP = THROTTLED.labels("whatsapp")
+
+
+# ─────────────────────────────────────────────
+# FAN-OUT ENGINE
+# ─────────────────────────────────────────────
+class FanoutEngine:
+
+    def __init__(self, alert_system=None, max_workers: int = DEFAULT_WORKERS,
+                 deadline: float = DEFAULT_DEADLINE, rate_limits: dict | None = None,
+                 sender_rate_limits: dict | None = None, burst: float = 1):
+        if alert_system is None:
+            from alerts import AlertSystem
+            alert_system = AlertSystem()
+        self.alert_system = alert_system
+        self.max_workers  = max_workers
+        self.deadline     = deadline
+        self.executor     = ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix="tradel-fanout")
+        self.limits = build_limits(rate_limits, sender_rate_limits, burst)
+        sender = getattr(alert_system, "whatsapp_sender", None)
+        self.limiters = {
+            "whatsapp": self.limits.limiter("whatsapp", sender),
+            "push":     self.limits.limiter("push")
+        }
+
+    @classmethod
+    def from_config(cls, config: dict, alert_system=None):
+        return cls(
+            alert_system=alert_system,
+            max_workers=config.get("fanout_workers", DEFAULT_WORKERS),
+            deadline=config.get("fanout_deadline", DEFAULT_DEADLINE),
+            rate_limits=config.get("rate_limits"),
+            sender_rate_limits=config.get("sender_rate_limits"),
+            burst=config.get("rate_burst", 1)
+        )
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ── One recipient ──────────────────────────────────────
+    def _deliver(self, user: dict, signal: dict, started: float, deadline_at: float,
+                 whatsapp: bool = True) -> dict:
+        outcome = {
+            "user_id":  user.get("id"),
+            "status":   "skipped",
+            "whatsapp": None,
+            "push":     None,
+            "error":    None,
+            "elapsed":  None,
+            "deferred": 0
+        }
+        limiter = self.limiters["whatsapp"]
+        try:
+            if time.monotonic() > deadline_at:
+                outcome["status"] = "expired"
+                return outcome
+
+            while whatsapp and user.get("phone"):
+                if not limiter.acquire(deadline_at):
+                    outcome["status"] = "expired"
+                    return outcome
+                sending = time.perf_counter()
+                try:
+                    outcome["whatsapp"] = self.alert_system.send_whatsapp_alert(user, signal)
+                except Throttled as e:
+                    # Back of the queue: the limiter is paused and slower now
+                    outcome["deferred"] += 1
+                    THROTTLED_WHATSAPP.inc()
+                    limiter.throttled(e.retry_after)
+                    continue
+                finally:
+                    SEND_WHATSAPP.observe(time.perf_counter() - sending)
+                if outcome["whatsapp"]:
+                    limiter.succeeded()
+                outcome["status"] = "sent" if outcome["whatsapp"] else "failed"
+                break
+        except Exception as e:
+            outcome["status"] = "error"
+            outcome["error"]  = str(e)
+        finally:
+            outcome["elapsed"] = round(time.monotonic() - started, 3)
+            if outcome["status"] != "skipped":
+                ALERTS.labels("whatsapp", outcome["status"]).inc()
+        return outcome
+
+    # ── Push: all devices in a few multi-recipient requests ──
+    def _push(self, tokens: list, signal: dict, deadline_at: float) -> list | None:
+        try:
+            return self.alert_system.send_push_batch(tokens, signal, limiter=self.limiters["push"],
+                                                     deadline=deadline_at)
+        except Exception as e:
+            logger.error(f"❌ Push batch failed: {e}")
+            return []
+
+    # ── One signal → all recipients ────────────────────────
+    def dispatch(self, signal: dict, users: list, channels: tuple = CHANNELS) -> dict:
+        """
+        Send `signal` to every user in `users` and wait for the deadline.
+        Returns a report with per-signal timing and per-user outcomes.
+        `channels` limits the send to some of CHANNELS (retries use this).
+        """
+        started     = time.monotonic()
+        deadline_at = started + self.deadline
+
+        # Push goes out as one batched job alongside the WhatsApp sends
+        push_users  = ([u for u in users if u.get("phone") and u.get("push_token")]
+                       if "push" in channels else [])
+        push_tokens = [u["push_token"] for u in push_users]
+        push_future = (self.executor.submit(self._push, push_tokens, signal, deadline_at)
+                       if push_tokens else None)
+
+        futures = {
+            self.executor.submit(self._deliver, user, signal, started, deadline_at,
+                                 "whatsapp" in channels): user
+            for user in users
+        }
+        done, pending = wait(list(futures) + ([push_future] if push_future else []),
+                             timeout=self.deadline)
+
+        outcomes = {}
+        for future in done:
+            if future is push_future:
+                continue
+            outcome = future.result()
+            outcomes[outcome["user_id"]] = outcome
+        for future in pending:
+            cancelled = future.cancel()
+            if future is push_future:
+                continue
+            # A send already running can't be stopped and may still arrive:
+            # "in_flight" is not retried, so the user isn't alerted twice
+            user = futures[future]
+            outcomes[user.get("id")] = {
+                "user_id":  user.get("id"),
+                "status":   "expired" if cancelled else "in_flight",
+                "whatsapp": None,
+                "push":     None,
+                "error":    "deadline exceeded" if cancelled else "still sending at the deadline",
+                "elapsed":  None,
+                "deferred": 0
+            }
+
+        push_chunks = []
+        if push_future is not None:
+            sent = push_future.result() if push_future in done else []
+            if sent is not None:          # None: OneSignal is not configured, nothing was tried
+                push_chunks = sent
+                for user in push_users:
+                    # False unless a chunk says otherwise: the batch raised or ran out of time
+                    if user.get("id") in outcomes:
+                        outcomes[user["id"]]["push"] = False
+        for chunk in push_chunks:
+            for user in push_users[chunk["start"]:chunk["start"] + chunk["size"]]:
+                if user.get("id") in outcomes:
+                    outcomes[user["id"]]["push"] = chunk["ok"]
+
+        counts = {}
+        for outcome in outcomes.values():
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        elapsed = [o["elapsed"] for o in outcomes.values() if o["elapsed"] is not None]
+
+        report = {
+            "signal_id":     signal.get("id"),
+            "recipients":    len(users),
+            "counts":        counts,
+            "duration":      round(time.monotonic() - started, 3),
+            "last_delivery": max(elapsed) if elapsed else None,
+            "deferred":      sum(o["deferred"] for o in outcomes.values()),
+            "push":          push_chunks,
+            "outcomes":      outcomes
+        }
+        FANOUT_SECONDS.labels("threads").observe(report["duration"])
+        logger.info(
+            f"📣 Fan-out {report['signal_id']} done in {report['duration']}s | "
+            f"{len(users)} recipients | {counts} | {report['deferred']} deferred by rate limits",
+            extra=summary_fields(report, "threads")
+        )
+        return report
+
+
+def summary_fields(report: dict, engine: str) -> dict:
+    """The report without per-user outcomes: the structured fields of the fan-out log record."""
+    fields = {key: report[key] for key in ("signal_id", "recipients", "counts", "duration",
+                                           "last_delivery", "deferred")}
+    fields["engine"]      = engine
+    fields["push_chunks"] = len(report["push"])
+    return fields
+
+
+def build_limits(rate_limits: dict | None = None, sender_rate_limits: dict | None = None,
+                 burst: float = 1) -> RateLimits:
+    """Provider buckets from DEFAULT_RATE_LIMITS overridden by `rate_limits`, plus sender buckets."""
+    rates = dict(DEFAULT_RATE_LIMITS)
+    rates.update(rate_limits or {})
+    return RateLimits(rates, senders=sender_rate_limits, burst=burst)
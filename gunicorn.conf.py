@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Gunicorn Settings
+gunicorn.conf.py
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Tune with environment variables:
+  TRADEL_BIND      address to listen on            (default 0.0.0.0:5000)
+  TRADEL_WORKERS   worker processes                (default 1)
+  TRADEL_THREADS   request threads per worker      (default 8)
+  TRADEL_PRELOAD   import the app in the master    (default 1)
+  TRADEL_DRAIN     seconds a stopping worker may spend sending queued signals (default 30)
+
+More than one worker turns on cluster mode (TRADEL_CLUSTER=1), which
+needs "storage": "sqlite" – see cluster.py – and gives each worker its
+own log file, logs/tradel-{pid}.log: size rotation of one shared file
+from several processes loses records.
+"""
+
+import os
+
+bind         = os.environ.get("TRADEL_BIND", "0.0.0.0:5000")
+workers      = int(os.environ.get("TRADEL_WORKERS", "1"))
+threads      = int(os.environ.get("TRADEL_THREADS", "8"))
+worker_class = "gthread"
+preload_app  = os.environ.get("TRADEL_PRELOAD", "1") == "1"
+drain        = float(os.environ.get("TRADEL_DRAIN", "30"))
+
+timeout          = 60
+graceful_timeout = drain + 10      # drain the queue, then flush and close
+keepalive        = 5               # Twilio reuses connections for webhook bursts
+
+if workers > 1:
+    os.environ.setdefault("TRADEL_CLUSTER", "1")
+    os.environ.setdefault("TRADEL_LOG_FILE", "logs/tradel-{pid}.log")
+
+
+def post_worker_init(worker):
+    """Create and start this worker's bot before it accepts requests."""
+    from app import init_bot
+    init_bot(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    """Send what is queued, then flush users, the journal and HTTP clients."""
+    from app import shutdown_bot
+    shutdown_bot(worker.wsgi, timeout=drain)
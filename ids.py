@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - ID Generator
+ids.py
+
+Time-sortable unique ids for users, signals and payment references.
+
+Each id packs 90 bits into 18 Crockford base32 characters:
+  • 48 bits  milliseconds since the Unix epoch
+  • 24 bits  process id (unique among processes running on the server)
+  • 18 bits  sequence within the millisecond (262,144 ids/ms per process)
+
+Ids from one process always increase, even if the clock steps back, and
+sort by creation time across processes. Use with a prefix:
+    new_id("TR")  →  "TR06GMN8RBQR01WV0000"
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+
+ALPHABET  = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"   # Crockford base32, sorts like the numbers
+TIME_BITS = 48
+NODE_BITS = 24
+SEQ_BITS  = 18
+LENGTH    = (TIME_BITS + NODE_BITS + SEQ_BITS) // 5
+MAX_SEQ   = (1 << SEQ_BITS) - 1
+
+
+class IdGenerator:
+
+    def __init__(self, node: int | None = None):
+        self.node    = (os.getpid() if node is None else node) & ((1 << NODE_BITS) - 1)
+        self.lock    = threading.Lock()
+        self.last_ms = 0
+        self.seq     = 0
+
+    def _next(self) -> tuple:
+        with self.lock:
+            now = time.time_ns() // 1_000_000
+            if now > self.last_ms:
+                self.last_ms = now
+                self.seq     = 0
+            elif self.seq < MAX_SEQ:
+                self.seq += 1           # same ms (or clock stepped back): keep counting
+            else:
+                self.last_ms += 1       # sequence exhausted: borrow the next ms
+                self.seq      = 0
+            return self.last_ms, self.seq
+
+    def new(self, prefix: str = "") -> str:
+        ms, seq = self._next()
+        value = (ms << (NODE_BITS + SEQ_BITS)) | (self.node << SEQ_BITS) | seq
+        chars = []
+        for _ in range(LENGTH):
+            chars.append(ALPHABET[value & 31])
+            value >>= 5
+        return prefix + "".join(reversed(chars))
+
+
+def id_time(id_str: str, prefix: str = "") -> datetime:
+    """When an id was minted (local time)."""
+    value = 0
+    for ch in id_str[len(prefix):]:
+        value = value * 32 + ALPHABET.index(ch)
+    return datetime.fromtimestamp((value >> (NODE_BITS + SEQ_BITS)) / 1000)
+
+
+_generator = IdGenerator()
+
+
+def _reset_after_fork():
+    # A forked worker must not keep minting ids under its parent's process id
+    global _generator
+    _generator = IdGenerator()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def new_id(prefix: str = "") -> str:
+    return _generator.new(prefix)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Signal Journal
+journal.py
+
+Append-only record of every signal: one JSON object per line in
+signals/YYYY-MM-DD.jsonl. Appending never rereads the day's file, and a
+crash can at worst leave one half-written last line, which the reader
+skips. fsync is batched so a burst of signals shares one disk flush.
+
+Replay or report:  python journal.py [YYYY-MM-DD]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("tradel.journal")
+
+
+class SignalJournal:
+
+    def __init__(self, directory: str = "signals", fsync_every: int = 32,
+                 fsync_interval: float = 1.0):
+        self.directory      = directory
+        self.fsync_every    = fsync_every      # records between fsyncs
+        self.fsync_interval = fsync_interval   # max seconds between fsyncs
+        self.lock           = threading.Lock()
+        self.segment_day    = None
+        self.segment        = None
+        self.unsynced       = 0
+        self.last_sync      = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def segment_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}.jsonl")
+
+    # ── Writing ────────────────────────────────────────────
+    def append(self, record: dict):
+        """Append one record to the segment for its day (from record['timestamp'])."""
+        day  = (record.get("timestamp") or datetime.now().isoformat())[:10]
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            if day != self.segment_day:
+                self._rotate(day)
+            self.segment.write(line)
+            self.segment.flush()
+            self.unsynced += 1
+            if (self.unsynced >= self.fsync_every
+                    or time.monotonic() - self.last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _rotate(self, day: str):
+        if self.segment:
+            self._sync()
+            self.segment.close()
+        path = self.segment_path(day)
+        self.segment     = open(path, "a", encoding="utf-8")
+        self.segment_day = day
+        # Terminate a line torn by a crash so the next record starts clean
+        if os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.segment.write("\n")
+
+    def _sync(self):
+        if self.segment and self.unsynced:
+            os.fsync(self.segment.fileno())
+        self.unsynced  = 0
+        self.last_sync = time.monotonic()
+
+    def flush(self):
+        """Force everything appended so far onto disk."""
+        with self.lock:
+            self._sync()
+
+    def close(self):
+        with self.lock:
+            if self.segment:
+                self._sync()
+                self.segment.close()
+            self.segment     = None
+            self.segment_day = None
+
+    # ── Reading ────────────────────────────────────────────
+    def days(self) -> list:
+        """Days that have signals, oldest first (includes legacy .json files)."""
+        days = set()
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext in (".jsonl", ".json"):
+                days.add(stem)
+        return sorted(days)
+
+    def read(self, day: str):
+        """Stream the records for one day in the order they were written."""
+        legacy = os.path.join(self.directory, f"{day}.json")
+        if os.path.exists(legacy):
+            with open(legacy, "r") as f:
+                yield from json.load(f)
+
+        path = self.segment_path(day)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.endswith("\n"):
+                    logger.warning(f"⚠️  Skipping torn record at {path}:{lineno}")
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"⚠️  Skipping corrupt record at {path}:{lineno}")
+
+    def replay(self, start: str | None = None, end: str | None = None):
+        """Stream every record between two days (inclusive, YYYY-MM-DD)."""
+        for day in self.days():
+            if start and day < start:
+                continue
+            if end and day > end:
+                break
+            yield from self.read(day)
+
+
+# ─────────────────────────────────────────────
+# REPORT CLI
+# ─────────────────────────────────────────────
+if __name__ == "__main__":
+    journal = SignalJournal()
+    days    = sys.argv[1:] or journal.days()
+    for day in days:
+        records = list(journal.read(day))
+        print(f"\n📅 {day} – {len(records)} signal(s)")
+        print("─"*44)
+        for s in records:
+            print(f"  {s.get('timestamp', '')[11:19]}  {s.get('id', ''):<22} "
+                  f"{s.get('action', ''):<5} {s.get('pair', ''):<7} "
+                  f"entry {s.get('entry', '')}  tp {s.get('tp', '')}  sl {s.get('sl', '')}")
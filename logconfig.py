@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Logging
+logconfig.py
+
+Logging that never makes a sender wait for the disk. A log call only puts
+the record on a queue; one listener thread formats it and writes it:
+  • logs/tradel.log  – one JSON object per line, rotated by size (or by time)
+  • the console      – the usual readable lines
+
+    {"time": "2026-03-14T09:30:00.123", "level": "INFO", "logger": "tradel.fanout",
+     "message": "📣 Fan-out SIG… done in 2.1s …", "signal_id": "SIG…", "recipients": 5000, …}
+
+Anything passed as `extra={...}` becomes a field of its own, so the file
+can be searched with jq instead of grep. If the queue fills up (the disk
+is stuck) records are dropped and counted rather than blocking.
+
+Tune with environment variables:
+  TRADEL_LOG_LEVEL     INFO
+  TRADEL_LOG_FILE      logs/tradel.log   ("{pid}" is replaced, for one file per worker)
+  TRADEL_LOG_FORMAT    json              ("text" writes the console format to the file too)
+  TRADEL_LOG_MAX_MB    10                rotate at this size…
+  TRADEL_LOG_ROTATE    (unset)           …or at "midnight", "h", "d" etc. instead
+  TRADEL_LOG_BACKUPS   7                 rotated files to keep
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from datetime import datetime
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+QUEUE_SIZE  = 10_000       # records waiting for the listener before new ones are dropped
+
+# Attributes every LogRecord has; the rest came from `extra=`
+_RECORD_FIELDS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, then any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time":    datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level":   record.levelname,
+            "logger":  record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the record as it is – no formatting in the caller's thread –
+    and drops it if the listener has fallen QUEUE_SIZE records behind.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self):
+        # Wait for room: stopping on a full queue must still write out what is in it
+        self.queue.put(self._sentinel)
+
+
+# ─────────────────────────────────────────────
+# SETUP
+# ─────────────────────────────────────────────
+_pipeline = {}      # "handler", "listener" of this process
+
+
+def _file_handler() -> logging.Handler:
+    path    = os.environ.get("TRADEL_LOG_FILE", "logs/tradel.log").replace("{pid}", str(os.getpid()))
+    backups = int(os.environ.get("TRADEL_LOG_BACKUPS", "7"))
+    when    = os.environ.get("TRADEL_LOG_ROTATE")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups,
+                                                            encoding="utf-8")
+    else:
+        max_bytes = int(float(os.environ.get("TRADEL_LOG_MAX_MB", "10")) * 1024 * 1024)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                       encoding="utf-8")
+    if os.environ.get("TRADEL_LOG_FORMAT", "json") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def _start():
+    """A fresh queue, handlers and listener thread for this process."""
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    log_queue = queue.Queue(QUEUE_SIZE)
+    handler   = DroppingQueueHandler(log_queue)
+    listener  = _Listener(log_queue, _file_handler(), console, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger()
+    old  = _pipeline.get("handler")
+    if old is not None:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    _pipeline.update(handler=handler, listener=listener)
+
+
+def _restart_after_fork():
+    # The listener thread stays behind in the parent: a preloaded gunicorn
+    # worker needs its own, or its records would queue up unread
+    if _pipeline:
+        _pipeline.pop("listener", None)
+        _start()
+
+
+def setup_logging(level: str | None = None):
+    """Send all logging through the queue. Call once per process, before the bot starts."""
+    if _pipeline:
+        return
+    root = logging.getLogger()
+    root.setLevel(level or os.environ.get("TRADEL_LOG_LEVEL", "INFO").upper())
+    _start()
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out everything still queued and stop the listener thread."""
+    handler = _pipeline.get("handler")
+    if handler is not None and handler.dropped:
+        logging.getLogger("tradel").warning(f"⚠️  {handler.dropped} log record(s) dropped: queue full")
+    listener = _pipeline.pop("listener", None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def dropped() -> int:
+    handler = _pipeline.get("handler")
+    return handler.dropped if handler is not None else 0
+
+
+# ─────────────────────────────────────────────
+# SAMPLING
+# ─────────────────────────────────────────────
+class Sampler:
+    """
+    Lets through at most `burst` records per `key` every `interval` seconds
+    and counts the rest, so one cause failing for 5,000 recipients logs a
+    handful of lines. The next record let through carries the count as
+    "suppressed".
+
+        failures = Sampler()
+        failures.log(logger, logging.ERROR, "whatsapp", "❌ WhatsApp failed → %s: %s", name, error)
+    """
+
+    def __init__(self, burst: int = 5, interval: float = 10.0):
+        self.burst    = burst
+        self.interval = interval
+        self.lock     = threading.Lock()
+        self.windows  = {}           # key → [window start, logged, suppressed]
+
+    def log(self, logger: logging.Logger, level: int, key: str, msg: str, *args):
+        if not logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self.windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return
+            window[1] += 1
+        if suppressed:
+            logger.log(level, msg + " (+%d similar suppressed)", *args, suppressed,
+                       extra={"suppressed": suppressed})
+        else:
+            logger.log(level, msg, *args)
+
+
+# Per-recipient send failures, shared by the sync and async senders
+SEND_FAILURES = Sampler()
@@ -6,43 +6,23 @@ manage_payments.py
 Run daily:  python manage_payments.py
 """
 
-import json
 import csv
-import os
 import sys
 from datetime import datetime
 
-
-# ─────────────────────────────────────────────
-# FILE HELPERS
-# ─────────────────────────────────────────────
-USERS_FILE     = "data/users.json"
-PENDING_FILE   = "data/pending_payments.json"
-CONFIRMED_FILE = "data/confirmed_payments.json"
-EXPORT_FILE    = "tradel_subscribers.csv"
+from storage import get_storage
 
 
-def load_json(filepath: str, default=None):
-    if default is None:
-        default = []
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            return json.load(f)
-    return default
-
-
-def save_json(filepath: str, data):
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
+EXPORT_FILE    = "tradel_subscribers.csv"
 
 
 # ─────────────────────────────────────────────
 # DASHBOARD
 # ─────────────────────────────────────────────
 def payment_dashboard():
-    users     = load_json(USERS_FILE)
-    pending   = load_json(PENDING_FILE)
-    confirmed = load_json(CONFIRMED_FILE)
+    storage   = get_storage()
+    users     = storage.load_users()
+    confirmed = storage.confirmed_payments()
 
     now        = datetime.now()
     active     = [u for u in users if u["status"] == "active"]
@@ -156,8 +136,9 @@ def export_csv(users: list):
 # ACTIVATE USER (CLI)
 # ─────────────────────────────────────────────
 def activate_user_cli():
-    users = load_json(USERS_FILE)
-    pend  = [u for u in users if u["status"] == "pending"]
+    storage = get_storage()
+    users   = storage.load_users()
+    pend    = [u for u in users if u["status"] == "pending"]
 
     if not pend:
         print("No pending users to activate.")
@@ -174,27 +155,21 @@ def activate_user_cli():
     try:
         idx = int(choice) - 1
         if 0 <= idx < len(pend):
-            user_id = pend[idx]["id"]
             # Update status
             from datetime import timedelta
-            for u in users:
-                if u["id"] == user_id:
-                    u["status"] = "active"
-                    u["expiry"] = (datetime.now() + timedelta(days=30)).isoformat()
-                    break
-            save_json(USERS_FILE, users)
+            user = pend[idx]
+            user["status"] = "active"
+            user["expiry"] = (datetime.now() + timedelta(days=30)).isoformat()
+            storage.save_users([user])
             print(f"\n✅ Activated: {pend[idx]['name']} | Expires in 30 days")
 
             # Send welcome message via WhatsApp
             send_now = input("Send WhatsApp welcome message? (y/n): ").strip().lower()
             if send_now == "y":
                 try:
-                    from whatsapp import WhatsAppService
-                    for u in users:
-                        if u["id"] == user_id:
-                            WhatsAppService().send_welcome_message(u)
-                            print("📱 Welcome message sent!")
-                            break
+                    from clients import get_whatsapp_service
+                    get_whatsapp_service().send_welcome_message(user)
+                    print("📱 Welcome message sent!")
                 except Exception as e:
                     print(f"⚠️  Could not send WhatsApp: {e}")
         else:
@@ -208,7 +183,7 @@ def activate_user_cli():
 # ─────────────────────────────────────────────
 def send_reminders():
     try:
-        users = load_json(USERS_FILE)
+        users = get_storage().load_users()
         from alerts import AlertSystem
         reminded = AlertSystem().send_renewal_reminders(users)
         print(f"📨 Sent {reminded} renewal reminder(s).")
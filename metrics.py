@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Metrics
+metrics.py
+
+Counters, gauges and histograms for the signal and alert pipeline, served
+on /metrics in the Prometheus text format. Nothing to install and no
+server to run: `curl localhost:5000/metrics` shows everything.
+
+Cheap enough for every send. A counter or histogram keeps one cell per
+thread, and only that thread writes it, so recording takes no lock and
+threads never contend. A scrape adds the cells up; cells of threads that
+have finished are folded into a running total. Gauges are functions
+evaluated at scrape time, so keeping them current costs nothing.
+
+    SENT = REGISTRY.counter("tradel_x_total", "What it counts", ["provider"])
+    SENT.labels("whatsapp").inc()          # resolve labels once, outside loops
+
+With several gunicorn workers each process has its own numbers and a
+scrape sees the worker that answered it.
+"""
+
+import bisect
+import threading
+
+# Seconds; from a parse (tens of µs) to a full fan-out (minutes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FAST_BUCKETS    = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01)
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ─────────────────────────────────────────────
+# PER-THREAD CELLS
+# ─────────────────────────────────────────────
+class _Cells:
+    """`size` numbers per thread. A thread writes only its own cell; totals() adds them up."""
+
+    def __init__(self, size: int):
+        self.size    = size
+        self.local   = threading.local()
+        self.lock    = threading.Lock()
+        self.cells   = []                 # [(thread, cell)] of threads that have recorded
+        self.retired = [0] * size         # sums of cells whose thread has finished
+        self.prune_at = 64
+
+    def cell(self) -> list:
+        try:
+            return self.local.cell
+        except AttributeError:
+            pass
+        cell = self.local.cell = [0] * self.size
+        with self.lock:
+            self.cells.append((threading.current_thread(), cell))
+            if len(self.cells) >= self.prune_at:
+                # Servers start a thread per request: fold the finished ones away
+                self._prune()
+                self.prune_at = 2 * len(self.cells) + 64
+        return cell
+
+    def _prune(self):
+        live = []
+        for thread, cell in self.cells:
+            if thread.is_alive():
+                live.append((thread, cell))
+            else:
+                for i, value in enumerate(cell):
+                    self.retired[i] += value
+        self.cells = live
+
+    def totals(self) -> list:
+        with self.lock:
+            self._prune()
+            totals = list(self.retired)
+            for _, cell in self.cells:
+                for i, value in enumerate(cell):
+                    totals[i] += value
+        return totals
+
+
+# ─────────────────────────────────────────────
+# METRIC TYPES
+# ─────────────────────────────────────────────
+class CounterChild:
+
+    __slots__ = ("cells",)
+
+    def __init__(self):
+        self.cells = _Cells(1)
+
+    def inc(self, n: float = 1):
+        self.cells.cell()[0] += n
+
+    def value(self) -> float:
+        return self.cells.totals()[0]
+
+
+class HistogramChild:
+
+    __slots__ = ("bounds", "cells")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.cells  = _Cells(len(bounds) + 2)     # one per bucket, +Inf, then the sum
+
+    def observe(self, value: float):
+        cell = self.cells.cell()
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self) -> tuple:
+        """(cumulative bucket counts incl. +Inf, count, sum)."""
+        totals, running, buckets = self.cells.totals(), 0, []
+        for count in totals[:-1]:
+            running += count
+            buckets.append(running)
+        return buckets, running, totals[-1]
+
+
+class Metric:
+    """A named metric; with label names, one child per combination of label values."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames=(), make=None):
+        self.kind       = kind
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self.make       = make
+        self.children   = {}
+        self.lock       = threading.Lock()
+        if not self.labelnames:
+            self.children[()] = make()
+
+    def labels(self, *values, **named):
+        child = self.children.get(values)      # the usual call: string values seen before
+        if child is not None:
+            return child
+        key = values or tuple(named[n] for n in self.labelnames)
+        key = tuple(str(v) for v in key)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self.lock:
+                child = self.children.setdefault(key, self.make())
+        return child
+
+    # The unlabelled metric is its own child
+    def inc(self, n: float = 1):
+        self.children[()].inc(n)
+
+    def observe(self, value: float):
+        self.children[()].observe(value)
+
+    def _series(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def expose(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self.children.items()):
+            if self.kind == "histogram":
+                buckets, count, total = child.snapshot()
+                for bound, value in zip(list(child.bounds) + [float("inf")], buckets):
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{self._series(key, le)} {value}")
+                lines.append(f"{self.name}_sum{self._series(key)} {_number(float(total))}")
+                lines.append(f"{self.name}_count{self._series(key)} {count}")
+            else:
+                lines.append(f"{self.name}{self._series(key)} {_number(child.value())}")
+        return lines
+
+
+class Gauge:
+    """A value worked out at scrape time by `fn` (or set() for a plain number)."""
+
+    def __init__(self, name: str, help: str, fn=None):
+        self.name  = name
+        self.help  = help
+        self.fn    = fn
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def expose(self) -> list:
+        try:
+            value = self.fn() if self.fn is not None else self.value
+        except Exception:
+            return []             # e.g. storage unavailable: leave the series out of this scrape
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_number(value)}"]
+
+
+# ─────────────────────────────────────────────
+# REGISTRY
+# ─────────────────────────────────────────────
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock    = threading.Lock()
+
+    def _add(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Metric:
+        return self._add(Metric("counter", name, help, labelnames, CounterChild))
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets: tuple = LATENCY_BUCKETS) -> Metric:
+        return self._add(Metric("histogram", name, help, labelnames, lambda: HistogramChild(buckets)))
+
+    def gauge(self, name: str, help: str, fn=None) -> Gauge:
+        """Register (or replace – a new bot re-binds its gauges) a gauge."""
+        return self._add(Gauge(name, help, fn))
+
+    def expose(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ─────────────────────────────────────────────
+# PIPELINE METRICS
+# ─────────────────────────────────────────────
+WEBHOOK_SECONDS = REGISTRY.histogram(
+    "tradel_webhook_seconds", "Time to answer a WhatsApp webhook", ["result"])
+PARSE_SECONDS = REGISTRY.histogram(
+    "tradel_signal_parse_seconds", "Time to parse one incoming message", buckets=FAST_BUCKETS)
+SIGNALS = REGISTRY.counter(
+    "tradel_signals_total", "Incoming messages by outcome (signal_queued, duplicate, not_a_signal)", ["result"])
+SEND_SECONDS = REGISTRY.histogram(
+    "tradel_send_seconds", "Time of one provider request (a WhatsApp message or a push batch)", ["provider"])
+ALERTS = REGISTRY.counter(
+    "tradel_alerts_total", "Alerts by provider and result (push counts devices)", ["provider", "result"])
+THROTTLED = REGISTRY.counter(
+    "tradel_throttled_total", "Sends the provider refused with 429 and that were queued again", ["provider"])
+FANOUT_SECONDS = REGISTRY.histogram(
+    "tradel_fanout_seconds", "Time to send one signal to every recipient", ["engine"])
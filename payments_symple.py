@@ -8,10 +8,11 @@ HOW TO CONFIGURE:
   Then run:  python payments_simple.py
 """
 
-import json
-import os
 from datetime import datetime
 
+from ids import new_id
+from storage import get_storage
+
 
 # ─────────────────────────────────────────────────────────
 #  ⚠️  EDIT THIS SECTION WITH YOUR OWN BANK DETAILS  ⚠️
@@ -26,34 +27,19 @@ BANK_DETAILS = {
 # ─────────────────────────────────────────────────────────
 
 
-PENDING_FILE   = "data/pending_payments.json"
-CONFIRMED_FILE = "data/confirmed_payments.json"
-
-
-def _load_json(filepath: str) -> list:
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            return json.load(f)
-    return []
-
-
-def _save_json(filepath: str, data: list):
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 class ManualPaymentSystem:
 
-    def __init__(self):
+    def __init__(self, storage=None):
         self.bank_details = BANK_DETAILS.copy()
+        self.storage      = storage or get_storage()
 
     # ── Reference generator ───────────────────────────────
     def generate_reference(self, phone: str) -> str:
-        """Creates a unique payment reference, e.g. TRADEL03141502348012345678"""
-        timestamp = datetime.now().strftime("%m%d%H%M")
-        last4     = phone.strip()[-4:]
-        return f"TRADEL{timestamp}{last4}"
+        """
+        Creates a unique payment reference, e.g. TRADEL06GMN8RBQR01WV0000
+        (`phone` is no longer part of it – per-minute references collided).
+        """
+        return new_id("TRADEL")
 
     # ── Create pending payment record ─────────────────────
     def create_payment_record(self, user: dict) -> dict:
@@ -69,10 +55,7 @@ class ManualPaymentSystem:
             "bank_details": self.bank_details.copy()
         }
 
-        pending = _load_json(PENDING_FILE)
-        pending.append(payment)
-        _save_json(PENDING_FILE, pending)
-
+        self.storage.add_payment(payment)
         return payment
 
     # ── Formatted WhatsApp payment message ────────────────
@@ -112,30 +95,11 @@ class ManualPaymentSystem:
     # ── Mark payment as confirmed ─────────────────────────
     def confirm_payment(self, reference: str) -> bool:
         """Move a payment from pending to confirmed."""
-        pending = _load_json(PENDING_FILE)
-        found   = None
-
-        for p in pending:
-            if p["reference"] == reference:
-                found = p
-                break
-
+        found = self.storage.confirm_payment(reference, datetime.now().isoformat())
         if not found:
             print(f"⚠️  Reference {reference} not found in pending payments.")
             return False
 
-        found["status"]       = "confirmed"
-        found["confirmed_at"] = datetime.now().isoformat()
-
-        # Remove from pending
-        pending = [p for p in pending if p["reference"] != reference]
-        _save_json(PENDING_FILE, pending)
-
-        # Add to confirmed
-        confirmed = _load_json(CONFIRMED_FILE)
-        confirmed.append(found)
-        _save_json(CONFIRMED_FILE, confirmed)
-
         print(f"✅ Payment confirmed: {reference}")
         return True
 
@@ -161,7 +125,7 @@ class ManualPaymentSystem:
 
     # ── List all pending payments ─────────────────────────
     def list_pending(self):
-        pending = _load_json(PENDING_FILE)
+        pending = self.storage.pending_payments()
         if not pending:
             print("✅ No pending payments.")
             return
@@ -195,7 +159,7 @@ if __name__ == "__main__":
     if choice == "1":
         name  = input("Customer name: ").strip()
         phone = input("Customer phone (e.g. 08012345678): ").strip()
-        uid   = "TR" + datetime.now().strftime("%Y%m%d%H%M%S")
+        uid   = new_id("TR")
         user  = {"id": uid, "name": name, "phone": phone}
         pms.print_payment_message(user)
 
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Coalesced Persistence
+persistence.py
+
+Changes to users are marked dirty in memory and written together once per
+window (default 2 seconds) instead of one full save per change. A burst of
+signals, activations and counter bumps becomes a single write. Pending
+changes are flushed on shutdown.
+
+Writes are serialised (one flush at a time) and, given a `snapshot`
+function such as UserRepository.snapshot, save copies of the users taken
+under the repository's read lock rather than the live dicts.
+"""
+
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger("tradel.persistence")
+
+
+class PersistenceManager:
+
+    def __init__(self, storage, window: float = 2.0, snapshot=None):
+        self.storage     = storage
+        self.window      = window
+        self.snapshot    = snapshot
+        self.lock        = threading.Lock()     # guards dirty / timer
+        self.write_lock  = threading.Lock()     # one writer at a time
+        self.dirty       = {}                   # id → user
+        self.timer       = None
+        self.writes      = 0
+        self.closed      = False
+        atexit.register(self.close)
+
+    def mark_dirty(self, users):
+        """Schedule `users` to be saved within the coalescing window."""
+        with self.lock:
+            for user in users:
+                self.dirty[user["id"]] = user
+            if not self.dirty or self.timer is not None:
+                return
+            if self.closed or self.window <= 0:
+                schedule = False
+            else:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.name   = "tradel-persist"
+                self.timer.daemon = True
+                self.timer.start()
+                schedule = True
+        if not schedule:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending change now. Returns how many users were saved."""
+        with self.write_lock:
+            with self.lock:
+                batch, self.dirty = list(self.dirty.values()), {}
+                if self.timer is not None and self.timer is not threading.current_thread():
+                    self.timer.cancel()
+                self.timer = None
+            if not batch:
+                return 0
+            try:
+                self.storage.save_users(self.snapshot(batch) if self.snapshot else batch)
+                self.writes += 1
+            except Exception as e:
+                logger.error(f"❌ Saving {len(batch)} user(s) failed, will retry: {e}")
+                with self.lock:
+                    for user in batch:
+                        self.dirty.setdefault(user["id"], user)
+                if not self.closed:
+                    self.mark_dirty([])
+                return 0
+            return len(batch)
+
+    def is_pending(self, user_id: str) -> bool:
+        """True if the user has changes not yet written."""
+        with self.lock:
+            return user_id in self.dirty
+
+    def pending(self) -> int:
+        with self.lock:
+            return len(self.dirty)
+
+    def close(self):
+        """Flush what is pending and stop scheduling new writes."""
+        self.closed = True
+        saved = self.flush()
+        if saved:
+            logger.info(f"💾 Flushed {saved} user(s) on shutdown")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Outbound Rate Limiting
+ratelimit.py
+
+One token bucket per provider ("whatsapp", "push") and optionally one per
+sender number, so a fan-out never sends faster than Twilio or OneSignal
+allow. The buckets adapt: a 429 halves the bucket's rate and pauses it
+(for Retry-After seconds when the provider says, otherwise an
+exponential backoff), and successes win the rate back a little at a time.
+
+A send that gets a 429 is not dropped. The sender raises Throttled, and
+the fan-out puts the message back in the bucket's queue, so it goes out
+after the pause.
+
+    limits  = RateLimits({"whatsapp": 50}, senders={"whatsapp:+14155238886": 20})
+    limiter = limits.limiter("whatsapp", "whatsapp:+14155238886")
+    if limiter.acquire(deadline):       # blocks until a token is free
+        ...send...                      # then limiter.succeeded() or limiter.throttled(retry_after)
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger("tradel.ratelimit")
+
+
+MIN_RATE_FRACTION = 0.1    # a throttled bucket never drops below 10% of its rate
+RECOVERY_FRACTION = 0.05   # successes win back 5% of the configured rate per second
+BACKOFF_START     = 0.5    # seconds paused after a 429 without Retry-After…
+BACKOFF_MAX       = 30.0   # …doubling per consecutive 429, up to this
+
+
+class Throttled(Exception):
+    """The provider answered 429. Send again after `retry_after` seconds (None = unknown)."""
+
+    def __init__(self, provider: str, retry_after: float | None = None, detail: str = ""):
+        self.provider    = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} rate limited (retry after {retry_after}s) {detail}".strip())
+
+
+def parse_retry_after(value) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ─────────────────────────────────────────────
+# TOKEN BUCKET
+# ─────────────────────────────────────────────
+class TokenBucket:
+    """
+    Holds up to `burst` tokens, refilled at `rate` per second (0 = no limit,
+    but 429 pauses still apply). Callers reserve a token under the lock
+    and wait outside it, in the order they reserved.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.max_rate = rate
+        self.rate     = rate
+        self.burst    = max(1.0, burst)
+        self.tat      = 0.0        # when the bucket will be full again
+        self.paused   = 0.0        # no tokens before this time
+        self.strikes  = 0          # consecutive 429s
+        self.waits    = 0          # callers that had to wait
+        self.lock     = threading.Lock()
+
+    def reserve(self, deadline: float | None = None) -> float | None:
+        """Take a token. Returns the seconds to wait before using it, or None if that passes `deadline`."""
+        with self.lock:
+            now  = time.monotonic()
+            slot = max(now, self.paused)
+            if self.rate:
+                interval = 1.0 / self.rate
+                slot = max(slot, self.tat - (self.burst - 1) * interval)
+            if deadline is not None and slot > deadline:
+                return None
+            if self.rate:
+                self.tat = max(self.tat, slot) + interval
+            if slot > now:
+                self.waits += 1
+            return slot - now
+
+    def throttled(self, retry_after: float | None = None) -> float:
+        """The provider refused a send: slow down and pause. Returns the pause in seconds."""
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused:
+                # Sent before the pause began – same incident, don't slow down twice
+                return self.paused - now
+            self.strikes += 1
+            if self.max_rate:
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            if retry_after is None:
+                retry_after = min(BACKOFF_MAX, BACKOFF_START * 2 ** (self.strikes - 1))
+                retry_after *= random.uniform(0.8, 1.2)
+            self.paused = now + retry_after
+            return retry_after
+
+    def succeeded(self):
+        if not self.strikes and self.rate == self.max_rate:
+            return
+        with self.lock:
+            self.strikes = 0
+            if self.max_rate:
+                # `rate` successes a second add RECOVERY_FRACTION of max_rate a second
+                step = self.max_rate * RECOVERY_FRACTION / self.rate
+                self.rate = min(self.max_rate, self.rate + step)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "rate":     round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "paused":   round(max(0.0, self.paused - time.monotonic()), 3),
+                "strikes":  self.strikes,
+                "waits":    self.waits
+            }
+
+
+# ─────────────────────────────────────────────
+# PROVIDER + SENDER BUCKETS
+# ─────────────────────────────────────────────
+class Limiter:
+    """The buckets one send must pass: its provider's and, if configured, its sender's."""
+
+    def __init__(self, name: str, buckets: list):
+        self.name    = name
+        self.buckets = buckets
+
+    def reserve(self, deadline: float | None = None) -> float | None:
+        delay = 0.0
+        for bucket in self.buckets:
+            wait = bucket.reserve(deadline)
+            if wait is None:
+                return None
+            delay = max(delay, wait)
+        return delay
+
+    def paused(self) -> bool:
+        now = time.monotonic()
+        return any(bucket.paused > now for bucket in self.buckets)
+
+    def acquire(self, deadline: float | None = None) -> bool:
+        """Block until a send is allowed. Returns False if it would pass the deadline."""
+        while True:
+            delay = self.reserve(deadline)
+            if delay is None:
+                return False
+            if delay > 0:
+                time.sleep(delay)
+            # A 429 while we waited paused the bucket: queue again behind the pause
+            if not self.paused():
+                return True
+
+    async def acquire_async(self, deadline: float | None = None) -> bool:
+        while True:
+            delay = self.reserve(deadline)
+            if delay is None:
+                return False
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.paused():
+                return True
+
+    def throttled(self, retry_after: float | None = None):
+        pause = max(bucket.throttled(retry_after) for bucket in self.buckets)
+        logger.warning(f"🐢 {self.name} rate limited – pausing {pause:.1f}s and slowing down")
+
+    def succeeded(self):
+        for bucket in self.buckets:
+            bucket.succeeded()
+
+
+class RateLimits:
+    """
+    rates:   {"whatsapp": 50, "push": 50}        sends per second per provider
+    senders: {"whatsapp:+14155238886": 20}       sends per second per sender number
+    burst:   tokens a provider bucket can save up (1 = evenly spaced sends)
+    """
+
+    def __init__(self, rates: dict, senders: dict | None = None, burst: float = 1):
+        self.providers = {name: TokenBucket(rate, burst) for name, rate in rates.items()}
+        self.senders   = {sender: TokenBucket(rate) for sender, rate in (senders or {}).items()}
+
+    def limiter(self, provider: str, sender: str | None = None) -> Limiter:
+        bucket = self.providers.get(provider)
+        if bucket is None:
+            bucket = self.providers[provider] = TokenBucket(0)
+        buckets = [bucket]
+        if sender in self.senders:
+            buckets.append(self.senders[sender])
+        return Limiter(provider if sender is None else f"{provider} {sender}", buckets)
+
+    def stats(self) -> dict:
+        return {
+            "providers": {name: b.stats() for name, b in self.providers.items()},
+            "senders":   {name: b.stats() for name, b in self.senders.items()}
+        }
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Alert Retry Queue
+retry_queue.py
+
+Alerts that failed during a fan-out are not lost. trigger_alerts records
+one entry per (signal, user, channel) in the storage backend. A separate
+thread sends them again with exponential backoff and jitter, and only
+while no new signal is being dispatched, so retries never delay a fresh
+signal. After `max_attempts` an entry moves to the dead letters, where it
+stays until someone replays it.
+
+In cluster mode only the process holding the scheduler lock sends
+retries; every process can add them.
+
+List or replay dead letters:
+    python retry_queue.py                 # queue depth and dead letters
+    python retry_queue.py replay          # send every dead letter again
+    python retry_queue.py replay RTY-…    # only these
+"""
+
+import sys
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+
+from ids import new_id
+
+logger = logging.getLogger("tradel.retry")
+
+
+MAX_ATTEMPTS = 5         # sends per alert, counting the first one
+BASE_DELAY   = 30.0      # seconds before the first retry, doubled each time…
+MAX_DELAY    = 1800.0    # …up to this
+INTERVAL     = 5.0       # seconds between checks for due retries
+BATCH_SIZE   = 200       # entries handled per check
+
+
+def backoff(attempts: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """Delay after the `attempts`-th failed send: exponential, with half of it random."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryQueue:
+    """
+    deliver(signal, entries) sends one signal again to the entries' users
+    and returns {entry_id: (status, error)}; status is "sent", "dropped"
+    (user no longer active, don't retry) or "failed".
+    """
+
+    def __init__(self, storage, deliver, max_attempts: int = MAX_ATTEMPTS,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 interval: float = INTERVAL, batch_size: int = BATCH_SIZE,
+                 busy=None, leader=None):
+        self.storage      = storage
+        self.deliver      = deliver
+        self.max_attempts = max_attempts
+        self.base_delay   = base_delay
+        self.max_delay    = max_delay
+        self.interval     = interval
+        self.batch_size   = batch_size
+        self.busy         = busy or (lambda: False)      # True while new signals are being sent
+        self.leader       = leader or (lambda: True)     # False if another process sends retries
+        self.lock         = threading.Lock()
+        self.stopped      = threading.Event()
+        self.thread       = None
+        self.counts       = {"queued": 0, "retried": 0, "delivered": 0, "dropped": 0, "dead": 0}
+
+    @classmethod
+    def from_config(cls, config: dict, storage, deliver, **kwargs):
+        return cls(
+            storage, deliver,
+            max_attempts=config.get("retry_max_attempts", MAX_ATTEMPTS),
+            base_delay=config.get("retry_base_delay", BASE_DELAY),
+            max_delay=config.get("retry_max_delay", MAX_DELAY),
+            **kwargs
+        )
+
+    def _count(self, key: str, n: int = 1):
+        with self.lock:
+            self.counts[key] += n
+
+    # ── Producer side ──────────────────────────────────────
+    def record(self, signal: dict, failures: list) -> int:
+        """
+        Queue failed deliveries of `signal`. `failures` holds dicts with
+        user_id, channel ("whatsapp" or "push"), error and counted (whether
+        alerts_received was already bumped for this user).
+        """
+        if not failures:
+            return 0
+        now     = time.time()
+        entries = [{
+            "id":         new_id("RTY"),
+            "signal":     signal,
+            "user_id":    f["user_id"],
+            "channel":    f["channel"],
+            "counted":    f.get("counted", False),
+            "attempts":   1,
+            "created_at": now,
+            "next_at":    now + backoff(1, self.base_delay, self.max_delay),
+            "last_error": f.get("error")
+        } for f in failures]
+        self.storage.save_retries(entries)
+        self._count("queued", len(entries))
+        logger.info(f"🔁 {len(entries)} failed alert(s) of {signal.get('id')} queued for retry")
+        return len(entries)
+
+    # ── Consumer side ──────────────────────────────────────
+    def run_due(self, now: float | None = None) -> dict:
+        """Send every retry that is due (up to batch_size). Returns counts for this round."""
+        now    = time.time() if now is None else now
+        due    = self.storage.due_retries(now, self.batch_size)
+        result = {"retried": len(due), "delivered": 0, "dropped": 0, "rescheduled": 0, "dead": 0}
+        if not due:
+            return result
+
+        by_signal = {}
+        for entry in due:
+            by_signal.setdefault(entry["signal"].get("id"), []).append(entry)
+
+        done, reschedule, dead = [], [], []
+        for entries in by_signal.values():
+            if self.busy():
+                # A new signal arrived: leave the rest as they are for the next round
+                result["retried"] -= len(entries)
+                continue
+            try:
+                outcomes = self.deliver(entries[0]["signal"], entries)
+            except Exception as e:
+                logger.error(f"❌ Retry of {entries[0]['signal'].get('id')} failed: {e}")
+                outcomes = {}
+            for entry in entries:
+                status, error = outcomes.get(entry["id"], ("failed", "not attempted"))
+                if status in ("sent", "dropped"):
+                    done.append(entry["id"])
+                    result["delivered" if status == "sent" else "dropped"] += 1
+                    continue
+                entry["attempts"]  += 1
+                entry["last_error"] = error
+                if entry["attempts"] >= self.max_attempts:
+                    entry["failed_at"] = time.time()
+                    dead.append(entry)
+                else:
+                    entry["next_at"] = time.time() + backoff(entry["attempts"], self.base_delay,
+                                                             self.max_delay)
+                    reschedule.append(entry)
+
+        if reschedule:
+            self.storage.save_retries(reschedule)
+        if dead:
+            self.storage.add_dead_letters(dead)
+            for entry in dead:
+                logger.error(f"☠️  Gave up on {entry['channel']} alert {entry['signal'].get('id')} → "
+                             f"{entry['user_id']} after {entry['attempts']} attempts: {entry['last_error']}")
+        if done or dead:
+            self.storage.delete_retries(done + [e["id"] for e in dead])
+
+        result["rescheduled"] = len(reschedule)
+        result["dead"]        = len(dead)
+        for key in ("retried", "delivered", "dropped", "dead"):
+            self._count(key, result[key])
+        logger.info(f"🔁 Retry round: {result}")
+        return result
+
+    def replay(self, entry_ids: list | None = None) -> int:
+        """Move dead letters (all, or just `entry_ids`) back into the queue, due now."""
+        dead = self.storage.dead_letters()
+        if entry_ids:
+            wanted = set(entry_ids)
+            dead   = [e for e in dead if e["id"] in wanted]
+        if not dead:
+            return 0
+        now = time.time()
+        for entry in dead:
+            entry.pop("failed_at", None)
+            entry["attempts"] = 0          # the full retry policy applies again
+            entry["next_at"]  = now
+        self.storage.save_retries(dead)
+        self.storage.delete_dead_letters([e["id"] for e in dead])
+        logger.info(f"♻️  Replaying {len(dead)} dead letter(s)")
+        return len(dead)
+
+    # ── Background thread ──────────────────────────────────
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name="tradel-retry")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            if self.busy() or not self.leader():
+                continue
+            try:
+                while self.run_due()["retried"] >= self.batch_size and not self.busy():
+                    pass
+            except Exception as e:
+                logger.error(f"❌ Retry loop error: {e}")
+
+    # ── Metrics ────────────────────────────────────────────
+    def stats(self) -> dict:
+        stored = self.storage.retry_stats()
+        now    = time.time()
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            "depth":       stored["depth"],
+            "oldest_age":  round(now - stored["oldest"], 3) if stored["oldest"] else 0.0,
+            "next_due_in": round(max(0.0, stored["next_at"] - now), 3) if stored["next_at"] else None,
+            **counts
+        }
+
+
+# ─────────────────────────────────────────────
+# COMMAND LINE
+# ─────────────────────────────────────────────
+def _print_dead_letters(storage):
+    dead = storage.dead_letters()
+    print(f"☠️  {len(dead)} dead letter(s)")
+    for entry in dead:
+        failed = datetime.fromtimestamp(entry.get("failed_at") or 0).strftime("%Y-%m-%d %H:%M")
+        print(f"  {entry['id']}  {failed}  {entry['channel']:<8} {entry['signal'].get('id')} → "
+              f"{entry['user_id']}  ({entry['attempts']} attempts: {entry['last_error']})")
+
+
+if __name__ == "__main__":
+    from storage import get_storage
+    storage = get_storage()
+    queue   = RetryQueue(storage, deliver=None)
+
+    if sys.argv[1:2] == ["replay"]:
+        n = queue.replay(sys.argv[2:] or None)
+        print(f"✅ {n} dead letter(s) queued again – the running bot sends them within "
+              f"{INTERVAL:.0f}s")
+    elif not sys.argv[1:]:
+        stats = queue.stats()
+        print(f"🔁 {stats['depth']} alert(s) waiting for retry (oldest {stats['oldest_age']:.0f}s)")
+        _print_dead_letters(storage)
+    else:
+        print("Usage: python retry_queue.py [replay [ID ...]]")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Expiry Scheduler
+scheduler.py
+
+Min-heap of (expiry timestamp, user id) for active subscriptions. The
+background loop sleeps until the earliest expiry, then pops only the users
+that are due, instead of waking every check_interval to parse every
+user's expiry string.
+
+Reschedules and cancellations are lazy: the heap keeps the old entry and
+it is skipped when it surfaces, so both are O(log n) at most.
+"""
+
+import heapq
+import time
+import threading
+
+
+class ExpiryScheduler:
+
+    def __init__(self):
+        self.heap    = []          # [(expiry_ts, user_id)]
+        self.current = {}          # user_id → expiry_ts it is scheduled for
+        self.cond    = threading.Condition()
+
+    def __len__(self):
+        return len(self.current)
+
+    def schedule(self, user_id: str, expiry_ts: float):
+        with self.cond:
+            if self.current.get(user_id) == expiry_ts:
+                return
+            self.current[user_id] = expiry_ts
+            heapq.heappush(self.heap, (expiry_ts, user_id))
+            if self.heap[0] == (expiry_ts, user_id):
+                self.cond.notify_all()     # new earliest expiry – wake the sleeper
+            self._compact()
+
+    def cancel(self, user_id: str):
+        with self.cond:
+            self.current.pop(user_id, None)
+            self._compact()
+
+    def _compact(self):
+        # Rebuild once stale entries outnumber live ones
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.current):
+            self.heap = [(ts, uid) for uid, ts in self.current.items()]
+            heapq.heapify(self.heap)
+
+    def _drop_stale(self):
+        while self.heap and self.current.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def next_due(self) -> float | None:
+        with self.cond:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: float | None = None) -> list:
+        """Remove and return the ids of users whose expiry is before `now`."""
+        now = time.time() if now is None else now
+        due = []
+        with self.cond:
+            while True:
+                self._drop_stale()
+                if not self.heap or self.heap[0][0] >= now:
+                    break
+                _, user_id = heapq.heappop(self.heap)
+                del self.current[user_id]
+                due.append(user_id)
+        return due
+
+    def wait(self, max_sleep: float | None = None):
+        """
+        Sleep until the earliest expiry, a new earlier expiry is scheduled,
+        `max_sleep` seconds pass or wake() is called.
+        """
+        with self.cond:
+            self._drop_stale()
+            timeout = max_sleep
+            if self.heap:
+                until_due = max(0.0, self.heap[0][0] - time.time())
+                timeout   = until_due if timeout is None else min(timeout, until_due)
+            if timeout is None or timeout > 0:
+                self.cond.wait(timeout)
+
+    def wake(self):
+        with self.cond:
+            self.cond.notify_all()
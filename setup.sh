@@ -35,9 +35,9 @@ python3 -m venv venv
 source venv/bin/activate
 
 # ── 5. Install Python packages ────────────────
-echo "▶ Installing Flask, Twilio, Requests..."
+echo "▶ Installing Flask, Twilio, Requests, Gunicorn..."
 pip install --upgrade pip
-pip install flask twilio requests
+pip install flask twilio requests gunicorn
 
 # ── 6. Create data directories ────────────────
 echo "▶ Creating data directories..."
@@ -60,8 +60,9 @@ echo "╚═══════════════════════
 echo ""
 echo "NEXT STEPS:"
 echo ""
-echo "  1. Upload your 5 Python files to /root/tradel/"
-echo "     (app.py, whatsapp.py, alerts.py, payments_simple.py, manage_payments.py)"
+echo "  1. Upload the whole bot folder to /root/tradel/ – every .py file,"
+echo "     including gunicorn.conf.py and wsgi.py (from your computer):"
+echo "     scp -r tradel-bot/* root@$(curl -s ifconfig.me):/root/tradel/"
 echo ""
 echo "  2. Set your Twilio credentials:"
 echo "     export TWILIO_SID='your_account_sid'"
@@ -73,8 +74,9 @@ echo "  4. Start the bot:"
 echo "     screen -S tradel-bot"
 echo "     cd /root/tradel"
 echo "     source venv/bin/activate"
-echo "     python app.py"
+echo "     gunicorn -c gunicorn.conf.py wsgi:app"
 echo "     [Press Ctrl+A then D to detach]"
+echo "     (TRADEL_WORKERS above 1 needs \"storage\": \"sqlite\" in config.json)"
 echo ""
 echo "  5. In Twilio Console, set webhook URL to:"
 echo "     http://$(curl -s ifconfig.me):5000/webhook/whatsapp"
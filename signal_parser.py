@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Compiled Signal Parser
+signal_parser.py
+
+Classifies and extracts trading signals with regexes compiled once at
+import. One scan of the upper-cased message finds every keyword and pair
+(a slower overlapping scan runs only when a match actually hides
+another, e.g. the LONG in "SOLONG"); signals then need one more scan for the
+ENTRY/TP/SL values. parse() does both for the
+webhook, so a message is upper-cased and scanned once instead of once per
+keyword. Results match the original substring-based is_trading_signal /
+extract_signal exactly.
+"""
+
+import re
+from datetime import datetime
+
+
+SIGNAL_KEYWORDS = ["BUY", "SELL", "LONG", "SHORT", "TP:", "SL:", "ENTRY", "SIGNAL"]
+TRADING_PAIRS   = ["BTC", "ETH", "XRP", "SOL", "ADA", "BNB",
+                   "USD", "EUR", "GBP", "JPY", "XAUUSD", "GOLD"]
+VALUE_LABELS    = ["ENTRY", "TP", "SL"]
+
+BUY_WORDS  = ("BUY", "LONG")
+SELL_WORDS = ("SELL", "SHORT")
+
+
+class SignalParser:
+
+    def __init__(self, keywords: list = SIGNAL_KEYWORDS, pairs: list = TRADING_PAIRS,
+                 labels: list = VALUE_LABELS):
+        self.keywords  = list(keywords)
+        self.pairs     = list(pairs)
+        self.pair_rank = {p: i for i, p in enumerate(self.pairs)}   # first listed pair wins
+
+        tokens      = sorted(set(self.keywords) | set(self.pairs), key=len, reverse=True)
+        alternation = "|".join(re.escape(t) for t in tokens)   # longest first
+        self.scan     = re.compile(alternation)
+        # Zero-width lookahead variant that also reports overlapping matches
+        self.scan_all = re.compile(f"(?=({alternation}))")
+        # Tokens inside a longer token (USD in XAUUSD) are never reported
+        # separately by a scan; add them back from the longer one.
+        self.contains = {}
+        for t in tokens:
+            inner = [o for o in tokens if o != t and o in t]
+            if inner:
+                self.contains[t] = inner
+        # A token whose tail starts another token (SOL + LONG → "SOLONG") hides
+        # that token from the fast scan. Keep the merged spellings per token;
+        # only when one of them occurs is the slow overlapping scan needed.
+        self.overlaps = {}
+        for t in tokens:
+            merged = tuple(t + o[len(t) - k:]
+                           for k in range(1, len(t)) for o in tokens
+                           if o.startswith(t[k:]) and len(o) > len(t) - k)
+            if merged:
+                self.overlaps[t] = merged
+        self.digit  = re.compile(r"\d")
+        self.values = re.compile(
+            "(" + "|".join(re.escape(label) for label in labels) + r")[:\s]+([0-9]+\.?[0-9]*)"
+        )
+        self.keyword_set = frozenset(self.keywords)
+        self.pair_set    = frozenset(self.pairs)
+
+    # ── Scanning ───────────────────────────────────────────
+    def _tokens(self, upper: str) -> set:
+        """Every keyword and pair that occurs in the upper-cased text."""
+        found = set(self.scan.findall(upper))
+        for token in self.overlaps.keys() & found:
+            if any(m in upper for m in self.overlaps[token]):
+                found.update(self.scan_all.findall(upper))
+                break
+        for token in self.contains.keys() & found:
+            found.update(self.contains[token])
+        return found
+
+    def _classify(self, upper: str, found: set) -> bool:
+        if found.isdisjoint(self.keyword_set):
+            return False
+        # digits are unchanged by upper(), so searching `upper` equals searching the text
+        return not found.isdisjoint(self.pair_set) or self.digit.search(upper) is not None
+
+    def is_signal(self, text: str) -> bool:
+        if not text:
+            return False
+        upper = text.upper()
+        return self._classify(upper, self._tokens(upper))
+
+    def _extract(self, text: str, upper: str, found: set) -> dict:
+        action = ""
+        if any(w in found for w in BUY_WORDS):
+            action = "BUY"
+        elif any(w in found for w in SELL_WORDS):
+            action = "SELL"
+
+        pairs = found & self.pair_set
+        pair  = min(pairs, key=self.pair_rank.__getitem__) if pairs else ""
+
+        values = {}
+        for label, value in self.values.findall(upper):
+            values.setdefault(label, value)
+
+        priority = "high" if action in ("BUY", "SELL") else "medium"
+
+        return {
+            "message": text,
+            "source":  "whatsapp",
+            "pair":    pair,
+            "action":  action,
+            "entry":   values.get("ENTRY", "N/A"),
+            "tp":      values.get("TP", "N/A"),
+            "sl":      values.get("SL", "N/A"),
+            "priority": priority,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def extract(self, text: str) -> dict:
+        upper = text.upper()
+        return self._extract(text, upper, self._tokens(upper))
+
+    def parse(self, text: str) -> dict | None:
+        """Classify and extract in one scan. Returns the signal dict, or None if not a signal."""
+        if not text:
+            return None
+        upper = text.upper()
+        found = self._tokens(upper)
+        if not self._classify(upper, found):
+            return None
+        return self._extract(text, upper, found)
+
+
+default_parser = SignalParser()
+
+is_trading_signal = default_parser.is_signal
+extract_signal    = default_parser.extract
+parse_signal      = default_parser.parse
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Durable Signal Queue
+signal_queue.py
+
+The webhook only has to parse a message and drop it here; dispatcher
+threads send the alerts afterwards. Every queued signal is written to its
+own file under data/queue/ until it has been handled, so signals that were
+waiting when the bot stopped are picked up again on the next start.
+
+Several processes can share the directory: file names end in the pid of
+the process that owns them, and a process only recovers files whose owner
+is gone, claiming each with an atomic rename so exactly one process
+replays it.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger("tradel.queue")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SignalQueue:
+
+    def __init__(self, handler, directory: str = "data/queue", workers: int = 2):
+        self.handler   = handler
+        self.directory = directory
+        self.workers   = workers
+        self.queue     = queue.Queue()
+        self.threads   = []
+        self.running   = False
+        self.lock      = threading.Lock()
+        self.in_flight = 0
+        self.processed = 0
+        self.failed    = 0
+        self.last_lag  = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+        self.recover()
+
+    # ── Producer side ──────────────────────────────────────
+    def enqueue(self, item: dict) -> str:
+        """Persist `item` and hand it to a dispatcher. Returns the queue file path."""
+        enqueued_at = time.time()
+        name = f"{time.time_ns():020d}-{item.get('id', 'item')}.{os.getpid()}.json"
+        path = os.path.join(self.directory, name)
+        tmp  = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"enqueued_at": enqueued_at, "item": item}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.queue.put((enqueued_at, path))
+        return path
+
+    def recover(self) -> int:
+        """Re-queue signals left on disk by a previous run, oldest first."""
+        recovered = 0
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                owner = name[:-len(".json.tmp")].rpartition(".")[2]
+                if not (owner.isdigit() and int(owner) != os.getpid() and _alive(int(owner))):
+                    os.remove(path)      # never fully written – the webhook did not return 200
+                continue
+            path = self._claim(name)
+            if path is None:
+                continue
+            try:
+                with open(path, "r") as f:
+                    enqueued_at = json.load(f)["enqueued_at"]
+            except (ValueError, KeyError, OSError) as e:
+                logger.error(f"❌ Unreadable queue file {name}: {e}")
+                continue
+            self.queue.put((enqueued_at, path))
+            recovered += 1
+        if recovered:
+            logger.info(f"♻️  Recovered {recovered} queued signal(s) from disk")
+        return recovered
+
+    def _claim(self, name: str) -> str | None:
+        """Take over a queue file whose owner has stopped. Returns its new path."""
+        stem, _, owner = name[:-len(".json")].rpartition(".")
+        if not stem:                  # written before files carried an owner
+            stem, owner = owner, ""
+        if owner.isdigit() and int(owner) != os.getpid() and _alive(int(owner)):
+            return None               # another running process is handling it
+        path = os.path.join(self.directory, f"{stem}.{os.getpid()}.json")
+        try:
+            os.rename(os.path.join(self.directory, name), path)
+        except FileNotFoundError:
+            return None               # another process claimed it first
+        return path
+
+    # ── Dispatcher side ────────────────────────────────────
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"tradel-dispatch-{i}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"🔄 Signal queue started ({self.workers} dispatcher(s))")
+
+    def stop(self, timeout: float | None = None):
+        """Let dispatchers finish what is queued, then stop them – within `timeout` in all."""
+        if not self.running:
+            return
+        for _ in self.threads:
+            self.queue.put(None)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()) if deadline is not None else None)
+        self.threads = []
+        self.running = False
+
+    def _worker(self):
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                break
+            enqueued_at, path = entry
+            with self.lock:
+                self.in_flight += 1
+                self.last_lag   = time.time() - enqueued_at
+            try:
+                with open(path, "r") as f:
+                    item = json.load(f)["item"]
+                self.handler(item)
+                with self.lock:
+                    self.processed += 1
+            except Exception as e:
+                logger.error(f"❌ Dispatch failed for {os.path.basename(path)}: {e}")
+                with self.lock:
+                    self.failed += 1
+            finally:
+                # Handled (or failed for good) – drop it so it is not replayed
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                with self.lock:
+                    self.in_flight -= 1
+
+    # ── Metrics ────────────────────────────────────────────
+    def busy(self) -> bool:
+        """True while signals are queued or being sent."""
+        return self.in_flight > 0 or not self.queue.empty()
+
+    def stats(self) -> dict:
+        with self.queue.mutex:
+            depth  = len(self.queue.queue)
+            oldest = next((e[0] for e in self.queue.queue if e is not None), None)
+        with self.lock:
+            return {
+                "depth":      depth,
+                "in_flight":  self.in_flight,
+                "processed":  self.processed,
+                "failed":     self.failed,
+                "oldest_age": round(time.time() - oldest, 3) if oldest else 0.0,
+                "last_lag":   round(self.last_lag, 3)
+            }
@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Storage Backends
+storage.py
+
+One interface for users, payments, signals, alert retries, seen-signal
+keys (see dedup.py) and daily counts (see counters.py), with two backends:
+  • json   – the original files in data/ plus the signal journal (default)
+  • sqlite – data/tradel.db in WAL mode; every change touches only its rows
+
+Pick the backend with the "storage" key in config.json or the
+TRADEL_STORAGE environment variable ("json" or "sqlite"). Only sqlite is
+`shared`: several bot processes can use it at once (see cluster.py).
+
+Move existing JSON data into SQLite (one-off):
+    python storage.py migrate
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+import threading
+
+from journal import SignalJournal
+from users import normalise_phone, expiry_timestamp
+
+logger = logging.getLogger("tradel.storage")
+
+
+USERS_FILE     = "data/users.json"
+PENDING_FILE   = "data/pending_payments.json"
+CONFIRMED_FILE = "data/confirmed_payments.json"
+RETRIES_FILE   = "data/retries.json"
+DEAD_FILE      = "data/dead_letters.json"
+DEDUP_FILE     = "data/dedup.jsonl"
+DAILY_FILE     = "data/daily_counts.json"
+SIGNALS_DIR    = "signals"
+DB_FILE        = "data/tradel.db"
+
+# Fields only ever changed by adding to them; a shared store keeps its own
+# value on save_users so one process cannot overwrite another's increments.
+COUNTER_FIELDS = ("alerts_received",)
+
+
+# ─────────────────────────────────────────────
+# JSON BACKEND
+# ─────────────────────────────────────────────
+class JsonStorage:
+    """The original file layout. Whole files are rewritten (atomically) on every change."""
+
+    name   = "json"
+    shared = False
+
+    def __init__(self, users_file: str = USERS_FILE, pending_file: str = PENDING_FILE,
+                 confirmed_file: str = CONFIRMED_FILE, signals_dir: str = SIGNALS_DIR,
+                 retries_file: str = RETRIES_FILE, dead_file: str = DEAD_FILE,
+                 dedup_file: str = DEDUP_FILE, daily_file: str = DAILY_FILE):
+        self.users_file     = users_file
+        self.pending_file   = pending_file
+        self.confirmed_file = confirmed_file
+        self.retries_file   = retries_file
+        self.dead_file      = dead_file
+        self.dedup_file     = dedup_file
+        self.daily_file     = daily_file
+        self.journal        = SignalJournal(signals_dir)
+        self.lock           = threading.Lock()
+        self._users         = None    # id → user, loaded on first use
+        self._retries       = None    # id → retry entry, loaded on first use
+        self._retries_mtime = None
+
+    @staticmethod
+    def _load(filepath: str) -> list:
+        if os.path.exists(filepath):
+            with open(filepath, "r") as f:
+                return json.load(f)
+        return []
+
+    @staticmethod
+    def _save(filepath: str, data: list):
+        """Write to a temp file and rename it over the old one, so a crash never leaves half a file."""
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        tmp = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filepath)
+
+    # ── Users ──────────────────────────────────────────────
+    def load_users(self) -> list:
+        with self.lock:
+            self._users = {}
+            for user in self._load(self.users_file):
+                if user["id"] in self._users:
+                    # Older versions minted ids per second, so saved data can hold twins
+                    n = 2
+                    while f"{user['id']}-{n}" in self._users:
+                        n += 1
+                    logger.warning(f"⚠️  Duplicate user id {user['id']} renamed to {user['id']}-{n}")
+                    user["id"] = f"{user['id']}-{n}"
+                self._users[user["id"]] = user
+            # Callers get their own dicts; the cache only changes through save_users
+            return [dict(u) for u in self._users.values()]
+
+    def save_users(self, users: list):
+        """Insert or update the given users."""
+        with self.lock:
+            if self._users is None:
+                self._users = {u["id"]: u for u in self._load(self.users_file)}
+            for user in users:
+                self._users[user["id"]] = user
+            self._save(self.users_file, list(self._users.values()))
+
+    # ── Payments ───────────────────────────────────────────
+    def add_payment(self, payment: dict):
+        with self.lock:
+            pending = self._load(self.pending_file)
+            pending.append(payment)
+            self._save(self.pending_file, pending)
+
+    def find_pending(self, reference: str) -> dict | None:
+        for p in self._load(self.pending_file):
+            if p["reference"] == reference:
+                return p
+        return None
+
+    def confirm_payment(self, reference: str, confirmed_at: str) -> dict | None:
+        """Move a payment from pending to confirmed. Returns it, or None if unknown."""
+        with self.lock:
+            pending = self._load(self.pending_file)
+            found   = next((p for p in pending if p["reference"] == reference), None)
+            if not found:
+                return None
+            found["status"]       = "confirmed"
+            found["confirmed_at"] = confirmed_at
+            self._save(self.pending_file, [p for p in pending if p["reference"] != reference])
+            confirmed = self._load(self.confirmed_file)
+            confirmed.append(found)
+            self._save(self.confirmed_file, confirmed)
+            return found
+
+    def pending_payments(self) -> list:
+        return self._load(self.pending_file)
+
+    def confirmed_payments(self) -> list:
+        return self._load(self.confirmed_file)
+
+    # ── Signals ────────────────────────────────────────────
+    def append_signal(self, signal: dict):
+        self.journal.append(signal)
+
+    def read_signals(self, day: str) -> list:
+        return list(self.journal.read(day))
+
+    def signal_days(self) -> list:
+        return self.journal.days()
+
+    # ── Alert retries (see retry_queue.py) ─────────────────
+    def _retry_map(self) -> dict:
+        # Reload if another process (python retry_queue.py replay) rewrote the file
+        try:
+            mtime = os.stat(self.retries_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._retries is None or mtime != self._retries_mtime:
+            self._retries = {e["id"]: e for e in self._load(self.retries_file)}
+            self._retries_mtime = mtime
+        return self._retries
+
+    def _save_retries(self):
+        self._save(self.retries_file, list(self._retries.values()))
+        self._retries_mtime = os.stat(self.retries_file).st_mtime_ns
+
+    def save_retries(self, entries: list):
+        """Insert or update retry entries – one file rewrite for the whole batch."""
+        with self.lock:
+            retries = self._retry_map()
+            for entry in entries:
+                retries[entry["id"]] = entry
+            self._save_retries()
+
+    def due_retries(self, now: float, limit: int) -> list:
+        with self.lock:
+            due = [e for e in self._retry_map().values() if e["next_at"] <= now]
+        return sorted(due, key=lambda e: e["next_at"])[:limit]
+
+    def delete_retries(self, entry_ids: list):
+        with self.lock:
+            retries = self._retry_map()
+            for entry_id in entry_ids:
+                retries.pop(entry_id, None)
+            self._save_retries()
+
+    def retry_stats(self) -> dict:
+        with self.lock:
+            retries = self._retry_map().values()
+            return {
+                "depth":   len(retries),
+                "oldest":  min((e["created_at"] for e in retries), default=None),
+                "next_at": min((e["next_at"] for e in retries), default=None)
+            }
+
+    def add_dead_letters(self, entries: list):
+        with self.lock:
+            dead = self._load(self.dead_file)
+            dead.extend(entries)
+            self._save(self.dead_file, dead)
+
+    def dead_letters(self) -> list:
+        return self._load(self.dead_file)
+
+    def delete_dead_letters(self, entry_ids: list):
+        with self.lock:
+            drop = set(entry_ids)
+            self._save(self.dead_file, [e for e in self._load(self.dead_file) if e["id"] not in drop])
+
+    # ── Seen signals (see dedup.py) ────────────────────────
+    # An append-only log of (key, expires_at); this process's own cache is
+    # the authority, the file only carries it across a restart.
+    def load_dedup(self, now: float) -> list:
+        """Live keys as (key, expires_at), compacting the log to just those."""
+        with self.lock:
+            return self._compact_dedup(now)[0]
+
+    def _compact_dedup(self, now: float) -> tuple:
+        live, lines = {}, 0
+        if os.path.exists(self.dedup_file):
+            with open(self.dedup_file, "r") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        key, expires_at = json.loads(line)
+                    except ValueError:
+                        continue         # torn last line from a crash
+                    if expires_at > now:
+                        live[key] = expires_at
+                    else:
+                        live.pop(key, None)
+        tmp = self.dedup_file + ".tmp"
+        with open(tmp, "w") as f:
+            f.writelines(json.dumps([k, e]) + "\n" for k, e in live.items())
+        os.replace(tmp, self.dedup_file)
+        return list(live.items()), lines - len(live)
+
+    def claim_dedup(self, entries: list, now: float) -> set:
+        """Record (key, expires_at) pairs. Returns the keys another process already holds (never any here)."""
+        with self.lock, open(self.dedup_file, "a") as f:
+            f.writelines(json.dumps([k, e]) + "\n" for k, e in entries)
+        return set()
+
+    def forget_dedup(self, keys: list):
+        # An already-expired entry drops the earlier one on the next load
+        self.claim_dedup([(key, 0) for key in keys], 0)
+
+    def prune_dedup(self, now: float) -> int:
+        with self.lock:
+            return self._compact_dedup(now)[1]
+
+    # ── Daily counts (see counters.py) ─────────────────────
+    # One record per day: {"day": "2026-03-14", "signals": 12, "alerts": 4810}
+    def daily_counts(self, day: str) -> dict:
+        with self.lock:
+            record = next((r for r in self._load(self.daily_file) if r["day"] == day), {})
+        return {k: v for k, v in record.items() if k != "day"}
+
+    def add_daily_count(self, day: str, name: str, n: int = 1):
+        with self.lock:
+            records = self._load(self.daily_file)
+            record  = next((r for r in records if r["day"] == day), None)
+            if record is None:
+                record = {"day": day}
+                records.append(record)
+            record[name] = record.get(name, 0) + n
+            self._save(self.daily_file, records)
+
+    def close(self):
+        self.journal.close()
+
+
+# ─────────────────────────────────────────────
+# SQLITE BACKEND
+# ─────────────────────────────────────────────
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id        TEXT PRIMARY KEY,
+    status    TEXT NOT NULL,
+    phone     TEXT,
+    plan      TEXT,
+    country   TEXT,
+    expiry_ts REAL,
+    data      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_status ON users(status);
+CREATE INDEX IF NOT EXISTS users_phone  ON users(phone);
+CREATE INDEX IF NOT EXISTS users_expiry ON users(expiry_ts);
+
+CREATE TABLE IF NOT EXISTS payments (
+    reference  TEXT PRIMARY KEY,
+    user_id    TEXT,
+    status     TEXT NOT NULL,
+    created_at TEXT,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_status ON payments(status, created_at);
+
+CREATE TABLE IF NOT EXISTS signals (
+    id        TEXT PRIMARY KEY,
+    day       TEXT NOT NULL,
+    timestamp TEXT,
+    data      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signals_day ON signals(day, timestamp);
+
+-- One row per user write, so other processes know which users to reload
+CREATE TABLE IF NOT EXISTS changes (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL
+);
+
+-- Failed alert deliveries waiting to be sent again (see retry_queue.py)
+CREATE TABLE IF NOT EXISTS retries (
+    id         TEXT PRIMARY KEY,
+    next_at    REAL NOT NULL,
+    created_at REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retries_due ON retries(next_at);
+
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id        TEXT PRIMARY KEY,
+    failed_at REAL,
+    data      TEXT NOT NULL
+);
+
+-- MessageSids and signal hashes recently seen (see dedup.py)
+CREATE TABLE IF NOT EXISTS dedup (
+    key        TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dedup_expiry ON dedup(expires_at);
+
+-- Signals and alerts per day (see counters.py)
+CREATE TABLE IF NOT EXISTS daily_counts (
+    day   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (day, name)
+);
+"""
+
+
+class SqliteStorage:
+    """SQLite in WAL mode. One connection per thread; safe to share between processes."""
+
+    name   = "sqlite"
+    shared = True
+
+    def __init__(self, path: str = DB_FILE):
+        self.path  = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # ── Users ──────────────────────────────────────────────
+    def load_users(self) -> list:
+        rows = self.conn.execute("SELECT data FROM users ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def load_users_by_id(self, user_ids: list) -> list:
+        users = []
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            rows  = self.conn.execute(
+                f"SELECT data FROM users WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            users.extend(json.loads(data) for (data,) in rows)
+        return users
+
+    def save_users(self, users: list):
+        """Insert or update the given users – one row each. Stored counters are kept."""
+        rows = [(
+            u["id"], u["status"], normalise_phone(u.get("phone") or ""),
+            u.get("plan"), u.get("country"), expiry_timestamp(u.get("expiry")),
+            json.dumps(u)
+        ) for u in users]
+        keep = "excluded.data"
+        for field in COUNTER_FIELDS:
+            keep = f"json_set({keep}, '$.{field}', COALESCE(json_extract(users.data, '$.{field}'), 0))"
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO users (id, status, phone, plan, country, expiry_ts, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status=excluded.status, phone=excluded.phone, "
+                "plan=excluded.plan, country=excluded.country, "
+                f"expiry_ts=excluded.expiry_ts, data={keep}",
+                rows
+            )
+            self.conn.executemany("INSERT INTO changes (user_id) VALUES (?)",
+                                  [(u["id"],) for u in users])
+
+    def increment(self, user_ids: list, field: str, by: int = 1):
+        """Add `by` to a counter of each user in the database itself."""
+        path = f"$.{field}"
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE users SET data = json_set(data, ?, COALESCE(json_extract(data, ?), 0) + ?) "
+                "WHERE id = ?",
+                [(path, path, by, user_id) for user_id in user_ids]
+            )
+
+    def expire_users(self, user_ids: list, now: float) -> list:
+        """
+        Mark users inactive only if they are still active and past `now` in
+        the database – another process may have renewed them. Returns the
+        ids actually expired.
+        """
+        expired = []
+        with self.conn:
+            for user_id in user_ids:
+                cursor = self.conn.execute(
+                    "UPDATE users SET status = 'inactive', data = json_set(data, '$.status', 'inactive') "
+                    "WHERE id = ? AND status = 'active' AND expiry_ts < ?",
+                    (user_id, now)
+                )
+                if cursor.rowcount:
+                    expired.append(user_id)
+            self.conn.executemany("INSERT INTO changes (user_id) VALUES (?)",
+                                  [(user_id,) for user_id in expired])
+        return expired
+
+    # ── Change feed ────────────────────────────────────────
+    def latest_change(self) -> int:
+        row = self.conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, seq: int) -> tuple:
+        """
+        (latest seq, ids of users written after `seq`). The ids are None if
+        the rows after `seq` were already pruned – reload everything.
+        """
+        rows = self.conn.execute(
+            "SELECT seq, user_id FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        if not rows:
+            return seq, []
+        if rows[0][0] != seq + 1:
+            oldest = self.conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            if oldest > seq + 1:
+                return rows[-1][0], None
+        return rows[-1][0], list(dict.fromkeys(user_id for _, user_id in rows))
+
+    def prune_changes(self, keep: int = 100_000) -> int:
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (keep,)
+            ).rowcount
+
+    # ── Payments ───────────────────────────────────────────
+    def add_payment(self, payment: dict):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO payments (reference, user_id, status, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (payment["reference"], payment.get("user_id"), payment["status"],
+                 payment.get("created_at"), json.dumps(payment))
+            )
+
+    def find_pending(self, reference: str) -> dict | None:
+        row = self.conn.execute(
+            "SELECT data FROM payments WHERE reference = ? AND status = 'pending'", (reference,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def confirm_payment(self, reference: str, confirmed_at: str) -> dict | None:
+        # Check and update in one statement: the CLI and the bot may confirm the same reference at once
+        with self.conn:
+            updated = self.conn.execute(
+                "UPDATE payments SET status = 'confirmed', "
+                "data = json_set(data, '$.status', 'confirmed', '$.confirmed_at', ?) "
+                "WHERE reference = ? AND status = 'pending'",
+                (confirmed_at, reference)
+            ).rowcount
+            if not updated:
+                return None
+            row = self.conn.execute("SELECT data FROM payments WHERE reference = ?", (reference,)).fetchone()
+            return json.loads(row[0])
+
+    def _payments(self, status: str) -> list:
+        rows = self.conn.execute(
+            "SELECT data FROM payments WHERE status = ? ORDER BY created_at", (status,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def pending_payments(self) -> list:
+        return self._payments("pending")
+
+    def confirmed_payments(self) -> list:
+        return self._payments("confirmed")
+
+    # ── Signals ────────────────────────────────────────────
+    def append_signal(self, signal: dict):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO signals (id, day, timestamp, data) VALUES (?, ?, ?, ?)",
+                (signal["id"], signal.get("timestamp", "")[:10], signal.get("timestamp"),
+                 json.dumps(signal, ensure_ascii=False))
+            )
+
+    def read_signals(self, day: str) -> list:
+        rows = self.conn.execute(
+            "SELECT data FROM signals WHERE day = ? ORDER BY timestamp", (day,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def signal_days(self) -> list:
+        rows = self.conn.execute("SELECT DISTINCT day FROM signals ORDER BY day").fetchall()
+        return [day for (day,) in rows]
+
+    # ── Alert retries (see retry_queue.py) ─────────────────
+    def save_retries(self, entries: list):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO retries (id, next_at, created_at, data) VALUES (?, ?, ?, ?)",
+                [(e["id"], e["next_at"], e["created_at"], json.dumps(e, ensure_ascii=False))
+                 for e in entries]
+            )
+
+    def due_retries(self, now: float, limit: int) -> list:
+        rows = self.conn.execute(
+            "SELECT data FROM retries WHERE next_at <= ? ORDER BY next_at LIMIT ?", (now, limit)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def delete_retries(self, entry_ids: list):
+        with self.conn:
+            self.conn.executemany("DELETE FROM retries WHERE id = ?", [(i,) for i in entry_ids])
+
+    def retry_stats(self) -> dict:
+        depth, oldest, next_at = self.conn.execute(
+            "SELECT COUNT(*), MIN(created_at), MIN(next_at) FROM retries"
+        ).fetchone()
+        return {"depth": depth, "oldest": oldest, "next_at": next_at}
+
+    def add_dead_letters(self, entries: list):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO dead_letters (id, failed_at, data) VALUES (?, ?, ?)",
+                [(e["id"], e.get("failed_at"), json.dumps(e, ensure_ascii=False)) for e in entries]
+            )
+
+    def dead_letters(self) -> list:
+        rows = self.conn.execute("SELECT data FROM dead_letters ORDER BY failed_at").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def delete_dead_letters(self, entry_ids: list):
+        with self.conn:
+            self.conn.executemany("DELETE FROM dead_letters WHERE id = ?", [(i,) for i in entry_ids])
+
+    # ── Seen signals (see dedup.py) ────────────────────────
+    def load_dedup(self, now: float) -> list:
+        return self.conn.execute(
+            "SELECT key, expires_at FROM dedup WHERE expires_at > ?", (now,)
+        ).fetchall()
+
+    def claim_dedup(self, entries: list, now: float) -> set:
+        """
+        Record (key, expires_at) pairs in one transaction. A key some process
+        holds unexpired is left alone and returned: that signal is a duplicate.
+        """
+        held = set()
+        with self.conn:
+            for key, expires_at in entries:
+                cursor = self.conn.execute(
+                    "INSERT INTO dedup (key, expires_at) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                    "WHERE dedup.expires_at <= ?",
+                    (key, expires_at, now)
+                )
+                if cursor.rowcount == 0:
+                    held.add(key)
+        return held
+
+    def forget_dedup(self, keys: list):
+        with self.conn:
+            self.conn.executemany("DELETE FROM dedup WHERE key = ?", [(k,) for k in keys])
+
+    def prune_dedup(self, now: float) -> int:
+        with self.conn:
+            return self.conn.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,)).rowcount
+
+    # ── Daily counts (see counters.py) ─────────────────────
+    def daily_counts(self, day: str) -> dict:
+        return dict(self.conn.execute(
+            "SELECT name, value FROM daily_counts WHERE day = ?", (day,)
+        ).fetchall())
+
+    def add_daily_count(self, day: str, name: str, n: int = 1):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO daily_counts (day, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, name) DO UPDATE SET value = value + excluded.value",
+                (day, name, n)
+            )
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+# ─────────────────────────────────────────────
+# BACKEND SELECTION
+# ─────────────────────────────────────────────
+BACKENDS = {"json": JsonStorage, "sqlite": SqliteStorage}
+
+_storage      = None
+_storage_lock = threading.Lock()
+
+
+def get_storage(config: dict | None = None):
+    """The process-wide storage backend (created on first call)."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if config is None and os.path.exists("config.json"):
+                with open("config.json", "r") as f:
+                    config = json.load(f)
+            name = os.environ.get("TRADEL_STORAGE") or (config or {}).get("storage", "json")
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown storage backend '{name}' (use one of {', '.join(BACKENDS)})")
+            _storage = BACKENDS[name]()
+            logger.info(f"💾 Storage backend: {name}")
+        return _storage
+
+
+def migrate_json_to_sqlite(source: JsonStorage | None = None,
+                           target: SqliteStorage | None = None) -> dict:
+    """Copy users, payments, signals and pending alert retries from the JSON files into SQLite."""
+    source = source or JsonStorage()
+    target = target or SqliteStorage()
+
+    users = source.load_users()
+    target.save_users(users)
+
+    payments = source.pending_payments() + source.confirmed_payments()
+    for payment in payments:
+        target.add_payment(payment)
+
+    signals = 0
+    for day in source.signal_days():
+        for signal in source.read_signals(day):
+            target.append_signal(signal)
+            signals += 1
+
+    retries = source.due_retries(float("inf"), 1_000_000)
+    target.save_retries(retries)
+    target.add_dead_letters(source.dead_letters())
+
+    counts = {"users": len(users), "payments": len(payments), "signals": signals,
+              "retries": len(retries)}
+    logger.info(f"📦 Migrated to {target.path}: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        counts = migrate_json_to_sqlite()
+        print(f"✅ Migrated {counts['users']} users, {counts['payments']} payments, "
+              f"{counts['signals']} signals into {DB_FILE}")
+        print('   Set "storage": "sqlite" in config.json (or TRADEL_STORAGE=sqlite) to use it.')
+    else:
+        print("Usage: python storage.py migrate")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Message Templates
+templates.py
+
+The text of every WhatsApp message lives in templates.json, so it can be
+changed or translated without touching code. The file is created with
+the default English text on first use and reloaded within a second of
+being saved. A file that does not parse is ignored: the previous
+templates stay in use.
+
+    {
+      "version": 2,
+      "default_locale": "en",
+      "templates": {
+        "en": {"alert": "🚨 {pair} {action_emoji} {action} ...", ...},
+        "fr": {"alert": "..."}
+      }
+    }
+
+Templates are Python format strings. `{user.name}`-style fields belong to
+the recipient. Everything else (the signal, the payment) is filled in
+once, and for a signal the result is cached, so a fan-out renders the
+alert once per locale. Each user then only costs joining a few pieces
+around their own fields. A user's "locale" picks the language; missing
+locales and templates fall back to the default. An unknown field is
+left in the text as written, so a typo shows up in the message.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from string import Formatter
+
+logger = logging.getLogger("tradel.templates")
+
+
+TEMPLATES_FILE = os.environ.get("TRADEL_TEMPLATES", "templates.json")
+DEFAULT_LOCALE = "en"
+RELOAD_CHECK   = 1.0     # seconds between checks for a changed file
+CACHE_SIZE     = 1024    # rendered (template, locale, signal) kept
+
+DEFAULT_TEMPLATES = {
+    "alert": (
+        "🚨 *TradeL Alert* 🚨\n"
+        "──────────────────\n"
+        "*Pair:*   {pair}\n"
+        "*Action:* {action_emoji} {action}\n"
+        "*Entry:*  {entry}\n"
+        "*TP:*     {tp}\n"
+        "*SL:*     {sl}\n"
+        "──────────────────\n"
+        "{message}\n"
+        "──────────────────\n"
+        "⏱ {time}\n"
+        "_TradeL – Never miss a trade._"
+    ),
+    "welcome": (
+        "🌟 *Welcome to TradeL!* 🌟\n\n"
+        "Hello {user.name},\n\n"
+        "Your subscription is now *ACTIVE* ✅\n\n"
+        "*Plan:*    {user.plan}\n"
+        "*Started:* {user.joined}\n"
+        "*Expiry:*  {user.expiry}\n\n"
+        "From now on, every trading signal from your group will:\n"
+        "• 📩 Be sent here instantly\n"
+        "• 📞 Ring your phone (if push enabled)\n\n"
+        "Reply *STOP* at any time to pause alerts.\n\n"
+        "Happy trading! 📈\n"
+        "*— The TradeL Team*"
+    ),
+    "payment_request": (
+        "💳 *TradeL Payment Request*\n\n"
+        "Hi {user.name},\n\n"
+        "*Reference:* `{reference}`\n"
+        "*Amount:*    ₦{amount:,}\n\n"
+        "*Bank Details:*\n"
+        "🏦 Bank:    {bank}\n"
+        "👤 Name:    {account_name}\n"
+        "🔢 Account: {account}\n\n"
+        "*Steps:*\n"
+        "1️⃣  Transfer ₦{amount:,}\n"
+        "2️⃣  Use `{reference}` as reference\n"
+        "3️⃣  Send screenshot here\n"
+        "4️⃣  Activation within 30 minutes ✅\n\n"
+        "Questions? Just reply here. 😊"
+    ),
+    "renewal_reminder": (
+        "⏰ *TradeL Renewal Reminder*\n\n"
+        "Hi {user.name},\n\n"
+        "Your TradeL subscription expires in *{days_left} day(s)*.\n\n"
+        "To keep receiving alerts, please renew before your expiry date.\n"
+        "Reply *RENEW* and we'll send payment details. 🙏\n\n"
+        "*— TradeL Team*"
+    )
+}
+
+
+def _convert(value, conversion: str | None):
+    if conversion == "r":
+        return repr(value)
+    if conversion == "a":
+        return ascii(value)
+    if conversion == "s":
+        return str(value)
+    return value
+
+
+# ─────────────────────────────────────────────
+# COMPILED TEMPLATE
+# ─────────────────────────────────────────────
+class Rendered:
+    """A template with everything but the recipient's fields filled in."""
+
+    __slots__ = ("chunks", "slots", "text")
+
+    def __init__(self, chunks: list):
+        self.chunks = [c if isinstance(c, str) else "" for c in chunks]
+        # (position, field, spec, conversion, original) of each user.* field
+        self.slots  = tuple((i, *c) for i, c in enumerate(chunks) if not isinstance(c, str))
+        self.text   = None if self.slots else "".join(self.chunks)
+
+    def fill(self, user=None) -> str:
+        """The message for one recipient. `user` maps user.* field names to values."""
+        if not self.slots:
+            return self.text
+        user = user or {}
+        out  = self.chunks.copy()
+        for i, field, spec, conversion, original in self.slots:
+            if field not in user:
+                out[i] = original
+            elif spec or conversion:
+                out[i] = format(_convert(user[field], conversion), spec)
+            else:
+                out[i] = str(user[field])
+        return "".join(out)
+
+
+class Template:
+    """A format string parsed once into literal text and fields."""
+
+    def __init__(self, name: str, text: str):
+        self.name  = name
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            original = None
+            if field is not None:
+                original = "{" + field + (f"!{conversion}" if conversion else "") + \
+                           (f":{spec}" if spec else "") + "}"
+            self.parts.append((literal, field, spec or "", conversion, original))
+
+    def bind(self, values: dict) -> Rendered:
+        """Fill in the non-user fields from `values`; user.* fields stay open."""
+        chunks = []
+        for literal, field, spec, conversion, original in self.parts:
+            if literal:
+                chunks.append(literal)
+            if field is None:
+                continue
+            if field.startswith("user."):
+                chunks.append((field[len("user."):], spec, conversion, original))
+            elif field in values:
+                chunks.append(format(_convert(values[field], conversion), spec))
+            else:
+                chunks.append(original)
+        # Merge neighbouring text so fill() joins as few pieces as possible
+        merged = []
+        for chunk in chunks:
+            if merged and isinstance(chunk, str) and isinstance(merged[-1], str):
+                merged[-1] += chunk
+            else:
+                merged.append(chunk)
+        return Rendered(merged)
+
+
+# ─────────────────────────────────────────────
+# TEMPLATE FILE
+# ─────────────────────────────────────────────
+class TemplateSet:
+
+    def __init__(self, path: str = TEMPLATES_FILE):
+        self.path           = path
+        self.lock           = threading.Lock()
+        self.version        = None
+        self.default_locale = DEFAULT_LOCALE
+        self.templates      = {}            # locale → name → Template
+        self.cache          = {}            # (name, locale, key) → Rendered, oldest first
+        self.mtime          = None
+        self.generation     = 0             # bumped on every reload
+        self.checked        = 0.0
+        self.hits           = 0
+        self.misses         = 0
+        self.load()
+
+    def load(self) -> bool:
+        """(Re)read the file, writing the defaults first if there is none. False if it was unusable."""
+        if not os.path.exists(self.path):
+            try:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "default_locale": DEFAULT_LOCALE,
+                               "templates": {DEFAULT_LOCALE: DEFAULT_TEMPLATES}},
+                              f, indent=2, ensure_ascii=False)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not write {self.path}: {e} – using built-in templates")
+        mtime = None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            templates = {
+                locale: {name: Template(name, text) for name, text in texts.items()}
+                for locale, texts in data["templates"].items()
+            }
+            default_locale = data.get("default_locale", DEFAULT_LOCALE)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            if not self.templates:
+                self.templates = {DEFAULT_LOCALE: {n: Template(n, t) for n, t in DEFAULT_TEMPLATES.items()}}
+            self.mtime = mtime          # report a bad file once, not on every check
+            logger.error(f"❌ Unusable {self.path}, keeping templates v{self.version}: {e}")
+            return False
+
+        # Anything the file leaves out falls back to the built-in text
+        base = templates.setdefault(default_locale, {})
+        for name, text in DEFAULT_TEMPLATES.items():
+            base.setdefault(name, Template(name, text))
+        with self.lock:
+            self.templates      = templates
+            self.default_locale = default_locale
+            self.version        = data.get("version")
+            self.mtime          = mtime
+            self.generation    += 1
+            self.cache.clear()
+        logger.info(f"📝 Message templates v{self.version} loaded ({', '.join(templates)})")
+        return True
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self.checked < RELOAD_CHECK:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self.mtime:
+            self.load()
+
+    def get(self, name: str, locale: str | None = None) -> Template:
+        by_name = self.templates.get(locale or self.default_locale) or {}
+        return by_name.get(name) or self.templates[self.default_locale][name]
+
+    def render(self, name: str, values, locale: str | None = None, key=None) -> Rendered:
+        """
+        The template with `values` (a dict, or a function returning one)
+        filled in. With a `key` (e.g. the signal id) the result is cached,
+        and `values` is only used the first time.
+        """
+        if time.monotonic() - self.checked >= RELOAD_CHECK:
+            self._reload_if_changed()
+        locale = locale or self.default_locale
+        if key is not None:
+            # Lock-free hit: one fan-out asks for the same key thousands of times
+            rendered = self.cache.get((name, locale, key))
+            if rendered is not None:
+                self.hits += 1           # approximate under threads; only for stats
+                return rendered
+        generation = self.generation
+        rendered   = self.get(name, locale).bind(values() if callable(values) else values)
+        if key is not None:
+            with self.lock:
+                self.misses += 1
+                if generation != self.generation:
+                    return rendered      # reloaded meanwhile – don't cache the old text
+                self.cache[(name, locale, key)] = rendered
+                while len(self.cache) > CACHE_SIZE:
+                    # Signals arrive in time order, so the oldest entry is the coldest
+                    del self.cache[next(iter(self.cache))]
+        return rendered
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"version": self.version, "locales": sorted(self.templates),
+                    "cached": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+_templates      = None
+_templates_lock = threading.Lock()
+
+
+def get_templates() -> TemplateSet:
+    """The process-wide templates (loaded on first call)."""
+    global _templates
+    if _templates is not None:
+        return _templates
+    with _templates_lock:
+        if _templates is None:
+            _templates = TemplateSet()
+        return _templates
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - User Repository
+users.py
+
+Holds the subscriber list with indexes so lookups don't scan every user:
+  • by id      – primary key
+  • by status  – "active", "pending", "inactive" → users with that status
+  • by phone   – normalised phone number → users with that number
+  • by expiry  – active users sorted by expiry time
+  • listings   – ids in sorted order: all users, per (status, plan,
+                 country), and every user with an expiry by (expiry, id),
+                 so a page of /users costs about its size (see page())
+
+All status/expiry changes must go through the repository so the indexes
+stay in step with the user dicts. Other fields (name, alerts_received…)
+can be edited on the dict directly.
+
+An optional ExpiryScheduler (scheduler.py) is kept in step the same way,
+so activations and deactivations reschedule that user's expiry at once.
+
+Thread safety: every method takes the repository's RWLock (concurrency.py),
+queries as readers and changes as the single writer. Counters are bumped
+with increment() rather than `user[...] += 1`, and anything that
+serialises users (saving, /users) works on snapshot() copies so it never
+reads a dict another thread is changing.
+"""
+
+import json
+import heapq
+import base64
+import bisect
+import logging
+from datetime import datetime
+
+from concurrency import RWLock
+
+logger = logging.getLogger("tradel.users")
+
+
+LISTED_FIELDS = ("status", "plan", "country")   # fields page() can filter on by index
+SCAN_LIMIT    = 10_000                          # users one page() may look at
+
+
+def normalise_phone(phone: str) -> str:
+    """
+    Accept any of these formats and return digits only (no +):
+      08012345678  →  2348012345678
+      2348012345678 → 2348012345678
+      +2348012345678 → 2348012345678
+    """
+    phone = phone.strip().replace(" ", "").replace("-", "")
+    if phone.startswith("+"):
+        phone = phone[1:]
+    if phone.startswith("0"):          # local Nigerian format
+        phone = "234" + phone[1:]
+    return phone
+
+
+def expiry_timestamp(expiry: str | None) -> float | None:
+    """Parse an ISO expiry string to a POSIX timestamp (None if missing/invalid)."""
+    if not expiry:
+        return None
+    try:
+        return datetime.fromisoformat(expiry).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class UserRepository:
+
+    def __init__(self, users: list | None = None, scheduler=None):
+        self.scheduler   = scheduler
+        self.lock        = RWLock()
+        self.by_id       = {}    # id → user
+        self.by_status   = {}    # status → {id: user}
+        self.by_phone    = {}    # phone → {id: user}
+        self.expiry_keys = []    # sorted [(expiry_ts, id)] of active users
+        self.expiry_of   = {}    # id → its key in expiry_keys
+        self.sorted_ids  = []    # every id, sorted
+        self.listed      = {}    # (status, plan, country) → sorted ids
+        self.expiry_all  = []    # sorted [(expiry_ts, id)] of every user with an expiry
+        self.listed_as   = {}    # id → ((status, plan, country), expiry_ts) it is listed under
+        # Loading appends to the sorted lists and sorts each once at the end
+        self.loading     = True
+        for user in users or []:
+            self.add(user)
+        self.loading     = False
+        for keys in [self.expiry_keys, self.sorted_ids, self.expiry_all, *self.listed.values()]:
+            keys.sort()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, user_id):
+        return user_id in self.by_id
+
+    # ── Index maintenance ──────────────────────────────────
+    def _insert_sorted(self, keys: list, key):
+        if self.loading:
+            keys.append(key)
+        else:
+            bisect.insort(keys, key)
+
+    @staticmethod
+    def _remove_sorted(keys: list, key):
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def _relist(self, user: dict):
+        """Move the user only in the listings whose key changed – each move shifts a long list."""
+        user_id      = user["id"]
+        combo        = tuple(user.get(f) for f in LISTED_FIELDS)
+        ts           = expiry_timestamp(user.get("expiry"))
+        old_combo, old_ts = self.listed_as.get(user_id, (None, None))
+        self.listed_as[user_id] = (combo, ts)
+        if combo != old_combo:
+            if old_combo is not None:
+                ids = self.listed[old_combo]
+                self._remove_sorted(ids, user_id)
+                if not ids:
+                    del self.listed[old_combo]
+            self._insert_sorted(self.listed.setdefault(combo, []), user_id)
+        if ts != old_ts:
+            if old_ts is not None:
+                self._remove_sorted(self.expiry_all, (old_ts, user_id))
+            if ts is not None:
+                self._insert_sorted(self.expiry_all, (ts, user_id))
+
+    def _index(self, user: dict):
+        self.by_status.setdefault(user["status"], {})[user["id"]] = user
+        phone = normalise_phone(user.get("phone") or "")
+        if phone:
+            self.by_phone.setdefault(phone, {})[user["id"]] = user
+        if user["status"] == "active":
+            ts = expiry_timestamp(user.get("expiry"))
+            if ts is not None:
+                key = (ts, user["id"])
+                self._insert_sorted(self.expiry_keys, key)
+                self.expiry_of[user["id"]] = key
+                if self.scheduler is not None:
+                    self.scheduler.schedule(user["id"], ts)
+        self._relist(user)
+
+    def _unindex(self, user: dict):
+        bucket = self.by_status.get(user["status"])
+        if bucket is not None:
+            bucket.pop(user["id"], None)
+        phone = normalise_phone(user.get("phone") or "")
+        if phone in self.by_phone:
+            self.by_phone[phone].pop(user["id"], None)
+            if not self.by_phone[phone]:
+                del self.by_phone[phone]
+        key = self.expiry_of.pop(user["id"], None)
+        if key is not None:
+            self._remove_sorted(self.expiry_keys, key)
+            if self.scheduler is not None:
+                self.scheduler.cancel(user["id"])
+
+    # ── Mutations ──────────────────────────────────────────
+    def add(self, user: dict):
+        with self.lock.write():
+            if user["id"] in self.by_id:
+                raise ValueError(f"duplicate user id: {user['id']}")
+            self.by_id[user["id"]] = user
+            self._insert_sorted(self.sorted_ids, user["id"])
+            self._index(user)
+
+    def update(self, user_id: str, **fields) -> dict | None:
+        """Change indexed fields (status, expiry, phone) of one user."""
+        with self.lock.write():
+            user = self.by_id.get(user_id)
+            if user is None:
+                return None
+            self._unindex(user)
+            user.update(fields)
+            self._index(user)
+            return user
+
+    def activate(self, user_id: str, expiry: str) -> dict | None:
+        return self.update(user_id, status="active", expiry=expiry)
+
+    def deactivate(self, user_id: str) -> dict | None:
+        return self.update(user_id, status="inactive")
+
+    def expire(self, user_id: str) -> dict | None:
+        return self.update(user_id, status="inactive")
+
+    def expire_if_due(self, user_id: str, now: float) -> dict | None:
+        """
+        Expire the user only if they are still active with an expiry before
+        `now` – they may have been renewed since the scheduler popped them.
+        """
+        with self.lock.write():
+            key  = self.expiry_of.get(user_id)
+            user = self.by_id.get(user_id)
+            if key is None or key[0] >= now or user["status"] != "active":
+                return None
+            self._unindex(user)
+            user["status"] = "inactive"
+            self._index(user)
+            return user
+
+    def replace(self, user: dict) -> dict:
+        """
+        Take a fresher copy of a user (e.g. reloaded from a shared store).
+        The existing dict is updated in place so other references see it.
+        """
+        with self.lock.write():
+            existing = self.by_id.get(user["id"])
+            if existing is None:
+                self.by_id[user["id"]] = user
+                self._insert_sorted(self.sorted_ids, user["id"])
+                self._index(user)
+                return user
+            self._unindex(existing)
+            for key in [k for k in existing if k not in user]:
+                del existing[key]
+            existing.update(user)
+            self._index(existing)
+            return existing
+
+    def increment(self, user_ids, field: str, by: int = 1) -> list:
+        """Add `by` to a counter field of each user. Returns the users changed."""
+        changed = []
+        with self.lock.write():
+            for user_id in user_ids:
+                user = self.by_id.get(user_id)
+                if user is not None:
+                    user[field] = user.get(field, 0) + by
+                    changed.append(user)
+        return changed
+
+    # ── Queries ────────────────────────────────────────────
+    def get(self, user_id: str) -> dict | None:
+        return self.by_id.get(user_id)
+
+    def all(self) -> list:
+        """Every user, in the order they were added."""
+        with self.lock.read():
+            return list(self.by_id.values())
+
+    def snapshot(self, users: list | None = None) -> list:
+        """Copies of `users` (default: every user) taken while no writer is active."""
+        with self.lock.read():
+            return [dict(u) for u in (self.by_id.values() if users is None else users)]
+
+    def with_status(self, status: str) -> list:
+        with self.lock.read():
+            return list(self.by_status.get(status, {}).values())
+
+    def count(self, status: str) -> int:
+        return len(self.by_status.get(status, ()))
+
+    def active(self) -> list:
+        return self.with_status("active")
+
+    def find_by_phone(self, phone: str) -> list:
+        with self.lock.read():
+            return list(self.by_phone.get(normalise_phone(phone or ""), {}).values())
+
+    def expiring_before(self, ts: float) -> list:
+        """Active users whose expiry timestamp is strictly before `ts`, soonest first."""
+        with self.lock.read():
+            end = bisect.bisect_left(self.expiry_keys, (ts,))
+            return [self.by_id[uid] for _, uid in self.expiry_keys[:end]]
+
+    def expiring_between(self, start: float, end: float) -> list:
+        """Active users expiring in [start, end), soonest first."""
+        with self.lock.read():
+            lo = bisect.bisect_left(self.expiry_keys, (start,))
+            hi = bisect.bisect_left(self.expiry_keys, (end,))
+            return [self.by_id[uid] for _, uid in self.expiry_keys[lo:hi]]
+
+    def next_expiry(self) -> float | None:
+        with self.lock.read():
+            return self.expiry_keys[0][0] if self.expiry_keys else None
+
+    # ── Listing ────────────────────────────────────────────
+    def page(self, limit: int = 100, after=None, expires: tuple | None = None,
+             fields: list | None = None, **equals) -> tuple:
+        """
+        Up to `limit` copies of users matching every `equals` filter
+        (status=, plan=, country=) and, if given, with an expiry in
+        expires=(start, end) – either end may be None. Users come in id
+        order, or by expiry with an expiry filter. `fields` keeps only those
+        keys (and "id").
+
+        Returns (users, next_after): pass next_after back as `after` for the
+        next page; it is None once there are no more. Filters on status,
+        plan and country merge the matching (status, plan, country)
+        listings, so the cost is about the page size. An expiry range walks
+        the expiry listing and checks the other filters per user, so a page
+        may come back short after SCAN_LIMIT users that did not match.
+        """
+        if after is not None and not isinstance(after, list if expires is not None else str):
+            raise ValueError("cursor is from a listing with different filters")
+        if isinstance(after, list) and not _expiry_key(after):
+            raise ValueError(f"invalid cursor: {after}")
+        keep = None if not fields else {"id", *fields}
+        with self.lock.read():
+            copy = (lambda u: dict(u)) if keep is None else \
+                   (lambda u: {k: v for k, v in u.items() if k in keep})
+            if expires is None:
+                return self._page_by_id(limit, after, equals, copy)
+
+            start, end = expires
+            keys = self.expiry_all
+            lo   = bisect.bisect_left(keys, (start,)) if start is not None else 0
+            hi   = bisect.bisect_left(keys, (end,)) if end is not None else len(keys)
+            if after is not None:
+                lo = max(lo, bisect.bisect_right(keys, tuple(after)))
+            users, i = [], lo
+            while i < hi and len(users) < limit and i - lo < SCAN_LIMIT:
+                user = self.by_id[keys[i][1]]
+                i   += 1
+                if all(user.get(f) == v for f, v in equals.items()):
+                    users.append(copy(user))
+            return users, (list(keys[i - 1]) if i < hi else None)
+
+    def _page_by_id(self, limit: int, after, equals: dict, copy) -> tuple:
+        if equals:
+            fields = [(LISTED_FIELDS.index(f), v) for f, v in equals.items()]
+            lists  = [ids for combo, ids in self.listed.items()
+                      if all(combo[i] == v for i, v in fields)]
+        else:
+            lists = [self.sorted_ids]
+
+        def walk(ids):
+            for i in range(bisect.bisect_right(ids, after) if after is not None else 0, len(ids)):
+                yield ids[i]
+
+        ids   = walk(lists[0]) if len(lists) == 1 else heapq.merge(*map(walk, lists))
+        users = []
+        for user_id in ids:
+            if len(users) == limit:
+                return users, users[-1]["id"]       # there is at least one more
+            users.append(copy(self.by_id[user_id]))
+        return users, None
+
+
+def _expiry_key(after: list) -> bool:
+    """Whether `after` is an expiry listing position: [expiry_ts, user id]."""
+    return (len(after) == 2 and isinstance(after[0], (int, float)) and not isinstance(after[0], bool)
+            and isinstance(after[1], str))
+
+
+def encode_cursor(after) -> str | None:
+    """page()'s next_after as an opaque URL-safe string."""
+    if after is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Raises ValueError for a cursor that encode_cursor did not make."""
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+    if not isinstance(after, str) and not (isinstance(after, list) and _expiry_key(after)):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return after
@@ -6,12 +6,24 @@ whatsapp.py
 
 import os
 import logging
-from twilio.rest import Client
+
+from clients import build_twilio_client
+from logconfig import SEND_FAILURES
+from ratelimit import Throttled
+from templates import get_templates
+from users import normalise_phone
 
 logger = logging.getLogger("tradel.whatsapp")
 
+# Twilio sandbox number (use until you get a dedicated WhatsApp number)
+WHATSAPP_FROM = os.environ.get("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+
 
 class WhatsAppService:
+    """
+    Build one per process via clients.get_whatsapp_service() – it holds a
+    pooled Twilio client that is meant to be reused across sends.
+    """
 
     def __init__(self):
         self.account_sid  = os.environ.get("TWILIO_SID")
@@ -23,24 +35,12 @@ class WhatsAppService:
                 "Run: export TWILIO_SID='your_sid'  &&  export TWILIO_TOKEN='your_token'"
             )
 
-        self.client      = Client(self.account_sid, self.auth_token)
-        # ── Twilio sandbox number (use until you get a dedicated WhatsApp number)
-        self.from_number = "whatsapp:+14155238886"
+        self.client      = build_twilio_client(self.account_sid, self.auth_token)
+        self.from_number = WHATSAPP_FROM
 
     # ── Internal helper ────────────────────────────────────
     def _normalise_phone(self, phone: str) -> str:
-        """
-        Accept any of these formats and return digits only (no +):
-          08012345678  →  2348012345678
-          2348012345678 → 2348012345678
-          +2348012345678 → 2348012345678
-        """
-        phone = phone.strip().replace(" ", "").replace("-", "")
-        if phone.startswith("+"):
-            phone = phone[1:]
-        if phone.startswith("0"):          # local Nigerian format
-            phone = "234" + phone[1:]
-        return phone
+        return normalise_phone(phone)
 
     # ── Core send method ───────────────────────────────────
     def send_message(self, to_number: str, message: str):
@@ -48,6 +48,14 @@ class WhatsAppService:
         Send any WhatsApp message.
         Returns (True, sid) on success or (False, error_str) on failure.
         """
+        try:
+            return self._send(to_number, message)
+        except Throttled as e:
+            logger.error(f"❌ Failed to send to {to_number}: {e}")
+            return False, str(e)
+
+    def _send(self, to_number: str, message: str):
+        """send_message, but a 429 from Twilio raises Throttled so the caller can send again later."""
         try:
             normalised  = self._normalise_phone(to_number)
             to_whatsapp = f"whatsapp:+{normalised}"
@@ -57,88 +65,110 @@ class WhatsAppService:
                 body=message,
                 to=to_whatsapp
             )
-            logger.info(f"📤 Message sent to {to_whatsapp} | SID: {response.sid}")
+            logger.debug("📤 Message sent to %s | SID: %s", to_whatsapp, response.sid)
             return True, response.sid
 
         except Exception as e:
-            logger.error(f"❌ Failed to send to {to_number}: {e}")
+            # TwilioRestException carries the HTTP status but not the Retry-After header
+            if getattr(e, "status", None) == 429:
+                raise Throttled("whatsapp", detail=str(e)) from e
+            SEND_FAILURES.log(logger, logging.ERROR, "whatsapp", "❌ Failed to send to %s: %s", to_number, e)
             return False, str(e)
 
     # ── Signal alert ───────────────────────────────────────
-    def send_alert(self, to_number: str, signal: dict):
-        message = self.format_alert_message(signal)
-        return self.send_message(to_number, message)
-
-    def format_alert_message(self, signal: dict) -> str:
-        action = signal.get("action", "N/A")
-        # Choose emoji based on direction
-        action_emoji = "🟢" if action.upper() == "BUY" else "🔴" if action.upper() == "SELL" else "⚪"
-
-        return (
-            f"🚨 *TradeL Alert* 🚨\n"
-            f"──────────────────\n"
-            f"*Pair:*   {signal.get('pair', 'N/A')}\n"
-            f"*Action:* {action_emoji} {action}\n"
-            f"*Entry:*  {signal.get('entry', 'N/A')}\n"
-            f"*TP:*     {signal.get('tp', 'N/A')}\n"
-            f"*SL:*     {signal.get('sl', 'N/A')}\n"
-            f"──────────────────\n"
-            f"{signal.get('message', '')}\n"
-            f"──────────────────\n"
-            f"⏱ {signal.get('timestamp', '')[:16].replace('T', ' ')}\n"
-            f"_TradeL – Never miss a trade._"
-        )
+    def send_alert(self, to_number: str, signal: dict, user: dict | None = None):
+        """Like send_message, but raises Throttled on a 429 (the fan-out sends it again)."""
+        message = self.format_alert_message(signal, user)
+        return self._send(to_number, message)
+
+    def format_alert_message(self, signal: dict, user: dict | None = None) -> str:
+        return alert_message(signal, user)
 
     # ── Welcome message ────────────────────────────────────
     def send_welcome_message(self, user: dict) -> bool:
-        message = (
-            f"🌟 *Welcome to TradeL!* 🌟\n\n"
-            f"Hello {user.get('name', 'Trader')},\n\n"
-            f"Your subscription is now *ACTIVE* ✅\n\n"
-            f"*Plan:*    {user.get('plan', 'basic').title()}\n"
-            f"*Started:* {user.get('joined', '')[:10]}\n"
-            f"*Expiry:*  {user.get('expiry', '')[:10]}\n\n"
-            f"From now on, every trading signal from your group will:\n"
-            f"• 📩 Be sent here instantly\n"
-            f"• 📞 Ring your phone (if push enabled)\n\n"
-            f"Reply *STOP* at any time to pause alerts.\n\n"
-            f"Happy trading! 📈\n"
-            f"*— The TradeL Team*"
-        )
-        success, _ = self.send_message(user["phone"], message)
+        success, _ = self.send_message(user["phone"], welcome_message(user))
         return success
 
     # ── Payment request message ────────────────────────────
     def send_payment_request(self, user: dict, payment: dict) -> bool:
-        bank = payment.get("bank_details", {})
-        message = (
-            f"💳 *TradeL Payment Request*\n\n"
-            f"Hi {user.get('name', 'Trader')},\n\n"
-            f"*Reference:* `{payment.get('reference', 'N/A')}`\n"
-            f"*Amount:*    ₦{payment.get('amount', 5000):,}\n\n"
-            f"*Bank Details:*\n"
-            f"🏦 Bank:    {bank.get('bank', '')}\n"
-            f"👤 Name:    {bank.get('name', '')}\n"
-            f"🔢 Account: {bank.get('account', '')}\n\n"
-            f"*Steps:*\n"
-            f"1️⃣  Transfer ₦{payment.get('amount', 5000):,}\n"
-            f"2️⃣  Use `{payment.get('reference')}` as reference\n"
-            f"3️⃣  Send screenshot here\n"
-            f"4️⃣  Activation within 30 minutes ✅\n\n"
-            f"Questions? Just reply here. 😊"
-        )
-        success, _ = self.send_message(user["phone"], message)
+        success, _ = self.send_message(user["phone"], payment_request_message(user, payment))
         return success
 
     # ── Renewal reminder ───────────────────────────────────
     def send_renewal_reminder(self, user: dict, days_left: int) -> bool:
-        message = (
-            f"⏰ *TradeL Renewal Reminder*\n\n"
-            f"Hi {user.get('name', 'Trader')},\n\n"
-            f"Your TradeL subscription expires in *{days_left} day(s)*.\n\n"
-            f"To keep receiving alerts, please renew before your expiry date.\n"
-            f"Reply *RENEW* and we'll send payment details. 🙏\n\n"
-            f"*— TradeL Team*"
-        )
-        success, _ = self.send_message(user["phone"], message)
-        return success
\ No newline at end of file
+        success, _ = self.send_message(user["phone"], renewal_reminder_message(user, days_left))
+        return success
+
+
+# ─────────────────────────────────────────────
+# MESSAGE BUILDERS (shared with async_alerts.py)
+# The text is in templates.json – see templates.py
+# ─────────────────────────────────────────────
+USER_FIELDS = {
+    "name":   lambda user: user.get("name") or "Trader",
+    "plan":   lambda user: (user.get("plan") or "basic").title(),
+    "joined": lambda user: (user.get("joined") or "")[:10],
+    "expiry": lambda user: (user.get("expiry") or "")[:10],
+    "phone":  lambda user: user.get("phone", "")
+}
+
+
+class UserFields:
+    """The {user.*} values of one user, worked out only for the fields a template uses."""
+
+    __slots__ = ("user",)
+
+    def __init__(self, user: dict | None):
+        self.user = user or {}
+
+    def __contains__(self, field: str) -> bool:
+        return field in USER_FIELDS
+
+    def __getitem__(self, field: str):
+        return USER_FIELDS[field](self.user)
+
+
+def signal_fields(signal: dict) -> dict:
+    action = signal.get("action", "N/A")
+    # Choose emoji based on direction
+    action_emoji = "🟢" if action.upper() == "BUY" else "🔴" if action.upper() == "SELL" else "⚪"
+    return {
+        "pair":         signal.get("pair", "N/A"),
+        "action":       action,
+        "action_emoji": action_emoji,
+        "entry":        signal.get("entry", "N/A"),
+        "tp":           signal.get("tp", "N/A"),
+        "sl":           signal.get("sl", "N/A"),
+        "message":      signal.get("message", ""),
+        "time":         signal.get("timestamp", "")[:16].replace("T", " ")
+    }
+
+
+def _message(name: str, user: dict | None, values=None, key=None) -> str:
+    locale   = user.get("locale") if user else None
+    rendered = get_templates().render(name, values or {}, locale, key)
+    return rendered.fill(UserFields(user)) if rendered.slots else rendered.text
+
+
+def alert_message(signal: dict, user: dict | None = None) -> str:
+    """Rendered once per signal and locale (by signal id); only the user's fields are filled per call."""
+    return _message("alert", user, lambda: signal_fields(signal), key=signal.get("id"))
+
+
+def welcome_message(user: dict) -> str:
+    return _message("welcome", user, key="")
+
+
+def payment_request_message(user: dict, payment: dict) -> str:
+    bank = payment.get("bank_details", {})
+    return _message("payment_request", user, {
+        "reference":    payment.get("reference", "N/A"),
+        "amount":       payment.get("amount", 5000),
+        "bank":         bank.get("bank", ""),
+        "account_name": bank.get("name", ""),
+        "account":      bank.get("account", "")
+    })
+
+
+def renewal_reminder_message(user: dict, days_left: int) -> str:
+    return _message("renewal_reminder", user, {"days_left": days_left}, key=days_left)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+TradeL Bot - Production Entry Point
+wsgi.py
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The bot is created lazily, once per worker process (gunicorn.conf.py does
+it as each worker boots), so the module can be preloaded in the gunicorn
+master. For an ASGI server (uvicorn wsgi:asgi_app) install asgiref; the
+bot then starts on the first request.
+"""
+
+from app import create_app, setup_logging
+
+setup_logging()
+app = create_app(lazy=True)
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    asgi_app = WsgiToAsgi(app)
+except ImportError:
+    asgi_app = None